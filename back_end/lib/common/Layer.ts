@@ -0,0 +1,52 @@
+import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as path from "path";
+import { Construct } from "constructs";
+
+// Python code shared by every handler (importable as the `common` package).
+// Lambda puts the layer's python/ directory on sys.path at /opt/python.
+// requirements.txt (Brotli and MessagePack for the list responses, see
+// common/encoding.py) is installed inside the Lambda build image, so the
+// wheels match the runtime.
+export function createCommonLayer(scope: Construct): lambda.LayerVersion {
+  return new lambda.LayerVersion(scope, "common-layer", {
+    layerVersionName: "gut-to-work-common",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/layers/common`),
+      {
+        bundling: {
+          image: lambda.Runtime.PYTHON_3_12.bundlingImage,
+          command: [
+            "bash",
+            "-c",
+            "pip install -r requirements.txt -t /asset-output/python && cp -r python/. /asset-output/python/",
+          ],
+        },
+      }
+    ),
+    compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+    description: "Shared runtime code for the GutToWork lambdas",
+  });
+}
+
+// NumPy plus the `analysis` package for the insights lambdas. requirements.txt
+// is installed inside the Lambda build image, so the wheels match the runtime.
+export function createAnalysisLayer(scope: Construct): lambda.LayerVersion {
+  return new lambda.LayerVersion(scope, "analysis-layer", {
+    layerVersionName: "gut-to-work-analysis",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/layers/analysis`),
+      {
+        bundling: {
+          image: lambda.Runtime.PYTHON_3_12.bundlingImage,
+          command: [
+            "bash",
+            "-c",
+            "pip install -r requirements.txt -t /asset-output/python && cp -r python/. /asset-output/python/",
+          ],
+        },
+      }
+    ),
+    compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+    description: "NumPy and analysis code for the GutToWork insights",
+  });
+}
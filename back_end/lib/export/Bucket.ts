@@ -0,0 +1,17 @@
+import * as cdk from "aws-cdk-lib";
+import * as s3 from "aws-cdk-lib/aws-s3";
+
+// Finished exports and their manifests; downloads go through presigned URLs
+export function createExportBucket(stack: cdk.Stack): s3.Bucket {
+  return new s3.Bucket(stack, "export-bucket", {
+    blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+    encryption: s3.BucketEncryption.S3_MANAGED,
+    enforceSSL: true,
+    lifecycleRules: [
+      { prefix: "exports/", expiration: cdk.Duration.days(7) },
+      { abortIncompleteMultipartUploadAfter: cdk.Duration.days(1) },
+    ],
+    removalPolicy: cdk.RemovalPolicy.DESTROY,
+    autoDeleteObjects: true,
+  });
+}
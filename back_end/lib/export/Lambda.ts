@@ -0,0 +1,77 @@
+import * as cdk from "aws-cdk-lib";
+import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as path from "path";
+import * as iam from "aws-cdk-lib/aws-iam";
+import * as s3 from "aws-cdk-lib/aws-s3";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+import { Construct } from "constructs";
+
+export interface ExportLambdas {
+  exportPostLambda: lambda.Function;
+  exportIdGetLambda: lambda.Function;
+  exportWorkerLambda: lambda.Function;
+}
+
+export function createExportLambdas(
+  scope: Construct,
+  bucket: s3.Bucket,
+  tables: dynamodb.Table[],
+  commonLayer: lambda.ILayerVersion
+): ExportLambdas {
+  const environment = { EXPORT_BUCKET: bucket.bucketName };
+
+  // export-worker Lambda: streams every table into the bucket
+  const exportWorkerLambda = new lambda.Function(scope, "export-worker", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "export-worker",
+    handler: "handler.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/jobs/export`)
+    ),
+    environment,
+    // Memory is bounded by one scan page plus one upload part, time is not
+    memorySize: 512,
+    timeout: cdk.Duration.minutes(15),
+    // A failed export is recorded in its manifest instead of being retried
+    retryAttempts: 0,
+  });
+  tables.forEach((table) => table.grantReadData(exportWorkerLambda));
+  bucket.grantReadWrite(exportWorkerLambda);
+
+  // export-post Lambda
+  const exportPostLambda = new lambda.Function(scope, "export-post", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "export-post",
+    handler: "post.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/lambdas/export`)
+    ),
+    environment,
+  });
+  exportPostLambda.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  bucket.grantPut(exportPostLambda);
+  exportWorkerLambda.grantInvoke(exportPostLambda);
+
+  // export-id-get Lambda
+  const exportIdGetLambda = new lambda.Function(scope, "export-id-get", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "export-id-get",
+    handler: "get.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/lambdas/export/{export_id}`)
+    ),
+    environment,
+  });
+  exportIdGetLambda.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  // Reads the manifest and signs download URLs for the export itself
+  bucket.grantRead(exportIdGetLambda);
+
+  return { exportPostLambda, exportIdGetLambda, exportWorkerLambda };
+}
@@ -9,20 +9,25 @@ export interface FeelingsLambdas {
   feelingsPostLambda: lambda.Function;
   feelingsIdGetLambda: lambda.Function;
   feelingsIdPutLambda: lambda.Function;
+  feelingsIdPatchLambda: lambda.Function;
   feelingsIdDeleteLambda: lambda.Function;
+  feelingsBatchPostLambda: lambda.Function;
 }
 
 export function createFeelingsLambdas(
   scope: Construct,
-  table: dynamodb.Table
+  table: dynamodb.Table,
+  versionsTable: dynamodb.Table,
+  commonLayer: lambda.ILayerVersion
 ): FeelingsLambdas {
   // Poop-get Lambda
   const feelingsGetLambda = new lambda.Function(scope, "feelings-get", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "feelings-get",
     handler: "get.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/feelings`)
+      path.join(__dirname, `../../services/prod/lambdas/feelings`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -36,10 +41,11 @@ export function createFeelingsLambdas(
   // Poop-post Lambda
   const feelingsPostLambda = new lambda.Function(scope, "feelings-post", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "feelings-post",
     handler: "post.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/feelings`)
+      path.join(__dirname, `../../services/prod/lambdas/feelings`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -53,10 +59,11 @@ export function createFeelingsLambdas(
   // feelingsID-get
   const feelingsIdGetLambda = new lambda.Function(scope, "feelings-id-get", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "feelings-id-get",
     handler: "get.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/feelings/{feelings_id}`)
+      path.join(__dirname, `../../services/prod/lambdas/feelings/{feeling_id}`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -70,10 +77,11 @@ export function createFeelingsLambdas(
   // feelings-id-put Lambda
   const feelingsIdPutLambda = new lambda.Function(scope, "feelings-id-put", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "feelings-id-put",
     handler: "put.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/feelings/{feelings_id}`)
+      path.join(__dirname, `../../services/prod/lambdas/feelings/{feeling_id}`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -84,16 +92,35 @@ export function createFeelingsLambdas(
   );
   table.grantReadWriteData(feelingsIdPutLambda);
 
+  // feelings-id-patch Lambda
+  const feelingsIdPatchLambda = new lambda.Function(scope, "feelings-id-patch", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "feelings-id-patch",
+    handler: "patch.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/lambdas/feelings/{feeling_id}`)
+    ),
+    environment: {
+      DYNAMO_TABLE_NAME: table.tableName,
+    },
+  });
+  feelingsIdPatchLambda.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadWriteData(feelingsIdPatchLambda);
+
   // feelingsId-delete
   const feelingsIdDeleteLambda = new lambda.Function(
     scope,
     "feelings-id-delete",
     {
       runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [commonLayer],
       functionName: "feelings-id-delete",
       handler: "delete.handler",
       code: lambda.Code.fromAsset(
-        path.join(__dirname, `../services/prod/lambdas/feelings/{feelings_id}`)
+        path.join(__dirname, `../../services/prod/lambdas/feelings/{feeling_id}`)
       ),
       environment: {
         DYNAMO_TABLE_NAME: table.tableName,
@@ -105,11 +132,42 @@ export function createFeelingsLambdas(
   );
   table.grantReadWriteData(feelingsIdDeleteLambda);
 
+  // feelings-batch-post Lambda: creates many records in one request
+  const feelingsBatchPostLambda = new lambda.Function(scope, "feelings-batch-post", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "feelings-batch-post",
+    handler: "post.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/lambdas/feelings/batch`)
+    ),
+    environment: {
+      DYNAMO_TABLE_NAME: table.tableName,
+    },
+  });
+  feelingsBatchPostLambda.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadWriteData(feelingsBatchPostLambda);
+
+  // Every write bumps the table's collection version, which the list GET
+  // compares with If-None-Match before reading any records
+  [
+    feelingsPostLambda,
+    feelingsIdPutLambda,
+    feelingsIdPatchLambda,
+    feelingsIdDeleteLambda,
+    feelingsBatchPostLambda,
+  ].forEach((writer) => versionsTable.grantReadWriteData(writer));
+  versionsTable.grantReadData(feelingsGetLambda);
+
   return {
     feelingsGetLambda,
     feelingsPostLambda,
     feelingsIdGetLambda,
     feelingsIdPutLambda,
+    feelingsIdPatchLambda,
     feelingsIdDeleteLambda,
+    feelingsBatchPostLambda,
   };
 }
@@ -9,16 +9,22 @@ export interface FoodRecordsLambdas {
   foodRecordsPost: lambda.Function;
   foodRecordIdGet: lambda.Function;
   foodRecordIdPut: lambda.Function;
+  foodRecordIdPatch: lambda.Function;
   foodRecordIdDelete: lambda.Function;
+  foodRecordsBatchPost: lambda.Function;
 }
 
 export function createFoodRecordsLambdas(
   scope: Construct,
-  table: dynamodb.Table
+  table: dynamodb.Table,
+  ingredientsTable: dynamodb.Table,
+  versionsTable: dynamodb.Table,
+  commonLayer: lambda.ILayerVersion
 ): FoodRecordsLambdas {
   // food-records-get Lambda
   const foodRecordsGet = new lambda.Function(scope, "food-records-get", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "food-records-get",
     handler: "get.handler",
     code: lambda.Code.fromAsset(
@@ -32,10 +38,13 @@ export function createFoodRecordsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(foodRecordsGet);
+  // ?expand=ingredient
+  ingredientsTable.grantReadData(foodRecordsGet);
 
   // food-records-post Lambda
   const foodRecordsPost = new lambda.Function(scope, "food-record-post", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "food-record-post",
     handler: "post.handler",
     code: lambda.Code.fromAsset(
@@ -49,10 +58,13 @@ export function createFoodRecordsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(foodRecordsPost);
+  // Looks up the ingredient's name to store with the record
+  ingredientsTable.grantReadData(foodRecordsPost);
 
   // food-record-id-get Lambda
   const foodRecordIdGet = new lambda.Function(scope, "food-record-id-get", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "food-record-id-get",
     handler: "get.handler",
     code: lambda.Code.fromAsset(
@@ -73,6 +85,7 @@ export function createFoodRecordsLambdas(
   // food-record-id-put Lambda
   const foodRecordIdPut = new lambda.Function(scope, "food-record-id-put", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "food-record-id-put",
     handler: "put.handler",
     code: lambda.Code.fromAsset(
@@ -89,12 +102,38 @@ export function createFoodRecordsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(foodRecordIdPut);
+  // Looks up the ingredient's name to store with the record
+  ingredientsTable.grantReadData(foodRecordIdPut);
+
+  // food-record-id-patch Lambda
+  const foodRecordIdPatch = new lambda.Function(scope, "food-record-id-patch", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "food-record-id-patch",
+    handler: "patch.handler",
+    code: lambda.Code.fromAsset(
+      path.join(
+        __dirname,
+        `../../services/prod/lambdas/food_records/{food_record_id}`
+      )
+    ),
+    environment: {
+      DYNAMO_TABLE_NAME: table.tableName,
+    },
+  });
+  foodRecordIdPatch.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadWriteData(foodRecordIdPatch);
+  // Looks up the ingredient's name to store with the record
+  ingredientsTable.grantReadData(foodRecordIdPatch);
 
   const foodRecordIdDelete = new lambda.Function(
     scope,
     "food-record-id-delete",
     {
       runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [commonLayer],
       functionName: "food-record-id-delete",
       handler: "delete.handler",
       code: lambda.Code.fromAsset(
@@ -112,11 +151,44 @@ export function createFoodRecordsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(foodRecordIdDelete);
+  // food-records-batch-post Lambda: creates many records in one request
+  const foodRecordsBatchPost = new lambda.Function(scope, "food-records-batch-post", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "food-records-batch-post",
+    handler: "post.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/lambdas/food_records/batch`)
+    ),
+    environment: {
+      DYNAMO_TABLE_NAME: table.tableName,
+    },
+  });
+  foodRecordsBatchPost.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadWriteData(foodRecordsBatchPost);
+  // Looks up the ingredient's name to store with the record
+  ingredientsTable.grantReadData(foodRecordsBatchPost);
+
+  // Every write bumps the table's collection version, which the list GET
+  // compares with If-None-Match before reading any records
+  [
+    foodRecordsPost,
+    foodRecordIdPut,
+    foodRecordIdPatch,
+    foodRecordIdDelete,
+    foodRecordsBatchPost,
+  ].forEach((writer) => versionsTable.grantReadWriteData(writer));
+  versionsTable.grantReadData(foodRecordsGet);
+
   return {
     foodRecordsGet,
     foodRecordsPost,
     foodRecordIdGet,
     foodRecordIdPut,
+    foodRecordIdPatch,
     foodRecordIdDelete,
+    foodRecordsBatchPost,
   };
 }
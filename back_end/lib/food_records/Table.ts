@@ -1,13 +1,58 @@
 import * as cdk from "aws-cdk-lib";
 import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
 
+// Records are stored per user: a user's records are one partition, sorted by
+// "<record_date>#<food-record-id>", so date ranges are a query (see common/records.py)
 export function createFoodRecordsTable(stack: cdk.Stack): dynamodb.Table {
-  return new dynamodb.Table(stack, "food-records-table", {
+  const table = new dynamodb.Table(stack, "food-records-by-user-table", {
+    partitionKey: { name: "user_id", type: dynamodb.AttributeType.STRING },
+    sortKey: { name: "date-id", type: dynamodb.AttributeType.STRING },
+    tableName: "food_records_by_user",
+    removalPolicy: cdk.RemovalPolicy.DESTROY,
+    // Feeds the daily_rollups table (see lib/rollups)
+    stream: dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
+  });
+
+  // Turns the record id clients use into the record's key, with a strongly
+  // consistent read (which only local indexes offer)
+  table.addLocalSecondaryIndex({
+    indexName: "by-id",
+    sortKey: { name: "food-record-id", type: dynamodb.AttributeType.STRING },
+  });
+
+  // Finds the records to update when an ingredient is renamed; keys are all
+  // the fan-out needs, so nothing else is copied into the index
+  table.addGlobalSecondaryIndex({
+    indexName: "by-ingredient",
+    partitionKey: { name: "ingredient_id", type: dynamodb.AttributeType.STRING },
+    projectionType: dynamodb.ProjectionType.KEYS_ONLY,
+  });
+
+  return table;
+}
+
+// The table from before records were stored per user, kept (and no longer
+// written) as the source of services/prod/scripts/migrate_user_keys.py
+export function createLegacyFoodRecordsTable(stack: cdk.Stack): dynamodb.Table {
+  const table = new dynamodb.Table(stack, "food-records-table", {
     partitionKey: {
       name: "food-record-id",
       type: dynamodb.AttributeType.STRING,
     },
     tableName: "food_records",
-    removalPolicy: cdk.RemovalPolicy.DESTROY,
+    removalPolicy: cdk.RemovalPolicy.RETAIN,
   });
+
+  // Every record carries record_type = "food_record", so this index keeps all of
+  // them ordered by record_date and date-range reads become a single query
+  table.addGlobalSecondaryIndex({
+    indexName: "by-date",
+    partitionKey: { name: "record_type", type: dynamodb.AttributeType.STRING },
+    sortKey: { name: "record_date", type: dynamodb.AttributeType.STRING },
+  });
+
+  // No by-ingredient index: renames are copied to food_records_by_user only,
+  // and CloudFormation could not add it along with by-date in one update
+
+  return table;
 }
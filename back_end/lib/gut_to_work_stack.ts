@@ -2,15 +2,39 @@ import * as cdk from "aws-cdk-lib";
 import * as apigateway from "aws-cdk-lib/aws-apigateway";
 import { Construct } from "constructs";
 import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
-import { createIngredientsLambdas } from "./ingredients/Lambda";
+import {
+  createIngredientRenamesLambda,
+  createIngredientsLambdas,
+} from "./ingredients/Lambda";
 import { createFoodRecordsLambdas } from "./food_records/Lambda";
 import { createPoopLambdas } from "./poop/Lambda";
 import { createFeelingsLambdas } from "./feelings/Lambda";
 
 import { createIngredientsTable } from "./ingredients/Table";
-import { createFoodRecordsTable } from "./food_records/Table";
-import { createPoopTable } from "./poop/Table";
-import { createFeelingsTable } from "./feelings/Table";
+import {
+  createFoodRecordsTable,
+  createLegacyFoodRecordsTable,
+} from "./food_records/Table";
+import { createLegacyPoopTable, createPoopTable } from "./poop/Table";
+import {
+  createFeelingsTable,
+  createLegacyFeelingsTable,
+} from "./feelings/Table";
+import { createAnalysisLayer, createCommonLayer } from "./common/Layer";
+import { createSummaryLambdas } from "./summary/Lambda";
+import { createInsightsLambdas } from "./insights/Lambda";
+import { createExportBucket } from "./export/Bucket";
+import { createExportLambdas } from "./export/Lambda";
+import { createDailyRollupsTable } from "./rollups/Table";
+import { createDailyRollupsLambda } from "./rollups/Lambda";
+import { createCollectionVersionsTable } from "./versions/Table";
+import {
+  RoutedResource,
+  createApiRouter,
+  createResourceRouters,
+  lambdaModeFrom,
+  routedApiDefinition,
+} from "./router/Lambda";
 export class GutToWork extends cdk.Stack {
   constructor(scope: Construct, id: string, props?: cdk.StackProps) {
     super(scope, id, props);
@@ -20,10 +44,126 @@ export class GutToWork extends cdk.Stack {
     const foodRecordsTable = createFoodRecordsTable(this);
     const poopTable = createPoopTable(this);
     const feelingsTable = createFeelingsTable(this);
+    const dailyRollupsTable = createDailyRollupsTable(this);
+    const versionsTable = createCollectionVersionsTable(this);
 
-    // Import the OpenAPI spec
-    const openApiSpecProd = apigateway.AssetApiDefinition.fromAsset(
-      "./services/prod/api.yaml"
+    // Records from before they were stored per user, read once by
+    // services/prod/scripts/migrate_user_keys.py
+    createLegacyFoodRecordsTable(this);
+    createLegacyPoopTable(this);
+    createLegacyFeelingsTable(this);
+
+    // Shared Python code (DynamoDB client, ...) used by every handler
+    const commonLayer = createCommonLayer(this);
+
+    const apiSpecPath = "./services/prod/api.yaml";
+    let openApiSpecProd: apigateway.ApiDefinition;
+
+    const lambdaMode = lambdaModeFrom(this);
+    if (lambdaMode === "endpoint") {
+      // Create all ingredients Lambdas
+      const ingredientsLambdas = createIngredientsLambdas(
+        this,
+        ingredientsTable,
+        versionsTable,
+        commonLayer
+      );
+
+      const foodLambdas = createFoodRecordsLambdas(
+        this,
+        foodRecordsTable,
+        ingredientsTable,
+        versionsTable,
+        commonLayer
+      );
+      const poopLambdas = createPoopLambdas(
+        this,
+        poopTable,
+        versionsTable,
+        commonLayer
+      );
+      const feelingsLambdas = createFeelingsLambdas(
+        this,
+        feelingsTable,
+        versionsTable,
+        commonLayer
+      );
+
+      // Optionally, you can access individual Lambdas:
+      // ingredientsLambdas.get, ingredientsLambdas.post, etc.
+
+      // Import the OpenAPI spec
+      openApiSpecProd = apigateway.AssetApiDefinition.fromAsset(apiSpecPath);
+    } else {
+      // Fewer, warmer functions: routers dispatching to the same handlers
+      const routedResources: RoutedResource[] = [
+        {
+          directory: "ingredients",
+          functionPrefix: "ingredient",
+          table: ingredientsTable,
+          writeTables: [versionsTable],
+        },
+        {
+          directory: "food_records",
+          functionPrefix: "food-record",
+          table: foodRecordsTable,
+          readTables: [ingredientsTable],
+          writeTables: [versionsTable],
+        },
+        {
+          directory: "poop",
+          functionPrefix: "poop",
+          table: poopTable,
+          writeTables: [versionsTable],
+        },
+        {
+          directory: "feelings",
+          functionPrefix: "feeling",
+          table: feelingsTable,
+          writeTables: [versionsTable],
+        },
+      ];
+      const targets =
+        lambdaMode === "resource"
+          ? createResourceRouters(this, routedResources, commonLayer)
+          : createApiRouter(this, routedResources, commonLayer);
+      openApiSpecProd = routedApiDefinition(apiSpecPath, targets);
+    }
+
+    // Keeps the ingredient names stored on food records current
+    const ingredientRenamesLambda = createIngredientRenamesLambda(
+      this,
+      ingredientsTable,
+      foodRecordsTable,
+      versionsTable,
+      commonLayer
+    );
+
+    // Per-day counters kept up to date from the log tables' streams, and the
+    // read-only reports built on them; deployed the same in every mode
+    const dailyRollupsLambda = createDailyRollupsLambda(
+      this,
+      dailyRollupsTable,
+      [poopTable, feelingsTable, foodRecordsTable],
+      commonLayer
+    );
+    const summaryLambdas = createSummaryLambdas(
+      this,
+      dailyRollupsTable,
+      commonLayer
+    );
+    const insightsLambdas = createInsightsLambdas(
+      this,
+      foodRecordsTable,
+      dailyRollupsTable,
+      commonLayer,
+      createAnalysisLayer(this)
+    );
+    const exportLambdas = createExportLambdas(
+      this,
+      createExportBucket(this),
+      [ingredientsTable, foodRecordsTable, poopTable, feelingsTable],
+      commonLayer
     );
 
     // Create the API Gateway REST API using the spec
@@ -31,16 +171,6 @@ export class GutToWork extends cdk.Stack {
       apiDefinition: openApiSpecProd,
     });
 
-    // Create all ingredients Lambdas
-    const ingredientsLambdas = createIngredientsLambdas(this, ingredientsTable);
-
-    const foodLambdas = createFoodRecordsLambdas(this, foodRecordsTable);
-    const poopLambdas = createPoopLambdas(this, poopTable);
-    const feelingsLambdas = createFeelingsLambdas(this, feelingsTable);
-
-    // Optionally, you can access individual Lambdas:
-    // ingredientsLambdas.get, ingredientsLambdas.post, etc.
-
     // Output the API Gateway endpoint URL
     new cdk.CfnOutput(this, "ApiProdEndpoint", {
       value: `https://${apiProd.restApiId}.execute-api.${this.region}.amazonaws.com/`,
@@ -1,7 +1,10 @@
+import * as cdk from "aws-cdk-lib";
 import * as lambda from "aws-cdk-lib/aws-lambda";
 import * as path from "path";
 import * as iam from "aws-cdk-lib/aws-iam";
 import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+import * as sqs from "aws-cdk-lib/aws-sqs";
+import { DynamoEventSource, SqsDlq } from "aws-cdk-lib/aws-lambda-event-sources";
 import { Construct } from "constructs";
 
 export interface IngredientsLambdas {
@@ -9,16 +12,22 @@ export interface IngredientsLambdas {
   ingredientsPost: lambda.Function;
   ingredientsIdGet: lambda.Function;
   ingredientsIdPut: lambda.Function;
+  ingredientsIdPatch: lambda.Function;
   ingredientsIdDelete: lambda.Function;
+  ingredientsSearchGet: lambda.Function;
+  ingredientsSimilarGet: lambda.Function;
 }
 
 export function createIngredientsLambdas(
   scope: Construct,
-  table: dynamodb.Table
+  table: dynamodb.Table,
+  versionsTable: dynamodb.Table,
+  commonLayer: lambda.ILayerVersion
 ): IngredientsLambdas {
   // ingredients-get Lambda
   const ingredientsGet = new lambda.Function(scope, "ingredients-get", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "ingredients-get",
     handler: "get.handler",
     code: lambda.Code.fromAsset(
@@ -32,10 +41,12 @@ export function createIngredientsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(ingredientsGet);
+  versionsTable.grantReadData(ingredientsGet);
 
   // ingredients-post Lambda
   const ingredientsPost = new lambda.Function(scope, "ingredients-post", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "ingredients-post",
     handler: "post.handler",
     code: lambda.Code.fromAsset(
@@ -49,10 +60,12 @@ export function createIngredientsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(ingredientsPost);
+  versionsTable.grantReadWriteData(ingredientsPost);
 
   // ingredient-id-get Lambda
   const ingredientsIdGet = new lambda.Function(scope, "ingredient-id-get", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "ingredient-id-get",
     handler: "get.handler",
     code: lambda.Code.fromAsset(
@@ -69,10 +82,13 @@ export function createIngredientsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(ingredientsIdGet);
+  // Checks whether its cached ingredients are still current
+  versionsTable.grantReadData(ingredientsIdGet);
 
   // ingredient-id-put Lambda
   const ingredientsIdPut = new lambda.Function(scope, "ingredient-id-put", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "ingredient-id-put",
     handler: "put.handler",
     code: lambda.Code.fromAsset(
@@ -89,6 +105,29 @@ export function createIngredientsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(ingredientsIdPut);
+  versionsTable.grantReadWriteData(ingredientsIdPut);
+
+  // ingredient-id-patch Lambda
+  const ingredientsIdPatch = new lambda.Function(scope, "ingredient-id-patch", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "ingredient-id-patch",
+    handler: "patch.handler",
+    code: lambda.Code.fromAsset(
+      path.join(
+        __dirname,
+        `../../services/prod/lambdas/ingredients/{ingredient_id}`
+      )
+    ),
+    environment: {
+      DYNAMO_TABLE_NAME: table.tableName,
+    },
+  });
+  ingredientsIdPatch.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadWriteData(ingredientsIdPatch);
+  versionsTable.grantReadWriteData(ingredientsIdPatch);
 
   // ingredient-id-delete Lambda
   const ingredientsIdDelete = new lambda.Function(
@@ -96,6 +135,7 @@ export function createIngredientsLambdas(
     "ingredient-id-delete",
     {
       runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [commonLayer],
       functionName: "ingredient-id-delete",
       handler: "delete.handler",
       code: lambda.Code.fromAsset(
@@ -113,12 +153,112 @@ export function createIngredientsLambdas(
     new iam.ServicePrincipal("apigateway.amazonaws.com")
   );
   table.grantReadWriteData(ingredientsIdDelete);
+  versionsTable.grantReadWriteData(ingredientsIdDelete);
+
+  // ingredients-search-get Lambda (autocomplete, answered from an in-memory index)
+  const ingredientsSearchGet = new lambda.Function(
+    scope,
+    "ingredients-search-get",
+    {
+      runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [commonLayer],
+      functionName: "ingredients-search-get",
+      handler: "get.handler",
+      code: lambda.Code.fromAsset(
+        path.join(__dirname, `../../services/prod/lambdas/ingredients/search`)
+      ),
+      // Building the index is the only slow part, and it happens once per container
+      memorySize: 512,
+      environment: {
+        DYNAMO_TABLE_NAME: table.tableName,
+      },
+    }
+  );
+  ingredientsSearchGet.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadData(ingredientsSearchGet);
+  versionsTable.grantReadData(ingredientsSearchGet);
+
+  // ingredients-similar-get Lambda (likely typos of a name, from the same index)
+  const ingredientsSimilarGet = new lambda.Function(
+    scope,
+    "ingredients-similar-get",
+    {
+      runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [commonLayer],
+      functionName: "ingredients-similar-get",
+      handler: "get.handler",
+      code: lambda.Code.fromAsset(
+        path.join(__dirname, `../../services/prod/lambdas/ingredients/similar`)
+      ),
+      memorySize: 512,
+      environment: {
+        DYNAMO_TABLE_NAME: table.tableName,
+      },
+    }
+  );
+  ingredientsSimilarGet.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadData(ingredientsSimilarGet);
+  versionsTable.grantReadData(ingredientsSimilarGet);
 
   return {
     ingredientsGet,
     ingredientsPost,
     ingredientsIdGet,
     ingredientsIdPut,
+    ingredientsIdPatch,
     ingredientsIdDelete,
+    ingredientsSearchGet,
+    ingredientsSimilarGet,
   };
 }
+
+// Copies renamed ingredients' names to the food records that use them
+export function createIngredientRenamesLambda(
+  scope: Construct,
+  ingredientsTable: dynamodb.Table,
+  foodRecordsTable: dynamodb.Table,
+  versionsTable: dynamodb.Table,
+  commonLayer: lambda.ILayerVersion
+): lambda.Function {
+  const ingredientRenamesLambda = new lambda.Function(
+    scope,
+    "ingredient-renames",
+    {
+      runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [commonLayer],
+      functionName: "ingredient-renames",
+      handler: "handler.handler",
+      code: lambda.Code.fromAsset(
+        path.join(__dirname, `../../services/prod/streams/ingredient_renames`)
+      ),
+      // A popular ingredient can be on thousands of records
+      timeout: cdk.Duration.minutes(5),
+    }
+  );
+  foodRecordsTable.grantReadWriteData(ingredientRenamesLambda);
+  versionsTable.grantReadWriteData(ingredientRenamesLambda);
+
+  // Renames that still fail after every retry, kept so their food records can
+  // be fixed (scripts/backfill.py food-record-names) instead of silently keeping the old name
+  const failedRenames = new sqs.Queue(scope, "ingredient-renames-failed", {
+    queueName: "ingredient-renames-failed",
+    retentionPeriod: cdk.Duration.days(14),
+  });
+  ingredientRenamesLambda.addEventSource(
+    new DynamoEventSource(ingredientsTable, {
+      startingPosition: lambda.StartingPosition.TRIM_HORIZON,
+      batchSize: 10,
+      reportBatchItemFailures: true,
+      // A batch that crashes the function is split until the bad record is alone
+      bisectBatchOnFunctionError: true,
+      retryAttempts: 10,
+      onFailure: new SqsDlq(failedRenames),
+    })
+  );
+
+  return ingredientRenamesLambda;
+}
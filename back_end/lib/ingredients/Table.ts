@@ -1,13 +1,57 @@
 import * as cdk from "aws-cdk-lib";
 import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+import { Construct } from "constructs";
+
+// CloudFormation adds at most one global secondary index to an existing table
+// per stack update, and the ingredients table gained two. A stack deployed
+// without them is brought up to date in two deploys (see README):
+//   1. npx cdk deploy -c indexStage=1   adds by-normalized-name
+//   2. npx cdk deploy                   adds by-updated-at
+const LATEST_INDEX_STAGE = 2;
+
+export function indexStageFrom(scope: Construct): number {
+  const stage = Number(scope.node.tryGetContext("indexStage") ?? LATEST_INDEX_STAGE);
+  if (!Number.isInteger(stage) || stage < 1 || stage > LATEST_INDEX_STAGE) {
+    throw new Error(
+      `Unknown indexStage '${stage}', expected 1 to ${LATEST_INDEX_STAGE}`
+    );
+  }
+  return stage;
+}
 
 export function createIngredientsTable(stack: cdk.Stack): dynamodb.Table {
-  return new dynamodb.Table(stack, "ingredients-table", {
+  const table = new dynamodb.Table(stack, "ingredients-table", {
     partitionKey: {
       name: "ingredients-id",
       type: dynamodb.AttributeType.STRING,
     },
     tableName: "ingredients",
     removalPolicy: cdk.RemovalPolicy.DESTROY,
+    // Renames are copied to food_records from the stream (see ingredients/Lambda.ts)
+    stream: dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
+  });
+
+  // All ingredients share record_type = "ingredient", so the catalog is kept
+  // sorted by normalized_name: exact matches are a keyed lookup and prefix
+  // matches a begins_with query instead of a scan over every ingredient
+  table.addGlobalSecondaryIndex({
+    indexName: "by-normalized-name",
+    partitionKey: { name: "record_type", type: dynamodb.AttributeType.STRING },
+    sortKey: { name: "normalized_name", type: dynamodb.AttributeType.STRING },
+  });
+
+  // Ingredients in the order they were last written, so the search index
+  // (common/ingredient_index.py) can re-read only what changed since its last refresh
+  if (indexStageFrom(stack) < 2) {
+    return table;
+  }
+  table.addGlobalSecondaryIndex({
+    indexName: "by-updated-at",
+    partitionKey: { name: "record_type", type: dynamodb.AttributeType.STRING },
+    sortKey: { name: "updated_at", type: dynamodb.AttributeType.NUMBER },
+    projectionType: dynamodb.ProjectionType.INCLUDE,
+    nonKeyAttributes: ["ingredient_name"],
   });
+
+  return table;
 }
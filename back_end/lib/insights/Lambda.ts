@@ -0,0 +1,43 @@
+import * as cdk from "aws-cdk-lib";
+import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as path from "path";
+import * as iam from "aws-cdk-lib/aws-iam";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+import { Construct } from "constructs";
+
+export interface InsightsLambdas {
+  insightsIngredientsGetLambda: lambda.Function;
+}
+
+export function createInsightsLambdas(
+  scope: Construct,
+  foodRecordsTable: dynamodb.Table,
+  rollupsTable: dynamodb.Table,
+  commonLayer: lambda.ILayerVersion,
+  analysisLayer: lambda.ILayerVersion
+): InsightsLambdas {
+  // insights-ingredients-get Lambda
+  const insightsIngredientsGetLambda = new lambda.Function(
+    scope,
+    "insights-ingredients-get",
+    {
+      runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [commonLayer, analysisLayer],
+      functionName: "insights-ingredients-get",
+      handler: "get.handler",
+      code: lambda.Code.fromAsset(
+        path.join(__dirname, `../../services/prod/lambdas/insights/ingredients`)
+      ),
+      // NumPy's import and a few years of food records need more than the defaults
+      memorySize: 512,
+      timeout: cdk.Duration.seconds(15),
+    }
+  );
+  insightsIngredientsGetLambda.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  foodRecordsTable.grantReadData(insightsIngredientsGetLambda);
+  rollupsTable.grantReadData(insightsIngredientsGetLambda);
+
+  return { insightsIngredientsGetLambda };
+}
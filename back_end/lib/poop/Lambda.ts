@@ -9,20 +9,25 @@ export interface PoopLambdas {
   poopPostLambda: lambda.Function;
   poopIdGetLambda: lambda.Function;
   poopIdPutLambda: lambda.Function;
+  poopIdPatchLambda: lambda.Function;
   poopIdDeleteLambda: lambda.Function;
+  poopBatchPostLambda: lambda.Function;
 }
 
 export function createPoopLambdas(
   scope: Construct,
-  table: dynamodb.Table
+  table: dynamodb.Table,
+  versionsTable: dynamodb.Table,
+  commonLayer: lambda.ILayerVersion
 ): PoopLambdas {
   // Poop-get Lambda
   const poopGetLambda = new lambda.Function(scope, "poop-get", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "poop-get",
     handler: "get.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/poop`)
+      path.join(__dirname, `../../services/prod/lambdas/poop`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -36,10 +41,11 @@ export function createPoopLambdas(
   // Poop-post Lambda
   const poopPostLambda = new lambda.Function(scope, "poop-post", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "poop-post",
     handler: "post.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/poop`)
+      path.join(__dirname, `../../services/prod/lambdas/poop`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -53,10 +59,11 @@ export function createPoopLambdas(
   // poopID-get
   const poopIdGetLambda = new lambda.Function(scope, "poop-id-get", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "poop-id-get",
     handler: "get.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/poop/{poop_id}`)
+      path.join(__dirname, `../../services/prod/lambdas/poop/{poop_id}`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -70,10 +77,11 @@ export function createPoopLambdas(
   // poop-id-put Lambda
   const poopIdPutLambda = new lambda.Function(scope, "poop-id-put", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "poop-id-put",
     handler: "put.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/poop/{poop_id}`)
+      path.join(__dirname, `../../services/prod/lambdas/poop/{poop_id}`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -84,13 +92,32 @@ export function createPoopLambdas(
   );
   table.grantReadWriteData(poopIdPutLambda);
 
+  // poop-id-patch Lambda
+  const poopIdPatchLambda = new lambda.Function(scope, "poop-id-patch", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "poop-id-patch",
+    handler: "patch.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/lambdas/poop/{poop_id}`)
+    ),
+    environment: {
+      DYNAMO_TABLE_NAME: table.tableName,
+    },
+  });
+  poopIdPatchLambda.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadWriteData(poopIdPatchLambda);
+
   // poopId-delete
   const poopIdDeleteLambda = new lambda.Function(scope, "poop-id-delete", {
     runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
     functionName: "poop-id-delete",
     handler: "delete.handler",
     code: lambda.Code.fromAsset(
-      path.join(__dirname, `../services/prod/lambdas/poop/{poop_id}`)
+      path.join(__dirname, `../../services/prod/lambdas/poop/{poop_id}`)
     ),
     environment: {
       DYNAMO_TABLE_NAME: table.tableName,
@@ -101,11 +128,42 @@ export function createPoopLambdas(
   );
   table.grantReadWriteData(poopIdDeleteLambda);
 
+  // poop-batch-post Lambda: creates many records in one request
+  const poopBatchPostLambda = new lambda.Function(scope, "poop-batch-post", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "poop-batch-post",
+    handler: "post.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/lambdas/poop/batch`)
+    ),
+    environment: {
+      DYNAMO_TABLE_NAME: table.tableName,
+    },
+  });
+  poopBatchPostLambda.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  table.grantReadWriteData(poopBatchPostLambda);
+
+  // Every write bumps the table's collection version, which the list GET
+  // compares with If-None-Match before reading any records
+  [
+    poopPostLambda,
+    poopIdPutLambda,
+    poopIdPatchLambda,
+    poopIdDeleteLambda,
+    poopBatchPostLambda,
+  ].forEach((writer) => versionsTable.grantReadWriteData(writer));
+  versionsTable.grantReadData(poopGetLambda);
+
   return {
     poopGetLambda,
     poopPostLambda,
     poopIdGetLambda,
     poopIdPutLambda,
+    poopIdPatchLambda,
     poopIdDeleteLambda,
+    poopBatchPostLambda,
   };
 }
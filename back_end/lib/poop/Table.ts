@@ -1,10 +1,44 @@
 import * as cdk from "aws-cdk-lib";
 import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
 
+// Records are stored per user: a user's records are one partition, sorted by
+// "<poop_date>#<poop-id>", so date ranges are a query (see common/records.py)
 export function createPoopTable(stack: cdk.Stack): dynamodb.Table {
-  return new dynamodb.Table(stack, "poop-table", {
+  const table = new dynamodb.Table(stack, "poop-by-user-table", {
+    partitionKey: { name: "user_id", type: dynamodb.AttributeType.STRING },
+    sortKey: { name: "date-id", type: dynamodb.AttributeType.STRING },
+    tableName: "poop_by_user",
+    removalPolicy: cdk.RemovalPolicy.DESTROY,
+    // Feeds the daily_rollups table (see lib/rollups)
+    stream: dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
+  });
+
+  // Turns the record id clients use into the record's key, with a strongly
+  // consistent read (which only local indexes offer)
+  table.addLocalSecondaryIndex({
+    indexName: "by-id",
+    sortKey: { name: "poop-id", type: dynamodb.AttributeType.STRING },
+  });
+
+  return table;
+}
+
+// The table from before records were stored per user, kept (and no longer
+// written) as the source of services/prod/scripts/migrate_user_keys.py
+export function createLegacyPoopTable(stack: cdk.Stack): dynamodb.Table {
+  const table = new dynamodb.Table(stack, "poop-table", {
     partitionKey: { name: "poop-id", type: dynamodb.AttributeType.STRING },
     tableName: "poop",
-    removalPolicy: cdk.RemovalPolicy.DESTROY,
+    removalPolicy: cdk.RemovalPolicy.RETAIN,
   });
+
+  // Every record carries record_type = "poop", so this index keeps all of them
+  // ordered by poop_date and date-range reads become a single query
+  table.addGlobalSecondaryIndex({
+    indexName: "by-date",
+    partitionKey: { name: "record_type", type: dynamodb.AttributeType.STRING },
+    sortKey: { name: "poop_date", type: dynamodb.AttributeType.STRING },
+  });
+
+  return table;
 }
@@ -0,0 +1,53 @@
+import * as cdk from "aws-cdk-lib";
+import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as path from "path";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+import * as sqs from "aws-cdk-lib/aws-sqs";
+import { DynamoEventSource, SqsDlq } from "aws-cdk-lib/aws-lambda-event-sources";
+import { Construct } from "constructs";
+
+export function createDailyRollupsLambda(
+  scope: Construct,
+  rollupsTable: dynamodb.Table,
+  sourceTables: dynamodb.Table[],
+  commonLayer: lambda.ILayerVersion
+): lambda.Function {
+  const dailyRollupsLambda = new lambda.Function(scope, "daily-rollups", {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: "daily-rollups",
+    handler: "handler.handler",
+    code: lambda.Code.fromAsset(
+      path.join(__dirname, `../../services/prod/streams/daily_rollups`)
+    ),
+    // A batch of 100 records is 100 transactions, one after the other: far more than the default 3 s
+    timeout: cdk.Duration.minutes(1),
+  });
+  rollupsTable.grantReadWriteData(dailyRollupsLambda);
+
+  // Where batches that still fail after every retry are recorded (the shard
+  // and sequence numbers to replay, or to run the daily-rollups backfill for),
+  // instead of being dropped while the rollups drift from the tables
+  const failedBatches = new sqs.Queue(scope, "daily-rollups-failed", {
+    queueName: "daily-rollups-failed",
+    retentionPeriod: cdk.Duration.days(14),
+  });
+
+  for (const table of sourceTables) {
+    dailyRollupsLambda.addEventSource(
+      new DynamoEventSource(table, {
+        startingPosition: lambda.StartingPosition.TRIM_HORIZON,
+        batchSize: 100,
+        // The handler reports the first record it could not apply and
+        // Lambda retries the batch from there
+        reportBatchItemFailures: true,
+        // A batch that crashes the function is split until the bad record is alone
+        bisectBatchOnFunctionError: true,
+        retryAttempts: 10,
+        onFailure: new SqsDlq(failedBatches),
+      })
+    );
+  }
+
+  return dailyRollupsLambda;
+}
@@ -0,0 +1,16 @@
+import * as cdk from "aws-cdk-lib";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+
+// One row of counters per day, maintained from the log tables' streams.
+// The same table holds short-lived event#<id> markers that make replayed
+// stream records a no-op; they expire through TTL.
+export function createDailyRollupsTable(stack: cdk.Stack): dynamodb.Table {
+  const table = new dynamodb.Table(stack, "daily-rollups-table", {
+    partitionKey: { name: "day", type: dynamodb.AttributeType.STRING },
+    tableName: "daily_rollups",
+    timeToLiveAttribute: "expires_at",
+    removalPolicy: cdk.RemovalPolicy.DESTROY,
+  });
+
+  return table;
+}
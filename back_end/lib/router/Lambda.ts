@@ -0,0 +1,131 @@
+import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as apigateway from "aws-cdk-lib/aws-apigateway";
+import * as path from "path";
+import * as fs from "fs";
+import * as os from "os";
+import * as iam from "aws-cdk-lib/aws-iam";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+import { Construct } from "constructs";
+
+// How the API is deployed (cdk deploy -c lambdaMode=resource):
+//   endpoint - one function per endpoint (default)
+//   resource - one router function per resource, e.g. "poop-router"
+//   api      - a single router function for the whole API
+// The routers dispatch to the same handler files (see common/router.py).
+export type LambdaMode = "endpoint" | "resource" | "api";
+
+export interface RoutedResource {
+  // Directory below services/prod/lambdas, also the path of the resource
+  directory: string;
+  // Prefix of the per-endpoint function names in api.yaml, e.g. "food-record"
+  // covers food-records-get, food-record-post, food-record-id-get, ...
+  functionPrefix: string;
+  table: dynamodb.Table;
+  // Other tables the resource's handlers read, e.g. ingredients for food records
+  readTables?: dynamodb.Table[];
+  // Other tables the resource's handlers write, e.g. collection_versions
+  writeTables?: dynamodb.Table[];
+}
+
+const LAMBDAS_DIR = path.join(__dirname, `../../services/prod/lambdas`);
+
+export function lambdaModeFrom(scope: Construct): LambdaMode {
+  const mode = scope.node.tryGetContext("lambdaMode") ?? "endpoint";
+  if (!["endpoint", "resource", "api"].includes(mode)) {
+    throw new Error(
+      `Unknown lambdaMode '${mode}', expected endpoint, resource or api`
+    );
+  }
+  return mode;
+}
+
+function createRouterLambda(
+  scope: Construct,
+  name: string,
+  directory: string,
+  tables: dynamodb.Table[],
+  readTables: dynamodb.Table[],
+  commonLayer: lambda.ILayerVersion
+): lambda.Function {
+  const router = new lambda.Function(scope, name, {
+    runtime: lambda.Runtime.PYTHON_3_12,
+    layers: [commonLayer],
+    functionName: name,
+    handler: "router.handler",
+    code: lambda.Code.fromAsset(directory),
+  });
+  router.grantInvoke(new iam.ServicePrincipal("apigateway.amazonaws.com"));
+  tables.forEach((table) => table.grantReadWriteData(router));
+  readTables.forEach((table) => table.grantReadData(router));
+  return router;
+}
+
+// One function per resource; returns the function name each endpoint
+// function name of api.yaml should be replaced with
+export function createResourceRouters(
+  scope: Construct,
+  resources: RoutedResource[],
+  commonLayer: lambda.ILayerVersion
+): Record<string, string> {
+  const targets: Record<string, string> = {};
+  for (const resource of resources) {
+    const name = `${resource.functionPrefix}-router`;
+    createRouterLambda(
+      scope,
+      name,
+      path.join(LAMBDAS_DIR, resource.directory),
+      [resource.table, ...(resource.writeTables ?? [])],
+      resource.readTables ?? [],
+      commonLayer
+    );
+    // The literal name, not router.functionName: the spec is written at synth
+    // time and would otherwise contain an unresolved token
+    targets[resource.functionPrefix] = name;
+  }
+  return targets;
+}
+
+// One function for every endpoint of the API
+export function createApiRouter(
+  scope: Construct,
+  resources: RoutedResource[],
+  commonLayer: lambda.ILayerVersion
+): Record<string, string> {
+  const name = "api-router";
+  createRouterLambda(
+    scope,
+    name,
+    LAMBDAS_DIR,
+    resources.flatMap((resource) => [
+      resource.table,
+      ...(resource.writeTables ?? []),
+    ]),
+    resources.flatMap((resource) => resource.readTables ?? []),
+    commonLayer
+  );
+  const targets: Record<string, string> = {};
+  for (const resource of resources) {
+    targets[resource.functionPrefix] = name;
+  }
+  return targets;
+}
+
+// api.yaml with the integrations pointed at the routers instead of the
+// per-endpoint functions. The rewritten spec goes to a temp directory and is
+// deployed as an asset like the original one.
+export function routedApiDefinition(
+  specPath: string,
+  targets: Record<string, string>
+): apigateway.ApiDefinition {
+  let spec = fs.readFileSync(specPath, "utf8");
+  for (const [prefix, functionName] of Object.entries(targets)) {
+    spec = spec.replace(
+      new RegExp(`function:${prefix}[\\w-]*/invocations`, "g"),
+      `function:${functionName}/invocations`
+    );
+  }
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), "guttowork-api-"));
+  const routedSpecPath = path.join(dir, "api.yaml");
+  fs.writeFileSync(routedSpecPath, spec);
+  return apigateway.AssetApiDefinition.fromAsset(routedSpecPath);
+}
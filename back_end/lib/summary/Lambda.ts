@@ -0,0 +1,36 @@
+import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as path from "path";
+import * as iam from "aws-cdk-lib/aws-iam";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+import { Construct } from "constructs";
+
+export interface SummaryLambdas {
+  summaryDailyGetLambda: lambda.Function;
+}
+
+export function createSummaryLambdas(
+  scope: Construct,
+  rollupsTable: dynamodb.Table,
+  commonLayer: lambda.ILayerVersion
+): SummaryLambdas {
+  // summary-daily-get Lambda
+  const summaryDailyGetLambda = new lambda.Function(
+    scope,
+    "summary-daily-get",
+    {
+      runtime: lambda.Runtime.PYTHON_3_12,
+      layers: [commonLayer],
+      functionName: "summary-daily-get",
+      handler: "get.handler",
+      code: lambda.Code.fromAsset(
+        path.join(__dirname, `../../services/prod/lambdas/summary/daily`)
+      ),
+    }
+  );
+  summaryDailyGetLambda.grantInvoke(
+    new iam.ServicePrincipal("apigateway.amazonaws.com")
+  );
+  rollupsTable.grantReadData(summaryDailyGetLambda);
+
+  return { summaryDailyGetLambda };
+}
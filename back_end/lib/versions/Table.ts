@@ -0,0 +1,15 @@
+import * as cdk from "aws-cdk-lib";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
+
+// One row per collection (table) with a counter bumped on every write to it,
+// so warm containers can tell whether their in-memory copies are stale
+// (see common/versions.py)
+export function createCollectionVersionsTable(stack: cdk.Stack): dynamodb.Table {
+  const table = new dynamodb.Table(stack, "collection-versions-table", {
+    partitionKey: { name: "collection", type: dynamodb.AttributeType.STRING },
+    tableName: "collection_versions",
+    removalPolicy: cdk.RemovalPolicy.DESTROY,
+  });
+
+  return table;
+}
@@ -0,0 +1,85 @@
+"""Per-invocation latency of a new boto3 client per call vs the shared common.dynamo client.
+
+Runs the same get_item a handler would do, against a local DynamoDB stand-in:
+
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python client_reuse.py --endpoint-url http://localhost:8000 --invocations 500
+
+"per-invocation" rebuilds the client inside every call, which is what the
+handlers did before; "shared" reuses common.dynamo.get_client().
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common import dynamo  # noqa: E402
+
+TABLE = 'benchmark-client-reuse'
+KEY = {'poop-id': {'S': 'benchmark'}}
+
+
+def ensure_table(client):
+    try:
+        client.create_table(
+            TableName=TABLE,
+            KeySchema=[{'AttributeName': 'poop-id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'poop-id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        client.get_waiter('table_exists').wait(TableName=TABLE)
+    except client.exceptions.ResourceInUseException:
+        pass
+    client.put_item(TableName=TABLE, Item={**KEY, 'score': {'N': '3'}, 'poop_date': {'S': '2025-03-24'}})
+
+
+def per_invocation(endpoint_url):
+    client = boto3.client('dynamodb', region_name=dynamo.REGION, endpoint_url=endpoint_url)
+    client.get_item(TableName=TABLE, Key=KEY)
+
+
+def shared(endpoint_url):
+    dynamo.get_client().get_item(TableName=TABLE, Key=KEY)
+
+
+def measure(invoke, endpoint_url, invocations, warmup):
+    for _ in range(warmup):
+        invoke(endpoint_url)
+    timings = []
+    for _ in range(invocations):
+        start = time.perf_counter()
+        invoke(endpoint_url)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:>15}: mean {statistics.mean(timings):7.2f} ms  "
+          f"p50 {statistics.median(timings):7.2f} ms  p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', default='http://localhost:8000')
+    parser.add_argument('--invocations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    args = parser.parse_args()
+
+    # Credentials are not checked by DynamoDB Local but botocore insists on having some
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+    os.environ[dynamo.ENDPOINT_URL_ENV] = args.endpoint_url
+
+    ensure_table(dynamo.get_client())
+    report('per-invocation', measure(per_invocation, args.endpoint_url, args.invocations, args.warmup))
+    report('shared', measure(shared, args.endpoint_url, args.invocations, args.warmup))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Deserialization speed of common.codec vs boto3's TypeDeserializer on a large scan result.
+
+    python codec.py --items 50000 --repeat 5
+
+The synthetic scan mixes the shapes the tables actually hold (food records are
+all strings, poop and feelings records carry numbers) plus a nested map and a
+list so both codecs have to do full type dispatch.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from boto3.dynamodb.types import TypeDeserializer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common.codec import deserialize_items  # noqa: E402
+
+
+def synthetic_scan(count, seed=0):
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            items.append({
+                'food-record-id': {'S': f'{i:032x}'},
+                'record_type': {'S': 'food_record'},
+                'record_date': {'S': f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'},
+                'ingredient_id': {'S': f'{rng.getrandbits(128):032x}'},
+                'ingredient_name': {'S': rng.choice(['potato', 'greek yogurt', 'tomato', 'rice'])},
+                'portion_size': {'S': rng.choice(['big', 'normal', 'small'])},
+                'cooking_type': {'S': rng.choice(['raw', 'boiled', 'baked'])},
+                'time_of_day': {'S': rng.choice(['morning', 'afternoon', 'night'])},
+            })
+        elif kind == 1:
+            items.append({
+                'poop-id': {'S': f'{i:032x}'},
+                'record_type': {'S': 'poop'},
+                'poop_date': {'S': '2025-03-24'},
+                'time_of_day': {'S': 'morning'},
+                'score': {'N': str(rng.randint(1, 5))},
+                'version': {'N': str(rng.randint(1, 50))},
+            })
+        else:
+            items.append({
+                'feeling-id': {'S': f'{i:032x}'},
+                'record_type': {'S': 'feeling'},
+                'feeling_date': {'S': '2025-03-24'},
+                'feeling_score': {'N': str(rng.randint(1, 10))},
+                'stress_level': {'N': str(rng.randint(1, 10))},
+                'weight': {'N': f'{rng.uniform(50, 90):.1f}'},
+                'tags': {'L': [{'S': 'sleep'}, {'BOOL': True}, {'NULL': True}]},
+                'meta': {'M': {'source': {'S': 'app'}, 'offset': {'N': '-2'}}},
+            })
+    return items
+
+
+def with_type_deserializer(items):
+    deserializer = TypeDeserializer()
+    return [{k: deserializer.deserialize(v) for k, v in item.items()} for item in items]
+
+
+def best_of(func, items, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(items)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    items = synthetic_scan(args.items)
+    baseline = best_of(with_type_deserializer, items, args.repeat)
+    codec = best_of(deserialize_items, items, args.repeat)
+
+    print(f"{args.items} items, best of {args.repeat}")
+    print(f"  TypeDeserializer: {baseline * 1000:8.1f} ms")
+    print(f"  common.codec:     {codec * 1000:8.1f} ms  ({baseline / codec:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Time ingredient autocomplete and typo matching against the in-memory index.
+
+    python ingredient_search.py --ingredients 20000 --queries 5000
+
+Builds an index of synthetic names the way a cold container would, then runs
+keystroke-style prefix queries and similar-name queries (random names with
+one typo), and reports the build time and the median and 99th percentile
+latency of each. The typo queries are also timed against a plain Levenshtein
+pass over every name, which is what the trigram filter saves.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common.ingredient_index import IngredientIndex, levenshtein, max_typos  # noqa: E402
+
+
+def synthetic_names(count, seed=0):
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(count // 4 + 1)]
+    return [' '.join(rng.sample(words, rng.randint(1, 3))) for _ in range(count)]
+
+
+def with_typo(name, rng):
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice(string.ascii_lowercase) + name[position + 1:]
+
+
+def timed(function, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        function(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+
+def report(label, latencies, unit=1e6, unit_name='us'):
+    median, p99 = latencies
+    print(f"  {label:<24} median {median * unit:8.1f} {unit_name}   p99 {p99 * unit:8.1f} {unit_name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ingredients', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    names = synthetic_names(args.ingredients)
+    index = IngredientIndex()
+    start = time.perf_counter()
+    for i, name in enumerate(names):
+        index.put(str(i), name)
+    build = time.perf_counter() - start
+
+    rng = random.Random(1)
+    prefixes = [name[:rng.randint(1, len(name))] for name in rng.choices(names, k=args.queries)]
+    typos = [with_typo(name, rng) for name in rng.choices(names, k=args.queries)]
+    normalized = [name.replace(' ', '') for name in names]
+
+    def scan(query):
+        query = query.replace(' ', '')
+        return [name for name in normalized if levenshtein(query, name, max_typos(query)) is not None]
+
+    print(f"{len(index)} ingredients, {args.queries} queries, limit {args.limit}")
+    print(f"  build (one put per ingredient): {build * 1000:8.1f} ms")
+    report('prefix search', timed(lambda query: index.search(query, args.limit), prefixes))
+    report('similar (trigrams)', timed(lambda query: index.similar(query, limit=args.limit), typos))
+    # The full scan is slow enough that a sample of the queries is plenty
+    report('similar (full scan)', timed(scan, typos[:50]), unit=1e3, unit_name='ms')
+
+if __name__ == '__main__':
+    main()
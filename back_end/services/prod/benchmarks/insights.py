@@ -0,0 +1,53 @@
+"""Time the lagged ingredient analysis on a synthetic multi-year history.
+
+    python insights.py --years 3 --ingredients 400 --meals-per-day 8
+
+Only the computation is timed (building the exposure matrix and every lag of
+both outcomes); reading the records from DynamoDB is not part of it.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'analysis', 'python'))
+
+from analysis.correlation import exposure_matrix, ingredient_effects  # noqa: E402
+
+
+def synthetic_history(days, ingredients, meals_per_day, seed=0):
+    rng = np.random.default_rng(seed)
+    records = days * meals_per_day
+    # A few ingredients are eaten far more often than the rest, like in real logs
+    ingredient_index = np.minimum(rng.zipf(1.3, records) - 1, ingredients - 1)
+    day_index = rng.integers(0, days, records)
+    poop_score = np.where(rng.random(days) < 0.9, rng.integers(1, 6, days), np.nan)
+    stress_level = np.where(rng.random(days) < 0.7, rng.integers(1, 11, days), np.nan)
+    return ingredient_index, day_index, {'poop_score': poop_score, 'stress_level': stress_level}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--ingredients', type=int, default=400)
+    parser.add_argument('--meals-per-day', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    days = args.years * 365
+    ingredient_index, day_index, outcomes = synthetic_history(days, args.ingredients, args.meals_per_day)
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        exposure = exposure_matrix(ingredient_index, day_index, args.ingredients, days)
+        ingredient_effects(exposure, outcomes)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{days} days, {args.ingredients} ingredients, {len(day_index)} food records, best of {args.repeat}")
+    print(f"  analysis: {best * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Body size and encoding time of a list page in each format and content coding.
+
+    python list_encoding.py --items 1000
+
+Builds a page of synthetic food records the way GET /food_records returns
+them and encodes it with common.encoding.list_response for every
+combination of format (rows, columnar), media type (JSON, MessagePack) and
+content coding (none, gzip, br). Combinations whose package (brotli,
+msgpack) is not installed are skipped.
+
+Compressed JSON is asked for the way a client has to (see common/encoding.py),
+with Accept: application/gzip, application/json.
+"""
+import argparse
+import base64
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common import encoding  # noqa: E402
+
+
+def synthetic_page(count):
+    return [{
+        'food-record-id': str(uuid.uuid4()),
+        'version': 1,
+        'record_date': f'2025-03-{i % 28 + 1:02d}',
+        'ingredient_id': str(uuid.uuid4()),
+        'ingredient_name': ['greek yogurt', 'oats', 'banana', 'brown rice'][i % 4],
+        'portion_size': 'medium',
+        'cooking_type': 'raw',
+        'time_of_day': ['morning', 'noon', 'evening'][i % 3],
+    } for i in range(count)]
+
+
+def accept(media_type, coding):
+    """The Accept header that gets this media type, compressed with `coding` if given"""
+    if coding and media_type == 'application/json':
+        return f'application/gzip, {media_type}'
+    return media_type
+
+
+def encoded_size(result):
+    return len(base64.b64decode(result['body'])) if result.get('isBase64Encoded') else len(result['body'].encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    items = synthetic_page(args.items)
+    media_types = ['application/json'] + (['application/msgpack'] if encoding.msgpack else [])
+    codings = [None, 'gzip'] + (['br'] if encoding.brotli else [])
+
+    print(f"{args.items} food records, best of {args.repeat}")
+    baseline = None
+    for page_format in encoding.FORMATS:
+        for media_type in media_types:
+            for coding in codings:
+                event = {
+                    'queryStringParameters': {'format': page_format},
+                    'headers': {'Accept': accept(media_type, coding), 'Accept-Encoding': coding or 'identity'}
+                }
+                best = float('inf')
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    result = encoding.list_response(event, items, None)
+                    best = min(best, time.perf_counter() - start)
+                size = encoded_size(result)
+                assert result['headers'].get('Content-Encoding') == coding, (page_format, media_type, coding)
+                baseline = baseline or size
+                print(f"  {page_format:<9} {media_type.split('/')[1]:<8} {coding or '-':<5} "
+                      f"{size / 1024:9.1f} KB ({size / baseline:6.1%})  {best * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Wall-clock time of a full-table read by number of scan segments.
+
+Loads a table of synthetic food records into a local DynamoDB stand-in and
+reads it whole with common.scan.parallel_scan at each segment count:
+
+    docker run -p 8000:8000 amazon/dynamodb-local
+    python parallel_scan.py --endpoint-url http://localhost:8000 --items 50000 --segments 1 2 4 8 16
+
+One segment is the sequential scan the scripts used before. The table is
+kept between runs, so --items only adds what is missing.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+import boto3
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common.dynamo import BATCH_WRITE_SIZE, CLIENT_CONFIG, REGION, batch_write  # noqa: E402
+from common.scan import parallel_scan  # noqa: E402
+
+TABLE = 'benchmark-parallel-scan'
+
+
+def ensure_table(client, items):
+    try:
+        client.create_table(
+            TableName=TABLE,
+            KeySchema=[{'AttributeName': 'food-record-id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'food-record-id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        client.get_waiter('table_exists').wait(TableName=TABLE)
+    except client.exceptions.ResourceInUseException:
+        pass
+    missing = items - client.scan(TableName=TABLE, Select='COUNT')['Count']
+    for start in range(0, missing, BATCH_WRITE_SIZE):
+        batch_write(client, TABLE, [{
+            'food-record-id': {'S': str(uuid.uuid4())},
+            'record_date': {'S': f'2025-{(start // 2000) % 12 + 1:02d}-{start % 28 + 1:02d}'},
+            'ingredient_id': {'S': str(uuid.uuid4())},
+            'ingredient_name': {'S': 'greek yogurt'},
+            'portion_size': {'S': 'medium'},
+            'cooking_type': {'S': 'raw'},
+            'time_of_day': {'S': 'morning'},
+        } for _ in range(min(BATCH_WRITE_SIZE, missing - start))])
+
+
+def measure(client, segments, repeat, read_capacity):
+    best, count = float('inf'), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in parallel_scan(client, TABLE, segments, read_capacity=read_capacity))
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', default='http://localhost:8000')
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--read-capacity', type=float, help='also apply this read capacity limit')
+    args = parser.parse_args()
+
+    # Credentials are not checked by DynamoDB Local but botocore insists on having some
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+    client = boto3.client(
+        'dynamodb',
+        region_name=REGION,
+        endpoint_url=args.endpoint_url,
+        config=CLIENT_CONFIG.merge(Config(max_pool_connections=max(args.segments) + 1))
+    )
+    ensure_table(client, args.items)
+
+    baseline = None
+    for segments in args.segments:
+        elapsed, count = measure(client, segments, args.repeat, args.read_capacity)
+        baseline = baseline or elapsed
+        print(f"{segments:>3} segments: {elapsed * 1000:8.1f} ms  {count / elapsed:9.0f} items/s  "
+              f"speedup {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""Run one export started by POST /export (invoked asynchronously, with {"export_id": ..., "user_id": ...})"""
+import logging
+from common.dynamo import get_client
+from common.export import MultipartWriter, bucket, export_key, get_s3_client, write_export, write_manifest
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+s3 = get_s3_client()
+
+
+def handler(event, context):
+    export_id, user = event['export_id'], event['user_id']
+    logger.info(f"Starting export {export_id}")
+    try:
+        with MultipartWriter(s3, bucket(), export_key(export_id)) as sink:
+            counts = write_export(dynamodb, sink, user_id=user)
+    except Exception as e:
+        # Recorded rather than raised: a retried invocation would start the whole export over
+        logger.error(f"Export {export_id} failed - {e}", exc_info=True)
+        write_manifest(s3, export_id, status='failed', user_id=user, error=str(e))
+        return
+    write_manifest(s3, export_id, status='completed', user_id=user, counts=counts, bytes=sink.size)
+    logger.info(f"Export {export_id} completed: {counts}, {sink.size} bytes")
@@ -0,0 +1,34 @@
+import json
+import logging
+import uuid
+import boto3
+from common.dynamo import REGION
+from common.export import get_s3_client, write_manifest
+from common.http import api_handler, response
+from common.users import user_id
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3 = get_s3_client()
+lambda_client = boto3.client('lambda', region_name=REGION)
+
+EXPORT_FUNCTION = 'export-worker'
+
+
+@api_handler
+def handler(event, context):
+    export_id = str(uuid.uuid4())
+    user = user_id(event)
+
+    # The manifest exists from the start so GET /export/{export_id} can tell
+    # a running export from an unknown id (and only shows it to its owner)
+    write_manifest(s3, export_id, status='pending', user_id=user)
+    # The export can take far longer than API Gateway waits, so it runs in its own invocation
+    lambda_client.invoke(
+        FunctionName=EXPORT_FUNCTION,
+        InvocationType='Event',
+        Payload=json.dumps({'export_id': export_id, 'user_id': user}).encode()
+    )
+
+    return response(202, {'export_id': export_id, 'status': 'pending'})
@@ -0,0 +1,24 @@
+import logging
+from common.export import download_url, get_s3_client, read_manifest
+from common.http import api_handler, path_param, response
+from common.users import user_id
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3 = get_s3_client()
+
+
+@api_handler
+def handler(event, context):
+    export_id = path_param(event, "export_id")
+    manifest = read_manifest(s3, export_id)
+
+    # Someone else's export is as unknown as one that never existed
+    if manifest is None or manifest.get('user_id') != user_id(event):
+        return response(404, {'error': f"No export found for export_id '{export_id}'"})
+
+    if manifest['status'] == 'completed':
+        manifest['download_url'] = download_url(s3, export_id)
+
+    return response(200, manifest)
@@ -0,0 +1,28 @@
+import logging
+from common import logs
+from common.codec import serialize_item
+from common.dynamo import batch_write, get_client
+from common.http import api_handler, parse_json_body, response
+from common.records import FEELING, batch_bodies, new_records
+from common.users import user_id
+from common.versions import bump_version, user_collection
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+
+@api_handler
+def handler(event, context):
+    bodies = batch_bodies(parse_json_body(event))
+    logs.info('Creating feelings', count=len(bodies))
+    user = user_id(event)
+    # Every record is validated before the first one is written
+    records = new_records(FEELING, bodies, user)
+
+    batch_write(dynamodb, FEELING.table, [serialize_item(item) for _, item in records])
+    bump_version(dynamodb, user_collection(FEELING.table, user))
+
+    # Ids in the order the records were sent
+    return response(200, {f"{FEELING.id_field}s": [record_id for record_id, _ in records]})
@@ -1,70 +1,42 @@
-import json
-import boto3
-import os
 import logging
+from common import logs
+from common.codec import deserialize_items
+from common.conditional import collection_headers
+from common.dynamo import get_client
+from common.encoding import VARY, list_response
+from common.fields import parse_fields, select_fields
+from common.http import api_handler, response
+from common.listing import read_page
+from common.records import FEELING
+from common.users import user_id
+from common.versions import user_collection
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Helper function to convert raw DynamoDB types into standard Python data
-def parse_dynamo_data(data):
-    return [{k: int(v["N"]) if "N" in v else v["S"] for k, v in item.items()} for item in data]
+dynamodb = get_client()
 
 
 # Lambda entry point
+@api_handler
 def handler(event, context):
-    try:
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
+    fields = parse_fields(event)
+    user = user_id(event)
 
-        # Scan the entire 'feelings' table
-        response = dynamodb.scan(TableName='feelings')
-    except Exception as e:
-        # Handle errors during scan
-        logger.error(f"Scan error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    # Nothing written since the client's copy: answer before reading a single record
+    headers, fresh = collection_headers(dynamodb, event, user_collection(FEELING.table, user), vary=VARY)
+    if fresh:
+        return response(304, '', headers)
 
-    try:
-        logger.info(response)
-        items = response.get('Items', [])
-        parsed_items = parse_dynamo_data(items)  # Convert raw data to Python types
-    except Exception as e:
-        # Handle errors during parsing
-        logger.error(f"Parsing error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    # Read one page of the user's feelings in date order, only those between ?from= / ?to= if given
+    page = read_page(dynamodb, event, table=FEELING.table, key=FEELING.key, user_id=user, fields=fields)
+    logs.info('Read page', items=len(page.items), more=page.next_cursor is not None)
 
-    if not items:
-        # No data found in table
-        return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': "No feeling records found"
-        }
+    if not page.items and page.first and page.next_cursor is None:
+        # The user has no feelings recorded
+        return response(404, {'error': "No feeling records found"}, headers)
 
-    # Return parsed data as JSON
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps(parsed_items)
-    }
+    items = [select_fields(item, fields) for item in deserialize_items(page.items)]
+    # Return parsed data as JSON (compressed and/or columnar if the client asked for it)
+    return list_response(event, items, page.next_cursor, headers)
@@ -1,51 +1,30 @@
-import boto3
-import json
 import logging
-import uuid
-from datetime import datetime
+from common.codec import serialize_item
+from common.dynamo import get_client
+from common.http import api_handler, parse_body, response
+from common.records import FEELING, new_record
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
+
+
 # Lambda entry point
+@api_handler
 def handler(event, context):
-    feeling_id = str(uuid.uuid4())  # Generate a unique ID for the new record
-    event = json.loads(event['body'])  # Parse the incoming JSON body
-    logger.info(event)  # Log the input data
-    
-    try:
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-        
-        # Insert new record into the 'feelings' table
-        dynamodb.put_item(
-            TableName='feelings',
-            Item={
-                "feeling-id": {"S": feeling_id},  # Primary key
-                "feeling_score": {"N": str(event["feeling_score"])},  # Score 1–10
-                "stress_level": {"N": str(event["stress_level"])},    # Stress 1–10
-                "feeling_date": {"S": event["feeling_date"]}          # Date string
-            }
-        )
-    except Exception as e:
-        # Handle DB write errors
-        logger.error(f"Error writing to DynamoDB: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    # Records are stored under their owner's partition
+    user = user_id(event)
+    body = parse_body(event)  # Parse the incoming JSON body
+    # Validates feeling_score and stress_level (numbers) and feeling_date, and generates the id
+    feeling_id, item = new_record(FEELING, body, user)
+
+    # Insert new record into the 'feelings' table
+    dynamodb.put_item(TableName=FEELING.table, Item=serialize_item(item))
+    bump_version(dynamodb, user_collection(FEELING.table, user))
 
     # Return success and the new record's ID
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({"feeling_id": feeling_id})
-    }
+    return response(200, {"feeling_id": feeling_id})
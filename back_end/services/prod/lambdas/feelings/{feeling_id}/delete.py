@@ -1,50 +1,33 @@
-import boto3
-import json
 import logging
+from common.dynamo import get_client
+from common.http import api_handler, path_param, response
+from common.records import FEELING, find_record, item_key
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
+
+
+@api_handler
 def handler(event, context):
-    logger.info(f"Received event: {event}")  # Log the incoming event
-
-    try:
-        # Extract the feeling ID from the URL path parameters
-        feeling_id = event["pathParameters"]["feeling_id"]
-
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        # Delete the item in the 'feelings' table with the specified ID
-        response = dynamodb.delete_item(
-            TableName='feelings',
-            Key={'feeling-id': {'S': feeling_id}}
-        )
-
-        logger.info(f"DeleteItem response: {response}")  # Log delete response
-
-        # Return success message
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                "feeling_id": feeling_id
-            })
-        }
-    
-
-    except Exception as e:
-        # Handle errors during deletion
-        logger.error(f"Error deleting item: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"error": str(e)})
-        }
+    # Extract the feeling ID from the URL path parameters
+    feeling_id = path_param(event, "feeling_id")
+
+    # Look up the key of the caller's feeling with this ID (a 404 if there is none)
+    user = user_id(event)
+    key = item_key(find_record(dynamodb, FEELING, user, feeling_id))
+
+    # Delete the item from the feelings table
+    dynamodb.delete_item(
+        TableName=FEELING.table,
+        Key=key
+    )
+
+    bump_version(dynamodb, user_collection(FEELING.table, user), deleted=True)
+
+    # Return success message
+    return response(200, {"feeling_id": feeling_id})
@@ -1,67 +1,26 @@
-import boto3
-import json
 import logging
+from common.conditional import item_response
+from common.dynamo import get_client
+from common.fields import parse_fields
+from common.http import api_handler, path_param
+from common.records import FEELING, find_record
+from common.users import user_id
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Helper function to convert DynamoDB item format to plain Python dict
-def parse_dynamo_data(data):
-    return [{k: int(v["N"]) if "N" in v else v["S"] for k, v in item.items()} for item in data]
+dynamodb = get_client()
 
 
+@api_handler
 def handler(event, context):
-    logger.info(event)  # Log the incoming event
-
     # Extract the feeling ID from path parameters
-    feeling_id = event["pathParameters"]["feeling_id"]
-
-    try:
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        # Fetch item by primary key
-        response = dynamodb.get_item(
-            TableName='feelings',
-            Key={
-                'feeling-id': {'S': feeling_id}
-            }
-        )
-
-        item = response.get('Item')
-
-        # If no item is found, return 404
-        if not item:
-            return {
-                'statusCode': 404,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': f"No item found for feeling-id '{feeling_id}'"})
-            }
-
-        # Parse and return the item in a simplified format
-        parsed_item = parse_dynamo_data([item])[0]
+    feeling_id = path_param(event, "feeling_id")
 
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps(parsed_item)
-        }
+    # Fetch the item from the caller's partition, a 404 if there is none
+    fields = parse_fields(event)
+    item = find_record(dynamodb, FEELING, user_id(event), feeling_id, fields)
 
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        # Return internal server error if something goes wrong
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"message": f"Unexpected error - {str(e)}"})
-        }
+    # Return the item with its version as ETag, or a 304 if the client already has it
+    return item_response(event, item, fields)
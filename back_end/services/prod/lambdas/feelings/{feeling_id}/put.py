@@ -1,65 +1,45 @@
-import boto3
-import json
 import logging
-from datetime import datetime
+from common import logs
+from common.codec import deserialize_item
+from common.conditional import etag, expected_version
+from common.dynamo import get_client
+from common.fields import public_item
+from common.http import api_handler, parse_body, path_param, require_fields, response
+from common.patch import patch_clauses
+from common.records import FEELING, NUMERIC_FIELDS, find_record, item_key, update_record
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def handler(event, context):
-    logger.info(f"Received event: {event}")  # Log the incoming request
+dynamodb = get_client()
 
-    try:
-        # Extract path parameter (feeling ID) and request body
-        feeling_id = event["pathParameters"]["feeling_id"]
-        body = json.loads(event["body"])
 
-        # Extract fields to update
-        feeling_score = body.get("feeling_score")
-        stress_level = body.get("stress_level")
-        feeling_date = body.get("feeling_date")
+@api_handler
+def handler(event, context):
+    # Extract path parameter (feeling ID) and request body
+    feeling_id = path_param(event, "feeling_id")
+    body = parse_body(event)
+    require_fields(body, "feeling_score", "stress_level", "feeling_date")
 
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
+    # Extract fields to update, type-checked like a PATCH of all of them
+    changes = patch_clauses({field: body[field] for field in FEELING.fields}, FEELING.fields,
+                            required=FEELING.fields, numeric=NUMERIC_FIELDS).changes
 
-        # Prepare update expression and values
-        update_expression = "SET feeling_score = :m, stress_level = :s, feeling_date = :l"
-        expression_values = {
-            ":m": {'N': str(feeling_score)},
-            ":s": {'N': str(stress_level)},
-            ":l": {'S': feeling_date}
-        }
+    # Find the key of the caller's feeling (a 404 if there is none)
+    user = user_id(event)
+    key = item_key(find_record(dynamodb, FEELING, user, feeling_id))
 
-        # Execute the update operation
-        response = dynamodb.update_item(
-            TableName='feelings',
-            Key={'feeling-id': {'S': feeling_id}},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values,
-            ReturnValues="UPDATED_NEW"
-        )
+    # Execute the update, refused if the feeling is gone or was changed since the client's version;
+    # a new feeling_date moves the feeling to its new sort key
+    update_response = update_record(dynamodb, FEELING, key, changes, expected=expected_version(event, body))
 
-        logger.info(f"Updated attributes: {response['Attributes']}")
+    bump_version(dynamodb, user_collection(FEELING.table, user))
 
-        # Return success message
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps(response['Attributes'])  # Returns updated fields only
-        }
+    logs.info('Updated', attributes=sorted(update_response['Attributes']))
 
-    except Exception as e:
-        logger.error(f"Error updating item: {e}", exc_info=True)
-        # Return error message if update fails
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"error": str(e)})
-        }
+    # Return the updated fields only, with the new version as ETag
+    attributes = public_item(deserialize_item(update_response['Attributes']))
+    return response(200, attributes, {'ETag': etag(attributes['version'])})
@@ -1,64 +1,67 @@
-import json
-import boto3
-import os
 import logging
+from common import logs
+from common.codec import deserialize_items
+from common.conditional import collection_headers
+from common.dynamo import get_client
+from common.encoding import VARY, list_response
+from common.fields import parse_fields, select_fields
+from common.http import ApiError, api_handler, query_params, response
+from common.ingredients import ingredient_cache, ingredient_details
+from common.listing import read_page
+from common.records import FOOD_RECORD
+from common.users import user_id
+from common.versions import user_collection
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
-def parse_dynamo_data(data):
-    return [{k: v["S"] for k, v in item.items()} for item in data]
+EXPANDABLE = {'ingredient'}
 
 
+def parse_expand(event):
+    expand = {value for value in query_params(event).get('expand', '').split(',') if value}
+    unknown = expand - EXPANDABLE
+    if unknown:
+        raise ApiError(400, f"Cannot expand {', '.join(sorted(unknown))}; expandable: {', '.join(sorted(EXPANDABLE))}")
+    return expand
+
+
+@api_handler
 def handler(event, context):
-    # Create a DynamoDB resource
-    try:
+    expand = parse_expand(event)
+    fields = parse_fields(event)
+    user = user_id(event)
+    collection = user_collection(FOOD_RECORD.table, user)
+
+    # Nothing written since the client's copy (to the records, or to the ingredients
+    # expanded into them): answer before reading a single record
+    if 'ingredient' in expand:
+        headers, fresh = collection_headers(dynamodb, event, collection, 'ingredients',
+                                            caches=[ingredient_cache], vary=VARY)
+    else:
+        headers, fresh = collection_headers(dynamodb, event, collection, vary=VARY)
+    if fresh:
+        return response(304, '', headers)
 
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
+    # One page of the user's records in date order, only those between ?from= / ?to= if given
+    # (expanding needs each record's ingredient_id, asked for or not)
+    page = read_page(dynamodb, event, table=FOOD_RECORD.table, key=FOOD_RECORD.key, user_id=user,
+                     fields=fields, needed=['ingredient_id'] if 'ingredient' in expand else [])
+    logs.info('Read page', items=len(page.items), more=page.next_cursor is not None)
 
-        # Scan the table to get all items
-        response = dynamodb.scan(TableName='food_records')
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    # A page past the first one can legitimately be empty, only a user without records gets a 404
+    if not page.items and page.first and page.next_cursor is None:
+        return response(404, {'error': "No food records found"}, headers)
 
-    try:
-        logger.info(response)
-        items = response.get('Items', [])
-        parsed_items = parse_dynamo_data(items)
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    items = deserialize_items(page.items)
+    if 'ingredient' in expand:
+        # One lookup for all distinct ingredients on the page instead of one request per record
+        details = ingredient_details(dynamodb, [item['ingredient_id'] for item in items if item.get('ingredient_id')])
+        for item in items:
+            item['ingredient'] = details.get(item.get('ingredient_id'))
+    items = [select_fields(item, fields, *expand) for item in items]
 
-    if not items:
-        return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': "No food records found"
-        }
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps(parsed_items)
-    }
+    # Compressed and/or columnar if the client asked for it
+    return list_response(event, items, page.next_cursor, headers)
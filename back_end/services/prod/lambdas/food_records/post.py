@@ -1,73 +1,29 @@
-import boto3
-import json
 import logging
-import uuid
-import re
+from common.codec import serialize_item
+from common.dynamo import get_client
+from common.http import api_handler, parse_body, response
+from common.ingredients import denormalize_ingredient_names
+from common.records import FOOD_RECORD, new_record
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
-def handler(event, context):
-
-    food_record_id = str(uuid.uuid4())
-    event_body = json.loads(event['body'])
-    logger.info(event)
 
-    dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-    try:
-        item = {
-            "food-record-id": {
-                "S": food_record_id
-            },
-            "record_date": {
-                "S": event_body["record_date"]
-            },
-            "ingredient_id": {
-                "S": event_body["ingredient_id"]
-            },
-            "ingredient_name": {
-                "S": event_body["ingredient_name"]
-            },
-            "portion_size": {
-                "S": event_body["portion_size"]
-            },
-            "cooking_type": {
-                "S": event_body["cooking_type"]
-            },
-            "time_of_day": {
-                "S": event_body["time_of_day"]
-            }
-        }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Internal error occurred - {e}"
-        }
+@api_handler
+def handler(event, context):
+    # Records are stored under their owner's partition
+    user = user_id(event)
+    event_body = parse_body(event)
+    food_record_id, item = new_record(FOOD_RECORD, event_body, user)
+    # Store the ingredient's own name, kept current on renames, rather than whatever the client sent
+    denormalize_ingredient_names(dynamodb, [item])
 
-    try:
-        dynamodb.put_item(TableName='food_records', Item=item)
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error while inserting item - {e}"
-        }
+    dynamodb.put_item(TableName=FOOD_RECORD.table, Item=serialize_item(item))
+    bump_version(dynamodb, user_collection(FOOD_RECORD.table, user))
 
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({'food_record_id': food_record_id})
-    }
+    return response(200, {'food_record_id': food_record_id})
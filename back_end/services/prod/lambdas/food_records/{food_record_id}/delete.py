@@ -1,45 +1,30 @@
-import boto3
-import json
 import logging
+from common.dynamo import get_client
+from common.http import api_handler, path_param, response
+from common.records import FOOD_RECORD, find_record, item_key
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
+
+@api_handler
 def handler(event, context):
-    logger.info(f"Received event: {event}")
-
-    try:
-        food_record_id = event["pathParameters"]["food_record_id"]
-
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        # Delete the item with the matching key
-
-        response = dynamodb.delete_item(
-            TableName='food_records',
-            Key={'food-record-id': {'S': food_record_id}}
-        )
-
-        logger.info(f"DeleteItem response: {response}")
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'ingredient_id': food_record_id})
-        }
-
-    except Exception as e:
-        logger.error(f"Error deleting item: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"error": str(e)})
-        }
+    food_record_id = path_param(event, "food_record_id")
+
+    # Records are keyed by date, so the key is looked up first; a 404 if the record is not the caller's
+    user = user_id(event)
+    key = item_key(find_record(dynamodb, FOOD_RECORD, user, food_record_id))
+
+    # Delete the item with the matching key
+    dynamodb.delete_item(
+        TableName=FOOD_RECORD.table,
+        Key=key
+    )
+
+    bump_version(dynamodb, user_collection(FOOD_RECORD.table, user), deleted=True)
+
+    return response(200, {'food_record_id': food_record_id})
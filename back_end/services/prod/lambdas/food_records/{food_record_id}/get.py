@@ -1,60 +1,22 @@
-import boto3
-import json
 import logging
+from common.conditional import item_response
+from common.dynamo import get_client
+from common.fields import parse_fields
+from common.http import api_handler, path_param
+from common.records import FOOD_RECORD, find_record
+from common.users import user_id
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-
-def parse_dynamo_data(data):
-    return [{k: v["S"] for k, v in item.items()} for item in data]
+dynamodb = get_client()
 
 
+@api_handler
 def handler(event, context):
-    logger.info(event)
-
-    food_record_id = event["pathParameters"]["food_record_id"]
-
-    try:
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        # Use get_item instead of scan (requires 'food-record-id' as the partition key)
-        response = dynamodb.get_item(
-            TableName='food_records',
-            Key={
-                'food-record-id': {'S': food_record_id}
-            }
-        )
-
-        item = response.get('Item')
-
-        parsed_item = parse_dynamo_data([item])[0]
-        if not item:
-            return {
-                'statusCode': 404,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': f"No item found for ingredient-id '{food_record_id}'"})
-            }
+    food_record_id = path_param(event, "food_record_id")
 
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps(parsed_item)
-        }
+    fields = parse_fields(event)
+    item = find_record(dynamodb, FOOD_RECORD, user_id(event), food_record_id, fields)
 
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    return item_response(event, item, fields)
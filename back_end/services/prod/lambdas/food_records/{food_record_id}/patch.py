@@ -0,0 +1,51 @@
+import logging
+from common import logs
+from common.conditional import etag
+from common.dynamo import get_client
+from common.http import api_handler, parse_body, path_param, response
+from common.ingredients import ingredient_names
+from common.patch import apply_patch, patch_clauses
+from common.records import DERIVED_FIELDS, FOOD_RECORD, client_fields, find_record, item_key
+from common.users import user_id
+from common.versions import bump_version, user_collection
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+FIELDS = client_fields(FOOD_RECORD)
+
+
+def ingredient_name(changes):
+    # The record keeps the ingredient's own name, which renames keep current
+    if 'ingredient_id' not in changes:
+        return {}
+    ingredient_id = changes['ingredient_id']
+    return {'ingredient_name': ingredient_names(dynamodb, [ingredient_id])[ingredient_id]}
+
+
+@api_handler
+def handler(event, context):
+    food_record_id = path_param(event, "food_record_id")
+    body = parse_body(event)
+    # Always taken from the ingredient, so a client echoing it back is ignored rather than refused
+    for field in DERIVED_FIELDS:
+        body.pop(field, None)
+
+    # Only the fields in the body are written, so a one-field edit is a one-attribute update
+    patch = patch_clauses(body, FIELDS, required=FIELDS, derived=ingredient_name)
+    user = user_id(event)
+    key = item_key(find_record(dynamodb, FOOD_RECORD, user, food_record_id))
+    # A new date moves the record to its new sort key
+    changed, version = apply_patch(dynamodb, event, body, FOOD_RECORD.table, key, patch, schema=FOOD_RECORD)
+
+    bump_version(dynamodb, user_collection(FOOD_RECORD.table, user))
+
+    logs.info('Changed', attributes=sorted(changed))
+
+    return response(200, {
+        "message": "Update was successful",
+        "updatedAttributes": changed,
+        "version": version
+    }, {'ETag': etag(version)})
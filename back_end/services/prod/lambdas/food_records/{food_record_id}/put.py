@@ -1,94 +1,51 @@
-import boto3
-import json
 import logging
+from common import logs
+from common.codec import deserialize_item
+from common.conditional import etag, expected_version
+from common.dynamo import get_client
+from common.fields import public_item
+from common.http import api_handler, parse_body, path_param, require_fields, response
+from common.ingredients import ingredient_names
+from common.patch import patch_clauses
+from common.records import FOOD_RECORD, client_fields, find_record, item_key, update_record
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
-def handler(event, context):
-    logger.info(f"Received event: {event}")
-
-    try:
-        # Parse the food_record_id from path parameters
-        food_record_id = event["pathParameters"]["food_record_id"]
-
-        # Parse the request body (API Gateway sends it as a JSON string)
-        body = json.loads(event["body"])
-        inserted_date = body.get("record_date")
-        ingredient_id = body.get("ingredient_id")
-        ingredient_name = body.get("ingredient_name")
-        portion_size = body.get("portion_size")
-        cooking_type = body.get("cooking_type")
-        time_of_day = body.get("time_of_day")
-
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        # Build update expression and expression attribute values
-        update_expressions = []
-        expression_values = {}
-
-        update_expressions.append("record_date = :d")
-        expression_values[":d"] = {'S': inserted_date}
-
-        update_expressions.append("ingredient_id = :i")
-        expression_values[":i"] = {'S': ingredient_id}
-
-        update_expressions.append("ingredient_name = :n")
-        expression_values[":n"] = {'S': ingredient_name}
+FIELDS = client_fields(FOOD_RECORD)
 
-        update_expressions.append("portion_size = :p")
-        expression_values[":p"] = {'S': portion_size}
 
-        update_expressions.append("cooking_type = :c")
-        expression_values[":c"] = {'S': cooking_type}
-
-        update_expressions.append("time_of_day = :t")
-        expression_values[":t"] = {'S': time_of_day}
-
-        if not update_expressions:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({"error": "No valid fields to update."})
-            }
-
-        update_expression = "SET " + ", ".join(update_expressions)
-
-        # Perform the update
-        response = dynamodb.update_item(
-            TableName='food_records',
-            Key={'food-record-id': {'S': food_record_id}},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values,
-            ReturnValues="UPDATED_NEW"
-        )
-
-        logger.info(f"Updated attributes: {response['Attributes']}")
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                "message": "Update was successful",
-                "updatedAttributes": response['Attributes']
-            })
-        }
-
-    except Exception as e:
-        logger.error(f"Error updating item: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"error": str(e)})
-        }
+@api_handler
+def handler(event, context):
+    # Parse the food_record_id from path parameters
+    food_record_id = path_param(event, "food_record_id")
+
+    # Parse the request body (API Gateway sends it as a JSON string). A PUT replaces
+    # the record, so every field is required; PATCH is there for partial edits
+    body = parse_body(event)
+    require_fields(body, *FIELDS)
+    changes = patch_clauses({field: body[field] for field in FIELDS}, FIELDS, required=FIELDS).changes
+    # The record keeps the ingredient's own name, which renames keep current
+    ingredient_id = changes["ingredient_id"]
+    changes["ingredient_name"] = ingredient_names(dynamodb, [ingredient_id])[ingredient_id]
+
+    user = user_id(event)
+    key = item_key(find_record(dynamodb, FOOD_RECORD, user, food_record_id))
+
+    # Perform the update (404 for an unknown record, 409 if it changed since the client's version);
+    # a new record_date moves the record to its new sort key
+    update_response = update_record(dynamodb, FOOD_RECORD, key, changes, expected=expected_version(event, body))
+
+    bump_version(dynamodb, user_collection(FOOD_RECORD.table, user))
+
+    logs.info('Updated', attributes=sorted(update_response['Attributes']))
+
+    attributes = public_item(deserialize_item(update_response['Attributes']))
+    return response(200, {
+        "message": "Update was successful",
+        "updatedAttributes": attributes
+    }, {'ETag': etag(attributes['version'])})
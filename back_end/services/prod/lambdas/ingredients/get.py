@@ -1,64 +1,36 @@
-import json
-import boto3
-import os
 import logging
+from common import logs
+from common.codec import deserialize_items
+from common.conditional import collection_headers
+from common.dynamo import get_client
+from common.encoding import VARY, list_response
+from common.fields import parse_fields, select_fields
+from common.http import api_handler, response
+from common.ingredients import ingredient_pages, read_ingredient_page
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-
-def parse_dynamo_data(data):
-    return [{k: v["S"] for k, v in item.items()} for item in data]
+dynamodb = get_client()
 
 
+@api_handler
 def handler(event, context):
-    # Create a DynamoDB resource
-    try:
+    fields = parse_fields(event)
 
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
+    # Nothing written since the client's copy: answer before reading a single record
+    headers, fresh = collection_headers(dynamodb, event, 'ingredients', caches=[ingredient_pages], vary=VARY)
+    if fresh:
+        return response(304, '', headers)
 
-        # Scan the table to get all items
-        response = dynamodb.scan(TableName='ingredients')
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    # Warm containers answer from the pages they read since the last write
+    page = read_ingredient_page(dynamodb, event, fields)
+    logs.info('Read page', items=len(page.items), more=page.next_cursor is not None)
 
-    try:
-        logger.info(response)
-        items = response.get('Items', [])
-        parsed_items = parse_dynamo_data(items)
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    # A page past the first one can legitimately be empty, only an empty table is a 404
+    if not page.items and page.first and page.next_cursor is None:
+        return response(404, {'error': "No ingredients found"}, headers)
 
-    if not items:
-        return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': "No ingredients found"
-        }
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps(parsed_items)
-    }
+    items = [select_fields(item, fields) for item in deserialize_items(page.items)]
+    # Compressed and/or columnar if the client asked for it
+    return list_response(event, items, page.next_cursor, headers)
@@ -1,116 +1,46 @@
-import boto3
-import json
 import logging
 import uuid
-import re
+from common.codec import serialize_item
+from common.dynamo import get_client
+from common.http import api_handler, parse_body, require_fields, response
+from common.ingredient_names import checked_name
+from common.ingredients import record_ingredient_write
+from common.records import check_value
+from common.versions import now_ms
 
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-
-def normalize_name(name):
-    """Normalize the ingredient name by removing spaces, hyphens, and underscores to avoid duplicates later"""
-    return re.sub(r'[\s\-_]+', '',name)
+dynamodb = get_client()
 
 
+@api_handler
 def handler(event, context):
-
     ingredient_id = str(uuid.uuid4())
-    event_body = json.loads(event['body'])
-    logger.info(event)
-
-    #make new ingredient lowercase and normalize it to avoid duplicates
-    ingredient_name = event_body["ingredient_name"].strip().lower() 
-    normalized_name = normalize_name(ingredient_name)
-
-
-    # Initialize DynamoDB client
-    dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-    # Check if the ingredient_name already exists in the table
-    try:
-        response = dynamodb.scan(TableName='ingredients')     # Fetch all existing ingredients
+    event_body = parse_body(event)
+    require_fields(event_body, "ingredient_name", "default_portion_size")
 
-        for item in response.get('Items', []): #normalize existing names
-            existing_name = item.get("ingredient_name", {}).get("S", "").strip().lower() 
-            existing_normalized = normalize_name(existing_name)
-
-            # Exact Match Check
-            if existing_normalized == normalized_name:
-                return {
-                    'statusCode': 400,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': f"Ingredient '{event_body['ingredient_name']}' already exists."
-                }
-
-            # Partial Match Check 
-            if existing_normalized.startswith(normalized_name) or normalized_name.startswith(existing_normalized):
-                return {
-                    'statusCode': 400,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': f"Ingredient '{event_body['ingredient_name']}' already exists."
-                }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Error checking for duplicate ingredient name - {e}"
-        }
+    # Lowercased and normalized, and refused if it (or a prefix / extension / near-miss of it) already exists
+    ingredient_name, normalized_name = checked_name(dynamodb, event_body["ingredient_name"],
+                                                    event_body.get("allow_similar"))
 
     # If no duplicate, create new item and insert it into DynamoDB
-
-    try:
-        item = {
-                              "ingredients-id": {
-                                  "S": ingredient_id
-                              },
-                              "ingredient_name": {
-                                  "S": ingredient_name
-                              },
-                              "default_portion_size": {
-                                  "S": event_body["default_portion_size"]
-                              }
-                          }
-        if "default_cooking_type" in event_body:
-            item["default_cooking_type"] = {"S": event_body["default_cooking_type"]}
-    except Exception as e:
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': f"Internal error occured - {e}"
-            }
-
-    
-    try:
-        dynamodb.put_item(TableName='ingredients', Item=item)
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error while inserting item - {e}"
-        }
-
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({'ingredient_id': ingredient_id})
-    }
\ No newline at end of file
+    item = {
+        "ingredients-id": ingredient_id,
+        "ingredient_name": ingredient_name,
+        "normalized_name": normalized_name,
+        "record_type": "ingredient",
+        # Strings, as PUT and PATCH store them
+        "default_portion_size": check_value("default_portion_size", event_body["default_portion_size"]),
+        "updated_at": now_ms(),
+        "version": 1
+    }
+    if event_body.get("default_cooking_type") is not None:
+        item["default_cooking_type"] = check_value("default_cooking_type", event_body["default_cooking_type"])
+
+    dynamodb.put_item(TableName='ingredients', Item=serialize_item(item))
+    # After the write, so a container that sees the new version also finds the ingredient
+    record_ingredient_write(dynamodb, ingredient_id, ingredient_name)
+
+    return response(200, {'ingredient_id': ingredient_id})
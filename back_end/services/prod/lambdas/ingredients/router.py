@@ -0,0 +1,6 @@
+import os
+from common.router import Router
+
+# Serves every /ingredients endpoint from one function when the stack is deployed with lambdaMode=resource
+router = Router(os.path.dirname(os.path.abspath(__file__)), prefix='/ingredients')
+handler = router.handler
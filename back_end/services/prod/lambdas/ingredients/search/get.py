@@ -0,0 +1,35 @@
+import logging
+from common.dynamo import get_client
+from common.http import ApiError, api_handler, query_params, response
+from common.ingredient_index import get_ingredient_index
+from common.ingredients import normalize_name
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+def parse_search_limit(event):
+    try:
+        limit = int(query_params(event).get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError(400, f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+
+@api_handler
+def handler(event, context):
+    query = query_params(event).get('q', '')
+    if not normalize_name(query):
+        raise ApiError(400, "q must contain at least one letter or digit")
+    limit = parse_search_limit(event)
+
+    # Answered from the container's index; DynamoDB is only read when ingredients changed
+    index = get_ingredient_index(dynamodb)
+    return response(200, {'q': query, 'items': index.search(query, limit)})
@@ -0,0 +1,40 @@
+import logging
+from common.dynamo import get_client
+from common.http import ApiError, api_handler, query_params, response
+from common.ingredient_index import get_ingredient_index
+from common.ingredients import normalize_name
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_DISTANCE = 3
+
+
+def parse_int_param(event, name, default, lowest, highest):
+    value = query_params(event).get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if not lowest <= value <= highest:
+        raise ApiError(400, f"{name} must be between {lowest} and {highest}")
+    return value
+
+
+@api_handler
+def handler(event, context):
+    name = query_params(event).get('name', '')
+    if not normalize_name(name):
+        raise ApiError(400, "name must contain at least one letter or digit")
+    limit = parse_int_param(event, 'limit', DEFAULT_LIMIT, 1, MAX_LIMIT)
+    # Without max_distance, how many typos are tolerated depends on the length of the name
+    max_distance = parse_int_param(event, 'max_distance', None, 0, MAX_DISTANCE)
+
+    index = get_ingredient_index(dynamodb)
+    return response(200, {'name': name, 'items': index.similar(name, max_distance=max_distance, limit=limit)})
@@ -1,46 +1,34 @@
-import boto3
-import json
 import logging
+from botocore.exceptions import ClientError
+from common.dynamo import get_client
+from common.http import api_handler, path_param, response
+from common.ingredients import INGREDIENTS_KEY, INGREDIENTS_TABLE, record_ingredient_write
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
+
+@api_handler
 def handler(event, context):
-    logger.info(f"Received event: {event}")
+    # Parse the ingredient ID from the path parameters
+    ingredient_id = path_param(event, "ingredient_id")
 
+    # Delete the item with the matching key, a 404 if there is none
     try:
-        # Parse the registration ID from the path parameters
-        ingredient_id = event["pathParameters"]["ingredient_id"]
-
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        # Delete the item with the matching key
-
-        response = dynamodb.delete_item(
-            TableName='ingredients',
-            Key={'ingredients-id': {'S': ingredient_id}}
+        dynamodb.delete_item(
+            TableName=INGREDIENTS_TABLE,
+            Key={INGREDIENTS_KEY: {'S': ingredient_id}},
+            ConditionExpression='attribute_exists(#k)',
+            ExpressionAttributeNames={'#k': INGREDIENTS_KEY}
         )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return response(404, {'error': f"No item found for ingredient-id '{ingredient_id}'"})
 
-        logger.info(f"DeleteItem response: {response}")
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'ingredient_id': ingredient_id})
-        }
+    # Only a real delete counts: it makes every warm search index rebuild
+    record_ingredient_write(dynamodb, ingredient_id, deleted=True)
 
-    except Exception as e:
-        logger.error(f"Error deleting item: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"error": str(e)})
-        }
+    return response(200, {'ingredient_id': ingredient_id})
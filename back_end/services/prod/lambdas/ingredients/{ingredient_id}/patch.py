@@ -0,0 +1,40 @@
+import logging
+from common import logs
+from common.conditional import etag
+from common.dynamo import get_client
+from common.http import api_handler, parse_body, path_param, response
+from common.ingredient_names import checked_name
+from common.ingredients import (INGREDIENT_FIELDS, INGREDIENTS_KEY, INGREDIENTS_TABLE, REQUIRED_INGREDIENT_FIELDS,
+                                derived_attributes, record_ingredient_write)
+from common.patch import apply_patch, patch_clauses
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+
+@api_handler
+def handler(event, context):
+    ingredient_id = path_param(event, "ingredient_id")
+    body = parse_body(event)
+
+    # A new name is stored and checked for duplicates the way POST does it
+    allow_similar = body.pop("allow_similar", False)
+    if body.get("ingredient_name") is not None:
+        body["ingredient_name"], _ = checked_name(dynamodb, body["ingredient_name"], allow_similar, ingredient_id)
+
+    # Only the fields in the body are written; "default_cooking_type": null removes the default
+    patch = patch_clauses(body, INGREDIENT_FIELDS, required=REQUIRED_INGREDIENT_FIELDS, derived=derived_attributes)
+    changed, version = apply_patch(dynamodb, event, body, INGREDIENTS_TABLE,
+                                   {INGREDIENTS_KEY: {'S': ingredient_id}}, patch)
+
+    record_ingredient_write(dynamodb, ingredient_id, patch.changes.get("ingredient_name"))
+
+    logs.info('Changed', attributes=sorted(changed))
+
+    return response(200, {
+        "message": "Update was successful",
+        "updatedAttributes": changed,
+        "version": version
+    }, {'ETag': etag(version)})
@@ -1,71 +1,72 @@
-import boto3
-import json
 import logging
-import os
+from common import logs
+from common.codec import deserialize_item
+from common.conditional import etag, expected_version, versioned_update
+from common.dynamo import get_client
+from common.fields import public_item
+from common.http import api_handler, parse_body, path_param, require_fields, response
+from common.ingredient_names import checked_name
+from common.ingredients import derived_attributes, record_ingredient_write
+from common.records import check_value
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
-def handler(event, context):
-    logger.info(f"Received event: {event}")
-
-    try:
-        # Parse the registration ID from the path parameters
-        ingredient_id = event["pathParameters"]["ingredient_id"]
 
-        # Parse the request body (API Gateway sends it as a JSON string)
-        body = json.loads(event["body"])
-        ingredient_name = body.get("ingredient_name")
-        ingredient_def_portion = body.get("default_portion_size")
-        ingredient_def_cook_type = body.get("default_cooking_type", None)
-
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
+@api_handler
+def handler(event, context):
+    # Parse the ingredient ID from the path parameters
+    ingredient_id = path_param(event, "ingredient_id")
 
-        # Build the update expression dynamically
-        update_expressions = [
-            "ingredient_name = :n",
-            "default_portion_size = :m"
-        ]
-        expression_values = {
-            ":n": {'S': ingredient_name},
-            ":m": {'S': ingredient_def_portion}
-        }
+    # Parse the request body (API Gateway sends it as a JSON string)
+    body = parse_body(event)
+    require_fields(body, "ingredient_name", "default_portion_size")
+    # Stored and checked for duplicates the way POST does it
+    ingredient_name, _ = checked_name(dynamodb, body["ingredient_name"], body.get("allow_similar"), ingredient_id)
+    ingredient_def_portion = check_value("default_portion_size", body["default_portion_size"])
+    ingredient_def_cook_type = body.get("default_cooking_type", None)
+    if ingredient_def_cook_type is not None:
+        ingredient_def_cook_type = check_value("default_cooking_type", ingredient_def_cook_type)
+    derived = derived_attributes({'ingredient_name': ingredient_name})
 
-        if ingredient_def_cook_type is not None:
-            update_expressions.append("default_cooking_type = :l")
-            expression_values[":l"] = {'S': ingredient_def_cook_type}
+    # Build the update expression dynamically
+    update_expressions = [
+        "ingredient_name = :n",
+        "normalized_name = :nn",
+        "record_type = :r",
+        "default_portion_size = :m",
+        "updated_at = :u"
+    ]
+    expression_values = {
+        ":n": {'S': ingredient_name},
+        ":nn": {'S': derived['normalized_name']},
+        ":r": {'S': derived['record_type']},
+        ":m": {'S': ingredient_def_portion},
+        ":u": {'N': str(derived['updated_at'])}
+    }
 
-        update_expression = "SET " + ", ".join(update_expressions)
+    if ingredient_def_cook_type is not None:
+        update_expressions.append("default_cooking_type = :l")
+        expression_values[":l"] = {'S': ingredient_def_cook_type}
 
-        # Perform the update
-        response = dynamodb.update_item(
-            TableName='ingredients',
-            Key={'ingredients-id': {'S': ingredient_id}},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values,
-            ReturnValues="UPDATED_NEW"
-        )
+    # Perform the update; a missing ingredient is a 404 and a stale version a 409
+    update_response = versioned_update(
+        dynamodb,
+        'ingredients',
+        {'ingredients-id': {'S': ingredient_id}},
+        update_expressions,
+        expression_values,
+        expected=expected_version(event, body)
+    )
 
-        logger.info(f"Updated attributes: {response['Attributes']}")
+    record_ingredient_write(dynamodb, ingredient_id, ingredient_name)
 
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': "Update was successful" + json.dumps(response['Attributes'])
-        }
+    logs.info('Updated', attributes=sorted(update_response['Attributes']))
 
-    except Exception as e:
-        logger.error(f"Error updating item: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"error": str(e)})
-        }
+    attributes = public_item(deserialize_item(update_response['Attributes']))
+    return response(200, {
+        "message": "Update was successful",
+        "updatedAttributes": attributes
+    }, {'ETag': etag(attributes['version'])})
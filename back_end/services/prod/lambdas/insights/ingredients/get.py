@@ -0,0 +1,110 @@
+import logging
+from datetime import date, timedelta
+import numpy as np
+from analysis.correlation import LAGS, exposure_matrix, ingredient_effects
+from common.codec import deserialize_item, deserialize_items
+from common.dynamo import batch_get, get_client, query_items
+from common.http import ApiError, api_handler, query_params, response
+from common.listing import parse_day_range, user_query
+from common.records import FOOD_RECORD
+from common.rollups import ROLLUP_TABLE, rollup_key, summarize
+from common.users import user_id
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+# A few years of history; the range defaults to the last year
+MAX_DAYS = 5 * 366
+DEFAULT_DAYS = 365
+
+# Ingredients eaten on fewer days than this are left out as noise
+DEFAULT_MIN_DAYS = 3
+
+
+def parse_min_days(event):
+    try:
+        min_days = int(query_params(event).get('min_days', DEFAULT_MIN_DAYS))
+    except ValueError:
+        raise ApiError(400, "min_days must be an integer")
+    if min_days < 1:
+        raise ApiError(400, "min_days must be at least 1")
+    return min_days
+
+
+def daily_outcomes(user, date_from, day_count):
+    """Mean poop score and stress level per day as arrays (NaN on days without records)"""
+    outcomes = {'poop_score': np.full(day_count, np.nan), 'stress_level': np.full(day_count, np.nan)}
+    keys = [{'day': {'S': rollup_key(user, (date_from + timedelta(days=i)).isoformat())}} for i in range(day_count)]
+    for row in deserialize_items(batch_get(dynamodb, ROLLUP_TABLE, keys)):
+        summary = summarize(row)
+        day = (date.fromisoformat(summary['date']) - date_from).days
+        if summary['poop']['mean_score'] is not None:
+            outcomes['poop_score'][day] = summary['poop']['mean_score']
+        if summary['feelings']['mean_stress_level'] is not None:
+            outcomes['stress_level'][day] = summary['feelings']['mean_stress_level']
+    return outcomes
+
+
+def eaten(user, date_from, date_to):
+    """Ingredient ids and names, plus parallel (ingredient index, day index) arrays of what was eaten when"""
+    query = user_query(FOOD_RECORD.table, user, date_from.isoformat(), date_to.isoformat())
+    query['ProjectionExpression'] = 'record_date, ingredient_id, ingredient_name'
+    ingredient_ids, names, ingredient_index, day_index = {}, {}, [], []
+    for item in query_items(dynamodb, **query):
+        record = deserialize_item(item)
+        ingredient_id = record.get('ingredient_id')
+        try:
+            day = (date.fromisoformat(record['record_date']) - date_from).days
+        except (KeyError, ValueError):
+            continue
+        if not ingredient_id:
+            continue
+        index = ingredient_ids.setdefault(ingredient_id, len(ingredient_ids))
+        names[ingredient_id] = record.get('ingredient_name')
+        ingredient_index.append(index)
+        day_index.append(day)
+    return list(ingredient_ids), names, ingredient_index, day_index
+
+
+def _value(number, digits=3):
+    # NaN (no contrast) and inf are not valid JSON
+    return round(number, digits) if np.isfinite(number) else None
+
+
+@api_handler
+def handler(event, context):
+    date_from, date_to = parse_day_range(event, MAX_DAYS, default_days=DEFAULT_DAYS)
+    min_days = parse_min_days(event)
+    day_count = (date_to - date_from).days + 1
+
+    user = user_id(event)
+    ids, names, ingredient_index, day_index = eaten(user, date_from, date_to)
+    exposure = exposure_matrix(ingredient_index, day_index, len(ids), day_count)
+    effects = ingredient_effects(exposure, daily_outcomes(user, date_from, day_count))
+
+    # Plain lists once, so the per-ingredient formatting below touches no NumPy scalars
+    effects = {outcome: {lag: {stat: values.tolist() for stat, values in stats.items()}
+                         for lag, stats in by_lag.items()}
+               for outcome, by_lag in effects.items()}
+    days_eaten = exposure.sum(axis=1).tolist()
+
+    insights = []
+    for i, ingredient_id in enumerate(ids):
+        if days_eaten[i] < min_days:
+            continue
+        insight = {'ingredient_id': ingredient_id, 'ingredient_name': names[ingredient_id], 'days_eaten': days_eaten[i]}
+        for outcome, by_lag in effects.items():
+            insight[outcome] = {
+                f'lag_{lag}': {
+                    'delta': _value(by_lag[lag]['delta'][i]),
+                    'correlation': _value(by_lag[lag]['correlation'][i]),
+                    'days': by_lag[lag]['days'][i]
+                }
+                for lag in LAGS
+            }
+        insights.append(insight)
+    insights.sort(key=lambda insight: (-insight['days_eaten'], insight['ingredient_id']))
+
+    return response(200, {'from': date_from.isoformat(), 'to': date_to.isoformat(), 'ingredients': insights})
@@ -1,71 +1,40 @@
-import json
-import boto3
-import os
 import logging
+from common import logs
+from common.codec import deserialize_items
+from common.conditional import collection_headers
+from common.dynamo import get_client
+from common.encoding import VARY, list_response
+from common.fields import parse_fields, select_fields
+from common.http import api_handler, response
+from common.listing import read_page
+from common.records import POOP
+from common.users import user_id
+from common.versions import user_collection
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
-def parse_dynamo_data(data):
-    parsed = []
-    for item in data:
-        parsed_item = {}
-        for k, v in item.items():
-            dtype, val = next(iter(v.items()))  # e.g., {'N': '5'} or {'S': '2025-04-20'}
-            parsed_item[k] = int(val) if dtype == "N" else val
-        parsed.append(parsed_item)
-    return parsed
 
+@api_handler
 def handler(event, context):
-    # Create a DynamoDB resource
-    try:
+    fields = parse_fields(event)
+    user = user_id(event)
 
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
+    # Nothing written since the client's copy: answer before reading a single record
+    headers, fresh = collection_headers(dynamodb, event, user_collection(POOP.table, user), vary=VARY)
+    if fresh:
+        return response(304, '', headers)
 
-        # Scan the table to get all items
-        response = dynamodb.scan(TableName='poop')
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    # One page of the user's records in date order, only those between ?from= / ?to= if given
+    page = read_page(dynamodb, event, table=POOP.table, key=POOP.key, user_id=user, fields=fields)
+    logs.info('Read page', items=len(page.items), more=page.next_cursor is not None)
 
-    try:
-        logger.info(response)
-        items = response.get('Items', [])
-        parsed_items = parse_dynamo_data(items)
+    # A page past the first one can legitimately be empty, only a user without records gets a 404
+    if not page.items and page.first and page.next_cursor is None:
+        return response(404, {'error': "No poop records found"}, headers)
 
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
-
-    if not items:
-        return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': "No poop records found"
-        }
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps(parsed_items)
-    }
+    items = [select_fields(item, fields) for item in deserialize_items(page.items)]
+    # Compressed and/or columnar if the client asked for it
+    return list_response(event, items, page.next_cursor, headers)
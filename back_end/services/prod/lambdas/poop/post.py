@@ -1,49 +1,25 @@
-import boto3
-import json
 import logging
-import uuid
-from datetime import datetime
+from common.codec import serialize_item
+from common.dynamo import get_client
+from common.http import api_handler, parse_body, response
+from common.records import POOP, new_record
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
 
-
-
+@api_handler
 def handler(event, context):
-    poop_id = str(uuid.uuid4())
-    event = json.loads(event['body'])
-    logger.info(event)
+    # Records are stored under their owner's partition
+    user = user_id(event)
+    body = parse_body(event)
+    poop_id, item = new_record(POOP, body, user)
 
-    
-    try:
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-        dynamodb.put_item(
-            TableName='poop',
-            Item={
-                "poop-id": {"S": poop_id},
-                "time_of_day": {"S": event["time_of_day"]},
-                "score": {"N": str(event["score"])},
-                "poop_date": {"S": event["poop_date"]}
-            }
-        )
-    except Exception as e:
-        logger.error(f"Error writing to DynamoDB: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': f"Unexpected error - {e}"
-        }
+    dynamodb.put_item(TableName=POOP.table, Item=serialize_item(item))
+    bump_version(dynamodb, user_collection(POOP.table, user))
 
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({"poop_id": poop_id})
-    }
+    return response(200, {"poop_id": poop_id})
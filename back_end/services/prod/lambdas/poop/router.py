@@ -0,0 +1,6 @@
+import os
+from common.router import Router
+
+# Serves every /poop endpoint from one function when the stack is deployed with lambdaMode=resource
+router = Router(os.path.dirname(os.path.abspath(__file__)), prefix='/poop')
+handler = router.handler
@@ -1,48 +1,33 @@
-import boto3
-import json
 import logging
+from common.dynamo import get_client
+from common.http import api_handler, path_param, response
+from common.records import POOP, find_record, item_key
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
+
+@api_handler
 def handler(event, context):
-    logger.info(f"Received event: {event}")
-
-    try:
-        # Parse the registration ID from the path parameters
-        poop_id = event["pathParameters"]["poop_id"]
-
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        # Delete the item with the matching key
-
-        response = dynamodb.delete_item(
-            TableName='poop',
-            Key={'poop-id': {'S': poop_id}}
-        )
-
-        logger.info(f"DeleteItem response: {response}")
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'message': f"Item with poop_id '{poop_id}' was deleted successfully"
-            })
-        }
-
-    except Exception as e:
-        logger.error(f"Error deleting item: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"error": str(e)})
-        }
+    # Parse the poop ID from the path parameters
+    poop_id = path_param(event, "poop_id")
+
+    # Records are keyed by date, so the key is looked up first; a 404 if the record is not the caller's
+    user = user_id(event)
+    key = item_key(find_record(dynamodb, POOP, user, poop_id))
+
+    # Delete the item with the matching key
+    dynamodb.delete_item(
+        TableName=POOP.table,
+        Key=key
+    )
+
+    bump_version(dynamodb, user_collection(POOP.table, user), deleted=True)
+
+    return response(200, {
+        'message': f"Item with poop_id '{poop_id}' was deleted successfully"
+    })
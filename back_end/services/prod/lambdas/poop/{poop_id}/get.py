@@ -1,69 +1,24 @@
-import boto3
-import json
 import logging
+from common.conditional import item_response
+from common.dynamo import get_client
+from common.fields import parse_fields
+from common.http import api_handler, path_param
+from common.records import POOP, find_record
+from common.users import user_id
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-
-def parse_dynamo_data(data):
-    parsed = []
-    for item in data:
-        parsed_item = {}
-        for k, v in item.items():
-            dtype, val = next(iter(v.items()))  # e.g., {'N': '5'} or {'S': '2025-04-20'}
-            parsed_item[k] = int(val) if dtype == "N" else val
-        parsed.append(parsed_item)
-    return parsed
+dynamodb = get_client()
 
 
+@api_handler
 def handler(event, context):
-    logger.info(event)
-
-    poop_id = event["pathParameters"]["poop_id"]
-
-    try:
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        response = dynamodb.get_item(
-            TableName='poop',
-            Key={
-                'poop-id': {'S': poop_id}
-            }
-        )
-
-        item = response.get('Item')
-
-        # If no item was found
-        if not item:
-            return {
-                'statusCode': 404,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': f"No item found for poop-id '{poop_id}'"})
-            }
-
-        # Parse and return the item
-        parsed_item = parse_dynamo_data([item])[0]
+    poop_id = path_param(event, "poop_id")
 
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps(parsed_item)
-        }
+    # One query of the caller's partition; a 404 if the record is not theirs
+    fields = parse_fields(event)
+    item = find_record(dynamodb, POOP, user_id(event), poop_id, fields)
 
-    except Exception as e:
-        logger.error(f"error - {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"message": f"Unexpected error - {str(e)}"})
-        }
+    # Return the item with its version as ETag, or a 304 if the client already has it
+    return item_response(event, item, fields)
@@ -0,0 +1,33 @@
+import logging
+from common import logs
+from common.conditional import etag
+from common.dynamo import get_client
+from common.http import api_handler, parse_body, path_param, response
+from common.patch import apply_patch, patch_clauses
+from common.records import NUMERIC_FIELDS, POOP, find_record, item_key
+from common.users import user_id
+from common.versions import bump_version, user_collection
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+
+@api_handler
+def handler(event, context):
+    poop_id = path_param(event, "poop_id")
+    body = parse_body(event)
+
+    # Only the fields in the body are written; every poop field is required, so none can be removed
+    patch = patch_clauses(body, POOP.fields, required=POOP.fields, numeric=NUMERIC_FIELDS)
+    user = user_id(event)
+    key = item_key(find_record(dynamodb, POOP, user, poop_id))
+    # A new date moves the record to its new sort key
+    changed, version = apply_patch(dynamodb, event, body, POOP.table, key, patch, schema=POOP)
+
+    bump_version(dynamodb, user_collection(POOP.table, user))
+
+    logs.info('Changed', attributes=sorted(changed))
+
+    return response(200, {**changed, 'version': version}, {'ETag': etag(version)})
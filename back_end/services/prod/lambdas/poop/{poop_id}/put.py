@@ -1,62 +1,41 @@
-import boto3
-import json
 import logging
-from datetime import datetime
+from common import logs
+from common.codec import deserialize_item
+from common.conditional import etag, expected_version
+from common.dynamo import get_client
+from common.fields import public_item
+from common.http import api_handler, parse_body, path_param, require_fields, response
+from common.patch import patch_clauses
+from common.records import NUMERIC_FIELDS, POOP, find_record, item_key, update_record
+from common.users import user_id
+from common.versions import bump_version, user_collection
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+dynamodb = get_client()
 
+
+@api_handler
 def handler(event, context):
-    logger.info(f"Received event: {event}")
-
-    try:
-        poop_id = event["pathParameters"]["poop_id"]
-        body = json.loads(event["body"])
-
-        time_of_day = body["time_of_day"]
-        score = body["score"]
-        poop_date = body["poop_date"]
-
-        
-        # Initialize DynamoDB client
-        dynamodb = boto3.client('dynamodb', region_name='eu-central-1')
-
-        # Build the update expression dynamically
-        update_expression = "SET time_of_day = :n, score = :m, poop_date = :l"
-        expression_values = {
-            ":n": {'S': time_of_day},
-            ":m": {'N': str(score)},
-            ":l": {'S': poop_date}
-        }
-
-        # Perform the update
-        response = dynamodb.update_item(
-            TableName='poop',
-            Key={'poop-id': {'S': poop_id}},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values,
-            ReturnValues="UPDATED_NEW"
-        )
-
-        logger.info(f"Updated attributes: {response['Attributes']}")
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps(response['Attributes'])  
-        }
-
-    except Exception as e:
-        logger.error(f"Error updating item: {e}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({"error": str(e)})
-        }
+    poop_id = path_param(event, "poop_id")
+    body = parse_body(event)
+    require_fields(body, "time_of_day", "score", "poop_date")
+
+    # A PUT writes every field, checked like a PATCH of all of them
+    changes = patch_clauses({field: body[field] for field in POOP.fields}, POOP.fields,
+                            required=POOP.fields, numeric=NUMERIC_FIELDS).changes
+
+    user = user_id(event)
+    key = item_key(find_record(dynamodb, POOP, user, poop_id))
+
+    # Only if the record exists and, with If-Match / version, nobody changed it since;
+    # a new poop_date moves the record to its new sort key
+    update_response = update_record(dynamodb, POOP, key, changes, expected=expected_version(event, body))
+
+    bump_version(dynamodb, user_collection(POOP.table, user))
+
+    logs.info('Updated', attributes=sorted(update_response['Attributes']))
+
+    attributes = public_item(deserialize_item(update_response['Attributes']))
+    return response(200, attributes, {'ETag': etag(attributes['version'])})
@@ -0,0 +1,6 @@
+import os
+from common.router import Router
+
+# Serves the whole API from one function when the stack is deployed with lambdaMode=api
+router = Router(os.path.dirname(os.path.abspath(__file__)))
+handler = router.handler
@@ -0,0 +1,31 @@
+import logging
+from datetime import timedelta
+from common.codec import deserialize_items
+from common.dynamo import batch_get, get_client
+from common.http import api_handler, response
+from common.listing import parse_day_range
+from common.rollups import ROLLUP_TABLE, is_empty, rollup_key, summarize
+from common.users import user_id
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+# Longest range one request may ask for
+MAX_DAYS = 366
+
+
+@api_handler
+def handler(event, context):
+    date_from, date_to = parse_day_range(event, MAX_DAYS)
+
+    # The stream-maintained rollups hold one row per user and day, so the summary is a
+    # keyed read per day instead of a pass over the log tables
+    user = user_id(event)
+    days = [(date_from + timedelta(days=i)).isoformat() for i in range((date_to - date_from).days + 1)]
+    keys = [{'day': {'S': rollup_key(user, day)}} for day in days]
+    rows = deserialize_items(batch_get(dynamodb, ROLLUP_TABLE, keys))
+
+    summaries = sorted((summarize(row) for row in rows if not is_empty(row)), key=lambda day: day['date'])
+    return response(200, {'from': date_from.isoformat(), 'to': date_to.isoformat(), 'days': summaries})
@@ -0,0 +1 @@
+"""Numerical analysis shared by the insights lambdas (ships with NumPy in the analysis layer)"""
@@ -0,0 +1,60 @@
+"""Lagged ingredient -> symptom statistics over a day-indexed history.
+
+Everything sits on one day axis: outcome[d] is a daily mean score (NaN on
+days without a record) and exposure[i, d] says whether ingredient i was eaten
+on day d. For a lag L each ingredient is compared with the outcome L days
+later, so every ingredient is handled by the same few array operations
+instead of a loop over records:
+
+    delta        mean outcome on exposed days - mean outcome on the other days
+    correlation  Pearson correlation of the 0/1 exposure with the outcome
+                 (point-biserial), over the days that have an outcome
+"""
+import numpy as np
+
+LAGS = (0, 1, 2)
+
+
+def exposure_matrix(ingredient_index, day_index, ingredients, days):
+    """Boolean (ingredients x days) matrix from parallel index arrays of food records"""
+    exposure = np.zeros((ingredients, days), dtype=bool)
+    exposure[np.asarray(ingredient_index, dtype=np.intp), np.asarray(day_index, dtype=np.intp)] = True
+    return exposure
+
+
+def shift(outcome, lag):
+    """outcome[d + lag] at position d, NaN where that day is past the end of the history"""
+    shifted = np.full(len(outcome), np.nan)
+    shifted[:len(outcome) - lag] = outcome[lag:]
+    return shifted
+
+
+def lagged_effects(exposure, outcome, lag):
+    """delta, correlation and number of exposed days with an outcome, one entry per ingredient"""
+    y = shift(np.asarray(outcome, dtype=np.float64), lag)
+    valid = ~np.isnan(y)
+    y = np.where(valid, y, 0.0)
+    x = exposure.astype(np.float64)
+
+    n = valid.sum()
+    n_exposed = x @ valid.astype(np.float64)
+    sum_exposed = x @ y
+    sum_all = y.sum()
+    sum_squares = (y * y).sum()
+
+    # Ingredients eaten on every (or no) day with an outcome have no contrast: NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = sum_exposed / n_exposed - (sum_all - sum_exposed) / (n - n_exposed)
+        covariance = n * sum_exposed - n_exposed * sum_all
+        # x is 0/1, so sum(x^2) == sum(x)
+        variance_x = n * n_exposed - n_exposed ** 2
+        variance_y = n * sum_squares - sum_all ** 2
+        correlation = covariance / np.sqrt(variance_x * variance_y)
+
+    return {'delta': delta, 'correlation': correlation, 'days': n_exposed.astype(np.int64)}
+
+
+def ingredient_effects(exposure, outcomes, lags=LAGS):
+    """{outcome name: {lag: lagged_effects(...)}} for every outcome series"""
+    return {name: {lag: lagged_effects(exposure, outcome, lag) for lag in lags}
+            for name, outcome in outcomes.items()}
@@ -0,0 +1 @@
+"""Runtime code shared by the GutToWork lambdas, shipped as the common Lambda layer"""
@@ -0,0 +1,91 @@
+"""Small in-container caches for data that many invocations of a warm container read again"""
+import time
+from collections import OrderedDict
+from common import metrics
+from common.versions import current_version
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Least-recently-used cache of at most `maxsize` entries, each valid for `ttl` seconds (None: forever).
+
+    Not thread-safe; a Lambda container serves one request at a time.
+    """
+
+    def __init__(self, maxsize, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        value, expires = entry
+        if expires is not None and expires <= self.clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class VersionedCache(LRUCache):
+    """LRUCache of data read from one collection, emptied whenever the
+    collection's version (see common/versions.py) moves on.
+
+    The version is read at most every `max_staleness` seconds, so warm reads
+    are answered without a network call and see a write at most that late.
+    A handler that has just read the version anyway (for an ETag) hands it
+    over with observe(), which makes the cache exactly as fresh as the ETag.
+    Hits and misses are counted as <name>CacheHit / <name>CacheMiss metrics.
+    """
+
+    def __init__(self, collection, name, maxsize, ttl=None, max_staleness=2, clock=time.monotonic):
+        super().__init__(maxsize, ttl, clock)
+        self.collection = collection
+        self.name = name
+        self.max_staleness = max_staleness
+        self.version = None
+        self.checked_at = None
+
+    def observe(self, version):
+        if version != self.version:
+            self.clear()
+            self.version = version
+        self.checked_at = self.clock()
+
+    def sync(self, dynamodb):
+        """Empty the cache if the collection changed; checks at most every max_staleness seconds"""
+        if self.checked_at is None or self.clock() - self.checked_at >= self.max_staleness:
+            self.observe(current_version(dynamodb, self.collection)[0])
+
+    def invalidate(self, key):
+        """Forget `key` after this container wrote it, and re-check the version on the next read"""
+        self.pop(key)
+        self.checked_at = None
+
+    def get(self, key, default=None):
+        value = super().get(key, _MISSING)
+        if value is _MISSING:
+            metrics.count(f'{self.name}CacheMiss')
+            return default
+        metrics.count(f'{self.name}CacheHit')
+        return value
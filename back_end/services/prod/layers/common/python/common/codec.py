@@ -0,0 +1,96 @@
+"""Conversion between DynamoDB's typed attribute values and plain Python values.
+
+    {'score': {'N': '3'}, 'poop_date': {'S': '2025-03-24'}}  <->  {'score': 3, 'poop_date': '2025-03-24'}
+
+Numbers come back as int when they are integral (every score and level in the
+API) and as Decimal otherwise, so nothing is lost to float rounding. Binary
+values are returned base64 encoded so the result can always be sent as JSON.
+"""
+import base64
+from decimal import Decimal
+
+
+def _number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return Decimal(value)
+
+
+def _binary(value):
+    return base64.b64encode(value).decode()
+
+
+def _list(values):
+    return [deserialize_value(value) for value in values]
+
+
+_DESERIALIZERS = {
+    'S': str,
+    'N': _number,
+    'BOOL': bool,
+    'NULL': lambda value: None,
+    'L': _list,
+    'M': lambda value: deserialize_item(value),
+    'SS': list,
+    'NS': lambda values: [_number(value) for value in values],
+    'B': _binary,
+    'BS': lambda values: [_binary(value) for value in values],
+}
+
+
+def deserialize_value(value):
+    """Convert one typed value, e.g. {'N': '5'} -> 5"""
+    for dtype, raw in value.items():
+        return _DESERIALIZERS[dtype](raw)
+    raise ValueError("empty DynamoDB attribute value")
+
+
+def deserialize_item(item):
+    """Convert a whole DynamoDB item to a plain dict"""
+    parsed = {}
+    for key, value in item.items():
+        # Strings and integers are almost everything this API stores, so they skip the table lookup
+        if 'S' in value:
+            parsed[key] = value['S']
+        elif 'N' in value:
+            raw = value['N']
+            parsed[key] = int(raw) if raw.isdigit() else _number(raw)
+        else:
+            parsed[key] = deserialize_value(value)
+    return parsed
+
+
+def deserialize_items(items):
+    return [deserialize_item(item) for item in items]
+
+
+def serialize_value(value):
+    """Convert a plain Python value to DynamoDB's typed form, e.g. 5 -> {'N': '5'}"""
+    if value is None:
+        return {'NULL': True}
+    # bool is a subclass of int, so it has to be checked first
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if isinstance(value, dict):
+        return {'M': serialize_item(value)}
+    if isinstance(value, (list, tuple)):
+        return {'L': [serialize_value(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        if all(isinstance(v, str) for v in value):
+            return {'SS': sorted(value)}
+        if all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in value):
+            return {'NS': [str(v) for v in value]}
+        raise TypeError("sets must contain only strings or only numbers")
+    raise TypeError(f"cannot store {type(value).__name__} in DynamoDB")
+
+
+def serialize_item(item):
+    """Convert a plain dict to a DynamoDB item"""
+    return {key: serialize_value(value) for key, value in item.items()}
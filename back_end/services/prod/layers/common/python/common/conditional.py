@@ -0,0 +1,183 @@
+"""Optimistic concurrency for single items: a version per item, ETags and compare-and-set updates.
+
+Every item carries a `version` number, 1 when created and bumped by every
+update. GET /<resource>/{id} returns it as the ETag, and an update may say
+which version it was based on, with If-Match: "<version>" or a `version`
+field in the body. The update then only succeeds if the item is still at
+that version; otherwise nothing is written and the caller gets a 409 with the
+item as it is now, to merge and retry. Updates without a version still go
+through (last write wins), but never create an item that does not exist.
+
+Items written before versions existed count as version 0.
+
+Lists get the same treatment one level up: their ETag and Last-Modified come
+from the collection versions of common/versions.py, so a client revalidating
+an unchanged list costs one GetItem and an empty 304 instead of a scan.
+"""
+from email.utils import formatdate, parsedate_to_datetime
+from botocore.exceptions import ClientError
+from common.codec import deserialize_item, serialize_value
+from common.fields import public_item, select_fields
+from common.http import ApiError, header, response
+from common.versions import current_version
+
+VERSION = 'version'
+
+# Clients may keep responses but must revalidate them (cheaply, with the ETag) before every use
+CACHE_CONTROL = 'private, no-cache'
+
+
+def item_version(item):
+    """Version of a raw DynamoDB item"""
+    return int(item[VERSION]['N']) if VERSION in item else 0
+
+
+def etag(version):
+    return f'"{version}"'
+
+
+def _etag_values(value):
+    # Weak and strong tags name the same version here
+    return [tag.strip().removeprefix('W/') for tag in value.split(',') if tag.strip()]
+
+
+def expected_version(event, body=None):
+    """The version an update was based on (If-Match or body['version']), or None for any version"""
+    versions = set()
+    if_match = header(event, 'If-Match')
+    if if_match and if_match.strip() != '*':
+        tags = _etag_values(if_match)
+        if len(tags) != 1 or not tags[0].strip('"').isdigit():
+            raise ApiError(400, 'If-Match must be a single ETag, e.g. "3"')
+        versions.add(int(tags[0].strip('"')))
+    if body and body.get(VERSION) is not None:
+        if not isinstance(body[VERSION], int) or isinstance(body[VERSION], bool):
+            raise ApiError(400, "version must be an integer")
+        versions.add(body[VERSION])
+    if len(versions) > 1:
+        raise ApiError(400, "If-Match and version name different versions")
+    return versions.pop() if versions else None
+
+
+def not_modified(event, tag, last_modified=None):
+    """True if the client's copy is current: If-None-Match names `tag` or, for clients
+    that only send If-Modified-Since, nothing changed after that time (last_modified in ms)"""
+    if_none_match = header(event, 'If-None-Match')
+    if if_none_match:
+        tags = _etag_values(if_none_match)
+        return '*' in tags or tag in tags
+    if_modified_since = header(event, 'If-Modified-Since')
+    if not if_modified_since or not last_modified:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole seconds
+    return last_modified // 1000 <= since
+
+
+def item_response(event, item, fields=None):
+    """200 with the raw item (only `fields` of it, if given) and its ETag, or an
+    empty 304 if the client already has this version"""
+    headers = {'ETag': etag(item_version(item)), 'Cache-Control': CACHE_CONTROL}
+    if not_modified(event, headers['ETag']):
+        return response(304, '', headers)
+    return response(200, select_fields(deserialize_item(item), fields), headers)
+
+
+def collection_headers(dynamodb, event, *collections, caches=(), vary=None):
+    """ETag, Last-Modified and Cache-Control for a response built from these
+    collections, and whether the client's copy of it is still current.
+
+    The ETag joins their versions, e.g. "c12.40" for food records expanded with
+    ingredients, so a write to any of them changes it. The versions read are
+    handed to `caches` (common.cache.VersionedCache), so what they serve is
+    never older than the ETag says. `vary` is the Vary header of a response
+    negotiated on request headers (common.encoding.VARY); caches need it on
+    the 304s and 404s as much as on the bodies.
+    """
+    versions = [current_version(dynamodb, collection) for collection in collections]
+    for cache in caches:
+        cache.observe(versions[collections.index(cache.collection)][0])
+    headers = {
+        'ETag': etag('c' + '.'.join(str(version) for version, _, _ in versions)),
+        'Cache-Control': CACHE_CONTROL
+    }
+    if vary:
+        headers['Vary'] = vary
+    updated_at = max(updated_at for _, updated_at, _ in versions)
+    # 0 means no write has been recorded yet, which is no date to revalidate against
+    if updated_at:
+        headers['Last-Modified'] = formatdate(updated_at / 1000, usegmt=True)
+    return headers, not_modified(event, headers['ETag'], updated_at)
+
+
+def update_clauses(changes):
+    """SET / REMOVE clauses writing {attribute: value} (None removes the attribute):
+    (sets, removes, names, values) for versioned_update"""
+    sets, removes, names, values = [], [], {}, {}
+    for i, (attribute, value) in enumerate(changes.items()):
+        names[f'#p{i}'] = attribute
+        if value is None:
+            removes.append(f'#p{i}')
+        else:
+            sets.append(f'#p{i} = :p{i}')
+            values[f':p{i}'] = serialize_value(value)
+    return sets, removes, names, values
+
+
+def conflict(label, current, expected):
+    """The 409 for a write that expected another version than the current item's"""
+    version = item_version(current)
+    return ApiError(
+        409,
+        f"{label} is at version {version}, not {expected}; merge your changes into the current item and retry",
+        headers={'ETag': etag(version)},
+        current=public_item(deserialize_item(current))
+    )
+
+
+def versioned_update(dynamodb, table, key, sets, values, expected=None, removes=(), names=None,
+                     return_values='UPDATED_NEW', label=None):
+    """update_item that bumps the item's version, only if the item exists (404 otherwise)
+    and, when `expected` is given, is still at that version (409 otherwise).
+
+    sets are "attribute = :value" assignments, removes attribute names; both may use
+    placeholders from `names`. label names the item in error messages (by default
+    its key). Returns the update_item response.
+    """
+    key_name = next(iter(key))
+    label = label or f"{key_name} '{key[key_name]['S']}'"
+    names = {**(names or {}), '#key': key_name, '#version': VERSION}
+    values = {**values, ':version_start': {'N': '0'}, ':version_step': {'N': '1'}}
+    sets = [*sets, '#version = if_not_exists(#version, :version_start) + :version_step']
+    update_expression = 'SET ' + ', '.join(sets)
+    if removes:
+        update_expression += ' REMOVE ' + ', '.join(removes)
+
+    condition = 'attribute_exists(#key)'
+    if expected == 0:
+        condition += ' AND attribute_not_exists(#version)'
+    elif expected is not None:
+        condition += ' AND #version = :expected_version'
+        values[':expected_version'] = {'N': str(expected)}
+
+    try:
+        return dynamodb.update_item(
+            TableName=table,
+            Key=key,
+            UpdateExpression=update_expression,
+            ConditionExpression=condition,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues=return_values,
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        current = e.response.get('Item')
+        if not current:
+            raise ApiError(404, f"No item found for {label}")
+        raise conflict(label, current, expected)
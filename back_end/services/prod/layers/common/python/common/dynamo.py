@@ -0,0 +1,115 @@
+"""DynamoDB client shared by every handler in the container.
+
+Building a boto3 client loads the service model and resolves the endpoint,
+which costs several milliseconds; doing it inside handler() paid that on
+every warm invocation and threw away the open HTTPS connection each time.
+get_client() builds the client once and hands out the same instance, so
+connections in its pool are kept alive between invocations.
+"""
+import os
+import random
+import time
+import boto3
+from botocore.config import Config
+
+REGION = 'eu-central-1'
+
+# Points the client at DynamoDB Local (or another stand-in) for local runs and benchmarks
+ENDPOINT_URL_ENV = 'DYNAMO_ENDPOINT_URL'
+
+CLIENT_CONFIG = Config(
+    # A container serves one request at a time; the headroom is for handlers
+    # that fan out requests to DynamoDB from a thread pool
+    max_pool_connections=25,
+    # Fail fast: API Gateway gives up after 29 seconds anyway
+    connect_timeout=2,
+    read_timeout=5,
+    retries={'max_attempts': 3, 'mode': 'standard'},
+    tcp_keepalive=True
+)
+
+# Largest number of keys BatchGetItem / items BatchWriteItem accept in one request
+BATCH_GET_SIZE = 100
+BATCH_WRITE_SIZE = 25
+
+_client = None
+
+
+def get_client():
+    """Return the container-wide DynamoDB client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = boto3.client(
+            'dynamodb',
+            region_name=REGION,
+            endpoint_url=os.environ.get(ENDPOINT_URL_ENV),
+            config=CLIENT_CONFIG
+        )
+    return _client
+
+
+def projection_kwargs(attributes, names=None):
+    """ProjectionExpression (and names) reading only `attributes`, safe for reserved words and dashes"""
+    names = dict(names or {})
+    placeholders = []
+    for i, attribute in enumerate(attributes):
+        names[f'#a{i}'] = attribute
+        placeholders.append(f'#a{i}')
+    return {'ProjectionExpression': ', '.join(placeholders), 'ExpressionAttributeNames': names}
+
+
+def query_items(dynamodb, **query_kwargs):
+    """Yield every item a query matches, one page in memory at a time"""
+    while True:
+        page = dynamodb.query(**query_kwargs)
+        yield from page.get('Items', [])
+        last_key = page.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        query_kwargs['ExclusiveStartKey'] = last_key
+
+
+def scan_items(dynamodb, **scan_kwargs):
+    """Yield every item a scan returns, one page in memory at a time"""
+    while True:
+        page = dynamodb.scan(**scan_kwargs)
+        yield from page.get('Items', [])
+        last_key = page.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        scan_kwargs['ExclusiveStartKey'] = last_key
+
+
+def backoff(attempt, base=0.05, cap=2.0):
+    """Sleep before retrying unprocessed work: exponential with full jitter"""
+    time.sleep(random.uniform(0, min(cap, base * 2 ** attempt)))
+
+
+def batch_get(dynamodb, table, keys, max_attempts=8, **get_kwargs):
+    """Yield the items stored under `keys`, in no particular order; missing keys are skipped"""
+    for start in range(0, len(keys), BATCH_GET_SIZE):
+        request = {table: {'Keys': keys[start:start + BATCH_GET_SIZE], **get_kwargs}}
+        for attempt in range(max_attempts):
+            page = dynamodb.batch_get_item(RequestItems=request)
+            yield from page.get('Responses', {}).get(table, [])
+            # Throttled keys come back unprocessed rather than as an error
+            request = page.get('UnprocessedKeys')
+            if not request:
+                break
+            backoff(attempt)
+        else:
+            raise RuntimeError(f"{table}: keys still unprocessed after {max_attempts} attempts")
+
+
+def batch_write(dynamodb, table, items, max_attempts=8):
+    """Put typed items in chunks of BATCH_WRITE_SIZE, retrying whatever DynamoDB leaves unprocessed"""
+    for start in range(0, len(items), BATCH_WRITE_SIZE):
+        request = {table: [{'PutRequest': {'Item': item}} for item in items[start:start + BATCH_WRITE_SIZE]]}
+        for attempt in range(max_attempts):
+            # Throttled writes come back unprocessed rather than as an error
+            request = dynamodb.batch_write_item(RequestItems=request).get('UnprocessedItems')
+            if not request:
+                break
+            backoff(attempt)
+        else:
+            raise RuntimeError(f"{table}: items still unprocessed after {max_attempts} attempts")
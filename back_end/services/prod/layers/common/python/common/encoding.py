@@ -0,0 +1,158 @@
+"""Content negotiation for the list endpoints: compressed and compact bodies.
+
+A page of a thousand food records is mostly the same attribute names over and
+over, which compresses well and need not be sent a thousand times:
+
+- Accept-Encoding: br or gzip compresses the body (br where the brotli
+  package is installed; see layers/common/requirements.txt) for requests
+  whose Accept starts with a binary media type, e.g.
+  Accept: application/gzip, application/json. Bodies under
+  MIN_COMPRESSED_SIZE are sent as they are. Any other request, e.g. a
+  browser's with Accept: application/json, gets the JSON text, which API
+  Gateway gzips on the way out if the client accepts gzip (see
+  x-amazon-apigateway-minimum-compression-size in api.yaml).
+- ?format=columnar sends each attribute once, with one value per item:
+
+      {"count": 2, "columns": {"poop-id": ["a1", "b2"], "score": [3, null]}, "next_cursor": null}
+
+  null stands for an item without the attribute.
+- Accept: application/msgpack sends MessagePack instead of JSON (where the
+  msgpack package is installed; otherwise the answer is JSON, as its
+  Content-Type says).
+
+A request asking for none of them gets the bytes response() always built.
+Binary bodies go out base64 encoded with isBase64Encoded set. API Gateway
+decodes them only if the first media type the request's Accept names is one
+of the BINARY_MEDIA_TYPES api.yaml declares; any other request would get the
+base64 text, so it is answered with plain JSON instead.
+"""
+import base64
+import gzip
+from decimal import Decimal
+from common.http import ApiError, header, query_params, response, to_json
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMATS = ('rows', 'columnar')
+
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+# x-amazon-apigateway-binary-media-types in api.yaml
+BINARY_MEDIA_TYPES = (*MSGPACK_TYPES, 'application/gzip')
+
+# Below this, compressing costs more time than the bytes it saves
+MIN_COMPRESSED_SIZE = 1024
+
+# Fast settings: these bodies are compressed on every request, not once
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Caches must keep the variants of a list apart
+VARY = 'Accept, Accept-Encoding'
+
+
+def parse_format(event):
+    value = query_params(event).get('format', 'rows')
+    if value not in FORMATS:
+        raise ApiError(400, f"format must be one of: {', '.join(FORMATS)}")
+    return value
+
+
+def _accepted(value):
+    """{token: q} of an Accept or Accept-Encoding header"""
+    accepted = {}
+    for part in (value or '').split(','):
+        token, *params = [piece.strip() for piece in part.split(';')]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[token.lower()] = q
+    return accepted
+
+
+def content_coding(event):
+    """'br', 'gzip' or None, whichever the client accepts and prefers"""
+    accepted = _accepted(header(event, 'Accept-Encoding'))
+    candidates = ['br', 'gzip'] if brotli else ['gzip']
+    wildcard = accepted.get('*', 0)
+    ranked = [(accepted.get(coding, wildcard), -i, coding) for i, coding in enumerate(candidates)]
+    q, _, coding = max(ranked)
+    return coding if q > 0 else None
+
+
+def _first_accepted(event):
+    """The first media type of the Accept header, the one API Gateway matches against binary media types"""
+    return (header(event, 'Accept') or '').split(',')[0].split(';')[0].strip().lower()
+
+
+def binary_accepted(event):
+    return _first_accepted(event) in BINARY_MEDIA_TYPES
+
+
+def wants_msgpack(event):
+    return msgpack is not None and _first_accepted(event) in MSGPACK_TYPES
+
+
+def columnar(items):
+    """The items as one array of values per attribute, attributes in order of first appearance"""
+    names = list(dict.fromkeys(name for item in items for name in item))
+    return {name: [item.get(name) for item in items] for name in names}
+
+
+def _msgpack_default(value):
+    # Decimal is what common.codec returns for non-integral numbers
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"{type(value).__name__} cannot be packed")
+
+
+def _compress(body, coding):
+    if coding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output the same for the same body
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def list_response(event, items, next_cursor, headers=None):
+    """200 with a page of deserialized items, in the format and encoding the request negotiated"""
+    headers = {**(headers or {}), 'Vary': VARY}
+    if parse_format(event) == 'columnar':
+        body = {'count': len(items), 'columns': columnar(items), 'next_cursor': next_cursor}
+    else:
+        body = {'items': items, 'next_cursor': next_cursor}
+
+    if wants_msgpack(event):
+        data = msgpack.packb(body, default=_msgpack_default, use_bin_type=True)
+        headers['Content-Type'] = MSGPACK_TYPES[0]
+    else:
+        data = None
+
+    coding = content_coding(event) if binary_accepted(event) else None
+    if data is None:
+        text = to_json(body)
+        if coding is None or len(text) < MIN_COMPRESSED_SIZE:
+            # What a client that negotiates nothing has always been sent
+            return response(200, text, headers)
+        data = text.encode()
+    if coding and len(data) >= MIN_COMPRESSED_SIZE:
+        data = _compress(data, coding)
+        headers['Content-Encoding'] = coding
+
+    result = response(200, '', headers)
+    result['body'] = base64.b64encode(data).decode()
+    result['isBase64Encoded'] = True
+    return result
@@ -0,0 +1,174 @@
+"""Data exports: a user's records (or, from scripts/export_records.py, everyone's)
+streamed into one gzipped NDJSON file.
+
+Each line is one record, tagged with the table it came from:
+
+    {"table": "poop_by_user", "item": {"poop-id": "...", "score": 3, ...}}
+
+Items are what the API returns for them (fields.public_item), without the
+keys and index attributes the tables keep. An export of all users' records
+names each record's owner next to it, as "user_id".
+
+The ingredients are shared by all users and always exported whole. Records
+are read a page at a time (a query of the user's partition, or a parallel
+scan, see common/scan.py), compressed as they are written and uploaded to S3
+in multipart chunks, so memory use is a few pages plus one part no matter how
+large the tables are.
+Any binary file object can stand in for S3 (see scripts/export_records.py),
+which is how exports are run locally.
+"""
+import gzip
+import json
+import os
+import time
+import boto3
+from botocore.config import Config
+from common.codec import deserialize_item
+from common.dynamo import REGION, query_items
+from common.fields import public_item
+from common.http import to_json
+from common.ingredients import INGREDIENTS_TABLE
+from common.listing import user_query
+from common.records import FEELING, FOOD_RECORD, POOP, USER_KEY
+from common.scan import parallel_scan
+
+EXPORT_TABLES = (INGREDIENTS_TABLE, FOOD_RECORD.table, POOP.table, FEELING.table)
+
+BUCKET_ENV = 'EXPORT_BUCKET'
+
+# S3's minimum size for every part but the last
+PART_SIZE = 8 * 1024 * 1024
+
+# How long a download link stays valid (seconds)
+URL_EXPIRY = 3600
+
+_s3 = None
+
+
+def get_s3_client():
+    global _s3
+    if _s3 is None:
+        # Presigned URLs must be SigV4 and regional to work for every bucket
+        _s3 = boto3.client('s3', region_name=REGION, config=Config(signature_version='s3v4'))
+    return _s3
+
+
+def bucket():
+    return os.environ[BUCKET_ENV]
+
+
+def export_key(export_id):
+    return f"exports/{export_id}.ndjson.gz"
+
+
+def manifest_key(export_id):
+    return f"exports/{export_id}.json"
+
+
+def write_manifest(s3, export_id, **manifest):
+    s3.put_object(
+        Bucket=bucket(),
+        Key=manifest_key(export_id),
+        Body=json.dumps({'export_id': export_id, 'updated_at': int(time.time()), **manifest}).encode(),
+        ContentType='application/json'
+    )
+
+
+def read_manifest(s3, export_id):
+    """The job's manifest, or None for an unknown export id"""
+    try:
+        body = s3.get_object(Bucket=bucket(), Key=manifest_key(export_id))['Body'].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+    return json.loads(body)
+
+
+def download_url(s3, export_id):
+    return s3.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket(), 'Key': export_key(export_id)},
+        ExpiresIn=URL_EXPIRY
+    )
+
+
+class MultipartWriter:
+    """Write-only binary file object that uploads to S3 part by part as data arrives.
+
+    Use it as a context manager: leaving the block completes the upload, an
+    exception aborts it so no half-written object (or orphaned parts) remain.
+    """
+
+    def __init__(self, s3, bucket_name, key, content_type='application/x-ndjson', part_size=PART_SIZE):
+        self.s3 = s3
+        self.bucket = bucket_name
+        self.key = key
+        self.part_size = part_size
+        self.upload_id = s3.create_multipart_upload(Bucket=bucket_name, Key=key, ContentType=content_type)['UploadId']
+        self.parts = []
+        self.buffer = bytearray()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        self.size += len(data)
+        while len(self.buffer) >= self.part_size:
+            self._upload_part(self.buffer[:self.part_size])
+            del self.buffer[:self.part_size]
+        return len(data)
+
+    def flush(self):
+        # Parts are only sent once they reach part_size
+        pass
+
+    def _upload_part(self, body):
+        number = len(self.parts) + 1
+        part = self.s3.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                   PartNumber=number, Body=bytes(body))
+        self.parts.append({'ETag': part['ETag'], 'PartNumber': number})
+
+    def close(self):
+        # The last part may be short; an empty export still needs one (empty) part
+        if self.buffer or not self.parts:
+            self._upload_part(self.buffer)
+            self.buffer = bytearray()
+        self.s3.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                          MultipartUpload={'Parts': self.parts})
+
+    def abort(self):
+        self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_export(dynamodb, sink, user_id=None, tables=EXPORT_TABLES, segments=4):
+    """Stream the records of `tables` into `sink` as gzipped NDJSON; returns the count per table.
+
+    With a user_id only that user's records (and the shared ingredients) are written.
+    Whole tables are scanned in `segments` parallel segments.
+    """
+    counts = {}
+    with gzip.GzipFile(fileobj=sink, mode='wb') as archive:
+        for table in tables:
+            counts[table] = 0
+            if user_id and table != INGREDIENTS_TABLE:
+                items = query_items(dynamodb, **user_query(table, user_id))
+            else:
+                items = parallel_scan(dynamodb, table, segments=segments)
+            for item in items:
+                record = deserialize_item(item)
+                line = {'table': table, 'item': public_item(record)}
+                if not user_id and USER_KEY in record:
+                    line[USER_KEY] = record[USER_KEY]
+                archive.write(to_json(line).encode() + b'\n')
+                counts[table] += 1
+    return counts
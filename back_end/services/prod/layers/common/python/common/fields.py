@@ -0,0 +1,62 @@
+"""Field selection (?fields=) for the list and item GET endpoints.
+
+    GET /poop?fields=poop-id,poop_date,score
+
+returns only those attributes of each record. They are read with a
+ProjectionExpression, so DynamoDB sends (and the handler deserializes and
+encodes) only what was asked for. Read capacity is still charged for whole
+items; the saving is in bytes and time, not read units. Names are the
+attribute names of the responses; names a record does not have are left
+out, as they would be without ?fields=.
+
+Attributes that only exist for the tables' keys and indexes (INTERNAL_ATTRIBUTES)
+are never returned, asked for or not. `version` is, as it is the item's ETag.
+"""
+import re
+from common.dynamo import projection_kwargs
+from common.http import ApiError, query_params
+
+# A ProjectionExpression this long stays far below DynamoDB's 4 KB expression limit
+MAX_FIELDS = 32
+
+# The per-user partition and sort keys, and what the ingredients table's indexes are keyed on
+INTERNAL_ATTRIBUTES = frozenset({'user_id', 'date-id', 'record_type', 'normalized_name', 'updated_at'})
+
+_FIELD_NAME = re.compile(r'^[A-Za-z0-9_\-]{1,64}$')
+
+
+def parse_fields(event):
+    """The attribute names ?fields= asks for, in order and without repeats, or None for every attribute"""
+    value = query_params(event).get('fields')
+    if value is None:
+        return None
+    fields = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    if not fields:
+        raise ApiError(400, "fields must name at least one attribute")
+    if len(fields) > MAX_FIELDS:
+        raise ApiError(400, f"fields can name at most {MAX_FIELDS} attributes")
+    invalid = [name for name in fields if not _FIELD_NAME.match(name)]
+    if invalid:
+        raise ApiError(400, f"Invalid field name: {', '.join(invalid)}")
+    return fields
+
+
+def projection(fields, *needed, names=None):
+    """Read arguments projecting `fields` plus what the handler `needed` to build the response
+    (merged into `names`, the ExpressionAttributeNames the request already has); {} for all fields"""
+    if fields is None:
+        return {}
+    return projection_kwargs(list(dict.fromkeys([*fields, *needed])), names)
+
+
+def public_item(item):
+    """A plain item without its INTERNAL_ATTRIBUTES, as the API returns it"""
+    return {name: value for name, value in item.items() if name not in INTERNAL_ATTRIBUTES}
+
+
+def select_fields(item, fields, *extra):
+    """The attributes of a plain item that were asked for (and `extra` ones the handler added)"""
+    if fields is None:
+        return public_item(item)
+    wanted = set(fields).union(extra) - INTERNAL_ATTRIBUTES
+    return {name: value for name, value in item.items() if name in wanted}
@@ -0,0 +1,121 @@
+"""API Gateway proxy responses, request parsing and error handling shared by the handlers"""
+import base64
+import functools
+import json
+import logging
+from decimal import Decimal
+from common import logs, metrics
+
+logger = logging.getLogger()
+
+DEFAULT_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    # Browsers hide response headers from scripts unless they are listed here
+    'Access-Control-Expose-Headers': 'ETag, Last-Modified'
+}
+
+
+class ApiError(Exception):
+    """Raise from a handler to answer with the given status code and error message.
+
+    Anything in `details` is added to the error body, e.g. the current item on a conflict.
+    """
+
+    def __init__(self, status_code, message, headers=None, **details):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.headers = headers
+        self.details = details
+
+
+def _json_default(value):
+    # Decimal is what common.codec returns for non-integral numbers
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_json(body):
+    return json.dumps(body, default=_json_default)
+
+
+def response(status_code, body, headers=None):
+    """Build a proxy response; strings are sent as they are, anything else as JSON"""
+    return {
+        'statusCode': status_code,
+        'headers': {**DEFAULT_HEADERS, **headers} if headers else dict(DEFAULT_HEADERS),
+        'body': body if isinstance(body, str) else to_json(body)
+    }
+
+
+def error_response(status_code, message, headers=None, **details):
+    return response(status_code, {'error': message, **details}, headers)
+
+
+def parse_json_body(event):
+    """Return whatever JSON value was sent as the request body"""
+    body = event.get('body') or ''
+    try:
+        # API Gateway passes a body on base64 encoded if its Content-Type is
+        # one of the binary media types of api.yaml (see common/encoding.py)
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body)
+        return json.loads(body)
+    except ValueError:
+        raise ApiError(400, "Request body must be valid JSON")
+
+
+def parse_body(event):
+    """Return the JSON object sent as the request body"""
+    body = parse_json_body(event)
+    if not isinstance(body, dict):
+        raise ApiError(400, "Request body must be a JSON object")
+    return body
+
+
+def require_fields(body, *fields):
+    missing = [field for field in fields if body.get(field) is None]
+    if missing:
+        raise ApiError(400, f"Missing required fields: {', '.join(missing)}")
+
+
+def query_params(event):
+    return event.get('queryStringParameters') or {}
+
+
+def header(event, name):
+    """A request header by name, whatever its case; API Gateway passes them on as the client sent them"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def path_param(event, name):
+    value = (event.get('pathParameters') or {}).get(name)
+    if not value:
+        raise ApiError(400, f"Missing path parameter '{name}'")
+    return value
+
+
+def api_handler(func):
+    """Turn an ApiError into its response and anything unexpected into a logged 500,
+    log the request and its answer (see common/logs.py) and publish the invocation's metrics"""
+    @functools.wraps(func)
+    def wrapper(event, context):
+        logs.start_request(event, context)
+        try:
+            result = func(event, context)
+        except ApiError as e:
+            result = error_response(e.status_code, e.message, e.headers, **e.details)
+        except Exception as e:
+            logger.error(f"Unexpected error - {e}", exc_info=True)
+            result = error_response(500, f"Unexpected error - {e}")
+        finally:
+            metrics.flush()
+        logs.end_request(result)
+        return result
+    return wrapper
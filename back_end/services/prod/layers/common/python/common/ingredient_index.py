@@ -0,0 +1,231 @@
+"""In-container index of ingredient names for type-ahead search.
+
+The index is a sorted list of (normalized name, ingredient id), so every
+ingredient whose normalized name starts with a query sits in one contiguous
+run that bisect finds in O(log n). It is built once per warm container from
+the by-normalized-name index (which already returns names in order) and then
+kept fresh from collection_versions:
+
+- version unchanged: nothing to do
+- only inserts/edits since the last refresh: re-read just the ingredients
+  whose updated_at is newer, from the by-updated-at index
+- a delete since the last refresh: rebuild, since deletes leave nothing to find
+  (as when by-updated-at does not exist yet, between the two deploys that
+  add the table's indexes; see README)
+
+The version is checked at most every MAX_STALENESS seconds, so most queries
+are answered from memory without touching DynamoDB. Writes made by this
+container do not wait for that: ingredients.record_ingredient_write puts
+them straight into the index, and checks that must not miss a write (the
+duplicate check of a new name) read the version every time.
+
+For typo-tolerant matching ("tomatoe" for "tomato") the index also keeps a
+posting list per trigram of the normalized names. Two names within k edits
+share at least len + 2 - 3k trigrams (each edit breaks at most three), so
+only ingredients that reach that count are compared with Levenshtein, and
+the comparison gives up as soon as it exceeds k.
+"""
+import bisect
+import time
+from collections import Counter
+from botocore.exceptions import ClientError
+from common.dynamo import query_items
+from common.ingredients import INGREDIENTS_KEY, INGREDIENTS_TABLE, name_indexes, normalize_name
+from common.versions import current_version, now_ms
+
+NAME_INDEX = 'by-normalized-name'
+UPDATED_INDEX = 'by-updated-at'
+
+# How long a container answers from its index before checking for writes (seconds)
+MAX_STALENESS = 2
+
+# updated_at comes from the clocks of many containers; incremental refreshes
+# re-read this far back (milliseconds) so a slightly slow clock cannot hide a write
+CLOCK_SKEW_MS = 5000
+
+GRAM = 3
+
+# Padding marks the start and end of a name, so short names still have
+# trigrams and the first and last letters weigh as much as the middle ones
+_START, _END = '\x02', '\x03'
+
+
+def ngrams(normalized):
+    padded = _START * (GRAM - 1) + normalized + _END * (GRAM - 1)
+    return Counter(padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1))
+
+
+def max_typos(normalized):
+    """How many edits still count as the same name: none for short names, where
+    one letter is usually a different ingredient (pear / peas), more for long ones"""
+    if len(normalized) < 5:
+        return 0
+    return 1 if len(normalized) < 10 else 2
+
+
+def levenshtein(a, b, max_distance):
+    """Edit distance between a and b, or None if it is more than max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        # Distances only grow from row to row
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+class IngredientIndex:
+
+    def __init__(self):
+        self.keys = []
+        self.names = {}
+        self.postings = {}
+        self.version = None
+        self.deletions = None
+        self.refreshed_from = 0
+        self.checked_at = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _add_postings(self, ingredient_id, normalized):
+        for gram, count in ngrams(normalized).items():
+            self.postings.setdefault(gram, {})[ingredient_id] = count
+
+    def remove(self, ingredient_id):
+        """Drop an ingredient, if the index has it"""
+        old = self.names.pop(ingredient_id, None)
+        if old:
+            position = bisect.bisect_left(self.keys, (old[0], ingredient_id))
+            if position < len(self.keys) and self.keys[position] == (old[0], ingredient_id):
+                del self.keys[position]
+            for gram in ngrams(old[0]):
+                self.postings[gram].pop(ingredient_id, None)
+                if not self.postings[gram]:
+                    del self.postings[gram]
+
+    def put(self, ingredient_id, name):
+        """Add an ingredient, or move it if its name changed"""
+        self.remove(ingredient_id)
+        normalized = normalize_name(name)
+        if normalized:
+            bisect.insort(self.keys, (normalized, ingredient_id))
+            self.names[ingredient_id] = (normalized, name)
+            self._add_postings(ingredient_id, normalized)
+
+    def search(self, query, limit):
+        """Up to `limit` ingredients whose normalized name starts with the normalized query"""
+        prefix = normalize_name(query)
+        results = []
+        position = bisect.bisect_left(self.keys, (prefix,))
+        while position < len(self.keys) and len(results) < limit:
+            normalized, ingredient_id = self.keys[position]
+            if not normalized.startswith(prefix):
+                break
+            results.append({'ingredient_id': ingredient_id, 'ingredient_name': self.names[ingredient_id][1]})
+            position += 1
+        return results
+
+    def similar(self, name, max_distance=None, limit=10):
+        """Ingredients whose normalized name is within max_distance edits of name's
+        (by default max_typos), closest first, each with its distance"""
+        normalized = normalize_name(name)
+        if max_distance is None:
+            max_distance = max_typos(normalized)
+        # Below one shared trigram the filter would pass everything; cap the distance instead
+        max_distance = min(max_distance, (len(normalized) + GRAM - 2) // GRAM)
+        threshold = len(normalized) + GRAM - 1 - GRAM * max_distance
+
+        shared = Counter()
+        for gram, count in ngrams(normalized).items():
+            for ingredient_id, other_count in self.postings.get(gram, {}).items():
+                shared[ingredient_id] += min(count, other_count)
+
+        matches = []
+        for ingredient_id, count in shared.items():
+            if count < threshold:
+                continue
+            other, stored_name = self.names[ingredient_id]
+            distance = levenshtein(normalized, other, max_distance)
+            if distance is not None:
+                matches.append((distance, other, ingredient_id, stored_name))
+        matches.sort()
+        return [{'ingredient_id': ingredient_id, 'ingredient_name': stored_name, 'distance': distance}
+                for distance, _, ingredient_id, stored_name in matches[:limit]]
+
+    def _read(self, dynamodb, **query):
+        for item in query_items(
+                dynamodb,
+                TableName=INGREDIENTS_TABLE,
+                ProjectionExpression='#k, ingredient_name',
+                ExpressionAttributeNames={'#k': INGREDIENTS_KEY},
+                **query):
+            if 'ingredient_name' in item:
+                yield item[INGREDIENTS_KEY]['S'], item['ingredient_name']['S']
+
+    def rebuild(self, dynamodb):
+        items = self._read(
+            dynamodb,
+            IndexName=NAME_INDEX,
+            KeyConditionExpression='record_type = :t',
+            ExpressionAttributeValues={':t': {'S': 'ingredient'}}
+        )
+        self.keys, self.names, self.postings = [], {}, {}
+        for ingredient_id, name in items:
+            normalized = normalize_name(name)
+            if normalized:
+                self.keys.append((normalized, ingredient_id))
+                self.names[ingredient_id] = (normalized, name)
+                self._add_postings(ingredient_id, normalized)
+        # Stored normalized names came from older versions of normalize_name too
+        self.keys.sort()
+
+    def apply_changes(self, dynamodb, since):
+        items = self._read(
+            dynamodb,
+            IndexName=UPDATED_INDEX,
+            KeyConditionExpression='record_type = :t AND updated_at >= :since',
+            ExpressionAttributeValues={':t': {'S': 'ingredient'}, ':since': {'N': str(since)}}
+        )
+        for ingredient_id, name in items:
+            self.put(ingredient_id, name)
+
+    def refresh(self, dynamodb, exact=False):
+        """Bring the index up to date if it may be stale (with exact, check the version however recently it was)"""
+        now = time.monotonic()
+        if not exact and self.checked_at is not None and now - self.checked_at < MAX_STALENESS:
+            return
+        self.checked_at = now
+
+        version, _, deletions = current_version(dynamodb, INGREDIENTS_TABLE)
+        if version == self.version:
+            return
+        # Everything written after this point is caught by the next refresh
+        started = now_ms()
+        if self.version is None or deletions != self.deletions:
+            self.rebuild(dynamodb)
+        else:
+            try:
+                self.apply_changes(dynamodb, since=self.refreshed_from - CLOCK_SKEW_MS)
+            except ClientError as e:
+                # DynamoDB answers a query of a missing (or still backfilling) index with ValidationException
+                if e.response['Error']['Code'] not in ('ValidationException', 'ResourceNotFoundException'):
+                    raise
+                self.rebuild(dynamodb)
+        self.version, self.deletions, self.refreshed_from = version, deletions, started
+
+
+_index = IngredientIndex()
+name_indexes.append(_index)
+
+
+def get_ingredient_index(dynamodb, exact=False):
+    """The container's ingredient index, refreshed if it may be stale; exact for checks
+    that must see every ingredient written so far, at the price of reading the version"""
+    _index.refresh(dynamodb, exact)
+    return _index
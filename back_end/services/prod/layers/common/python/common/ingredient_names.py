@@ -0,0 +1,83 @@
+"""The checks an ingredient name passes before it is stored, by POST and by a rename (PUT / PATCH) alike:
+
+- it is stored trimmed and lowercased
+- its normalized form (see ingredients.normalize_name) has a letter or digit
+- no other ingredient's normalized name equals it, extends it or is a prefix of it
+- it is not within a typo or two of another ingredient's name, unless the
+  client sends allow_similar (see ingredient_index.IngredientIndex.similar)
+
+A rename is checked against every ingredient but the one being renamed, so
+"Oats" can become "oats" and an unchanged name passes.
+"""
+import os
+from common.http import ApiError
+from common.ingredient_index import NAME_INDEX, get_ingredient_index
+from common.ingredients import INGREDIENTS_KEY, INGREDIENTS_TABLE, normalize_name
+
+# Most look-alike ingredients listed when a name is refused
+MAX_SIMILAR = 5
+
+
+def _closest_name(dynamodb, key_condition, normalized_name, exclude, **query_kwargs):
+    """The first ingredient but `exclude` from the by-normalized-name index matching the key condition"""
+    response = dynamodb.query(
+        TableName=INGREDIENTS_TABLE,
+        IndexName=NAME_INDEX,
+        KeyConditionExpression=f"record_type = :t AND {key_condition}",
+        ExpressionAttributeValues={':t': {'S': 'ingredient'}, ':n': {'S': normalized_name}},
+        # One more, in case the first is the ingredient being renamed
+        Limit=2 if exclude else 1,
+        **query_kwargs
+    )
+    for item in response.get('Items', []):
+        if item[INGREDIENTS_KEY]['S'] != exclude:
+            return item
+    return None
+
+
+def find_conflicting_ingredient(dynamodb, normalized_name, exclude=None):
+    """Find an existing ingredient (other than `exclude`) whose normalized name equals, extends or is a prefix of the new one"""
+    # Exact matches and names that start with the new one sort right at the new name
+    existing = _closest_name(dynamodb, "begins_with(normalized_name, :n)", normalized_name, exclude)
+    if existing:
+        return existing
+
+    # Names that are a prefix of the new one sort before it. Look at the closest name below;
+    # if it is not a prefix, any shorter prefix must also prefix what the two names share,
+    # so each step shortens the search bound and this takes at most a handful of lookups
+    upper = normalized_name
+    while upper:
+        existing = _closest_name(dynamodb, "normalized_name <= :n", upper, exclude, ScanIndexForward=False)
+        if not existing:
+            return None
+        existing_normalized = existing["normalized_name"]["S"]
+        if normalized_name.startswith(existing_normalized):
+            return existing
+        upper = os.path.commonprefix([existing_normalized, normalized_name])
+    return None
+
+
+def checked_name(dynamodb, name, allow_similar=False, ingredient_id=None):
+    """(name as stored, normalized name) for a new ingredient, or a new name of ingredient_id;
+    a 400 if another ingredient has it, or (without allow_similar) a name it looks like a typo of"""
+    if not isinstance(name, str):
+        raise ApiError(400, "ingredient_name must be a string")
+    stored_name = name.strip().lower()
+    normalized_name = normalize_name(stored_name)
+    if not normalized_name:
+        raise ApiError(400, "Ingredient name must contain at least one letter or digit.")
+
+    if find_conflicting_ingredient(dynamodb, normalized_name, exclude=ingredient_id):
+        raise ApiError(400, f"Ingredient '{name}' already exists.")
+
+    # Likely typos of an existing name ("tomatoe"); the client can insist with allow_similar.
+    # The index must include ingredients other containers wrote a moment ago
+    if not allow_similar:
+        index = get_ingredient_index(dynamodb, exact=True)
+        similar = [match for match in index.similar(stored_name, limit=MAX_SIMILAR + 1)
+                   if match['ingredient_id'] != ingredient_id][:MAX_SIMILAR]
+        if similar:
+            action = "rename it" if ingredient_id else "add it"
+            raise ApiError(400, f"Ingredient '{name}' looks like an existing ingredient. "
+                                f"Send allow_similar: true to {action} anyway.", similar=similar)
+    return stored_name, normalized_name
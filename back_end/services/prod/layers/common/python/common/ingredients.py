@@ -0,0 +1,211 @@
+"""Ingredient names: the normalized form behind duplicate checks and name lookups, and the copy
+of each ingredient's name that food records carry so they can be listed without a join"""
+import logging
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from common.cache import VersionedCache
+from common.codec import deserialize_item
+from common.dynamo import batch_get, query_items
+from common.http import ApiError, query_params
+from common.listing import read_page
+from common.records import FOOD_RECORD, USER_KEY, item_key
+from common.versions import bump_version, now_ms, user_collection
+
+logger = logging.getLogger()
+
+INGREDIENTS_TABLE = 'ingredients'
+INGREDIENTS_KEY = 'ingredients-id'
+
+# Index of the food records on ingredient_id (keys only)
+INGREDIENT_INDEX = 'by-ingredient'
+
+# Food records renamed in parallel at most; stays below the client's connection pool
+FAN_OUT_WORKERS = 8
+
+# What clients set on an ingredient; the first two are required
+INGREDIENT_FIELDS = ('ingredient_name', 'default_portion_size', 'default_cooking_type')
+REQUIRED_INGREDIENT_FIELDS = ('ingredient_name', 'default_portion_size')
+
+# What ?expand=ingredient adds to a food record
+DETAIL_ATTRIBUTES = INGREDIENT_FIELDS
+
+# The catalog is read far more than written, so warm containers serve it from
+# memory: ingredients by id, and list pages by (limit, cursor). Both are emptied
+# when the ingredients version moves on; the TTL only bounds how long a write
+# that bypassed bump_version (a script, the console) can go unseen
+ingredient_cache = VersionedCache(INGREDIENTS_TABLE, 'Ingredient', maxsize=1024, ttl=300)
+ingredient_pages = VersionedCache(INGREDIENTS_TABLE, 'IngredientPage', maxsize=32, ttl=300)
+
+# In-container name indexes (see common/ingredient_index.py, which adds its own when imported),
+# told about every write so the container that made it finds it right away
+name_indexes = []
+
+
+def normalize_name(name):
+    """Lowercase the name and drop spaces, hyphens and underscores, so 'Greek-Yogurt' == 'greek yogurt'"""
+    return re.sub(r'[\s\-_]+', '', name.strip().lower())
+
+
+def derived_attributes(changes):
+    """Attributes written along with an update of an ingredient's fields: the
+    normalized name (if the name changes) and what the by-* indexes key on"""
+    derived = {'record_type': 'ingredient', 'updated_at': now_ms()}
+    if changes.get('ingredient_name') is not None:
+        derived['normalized_name'] = normalize_name(changes['ingredient_name'])
+        if not derived['normalized_name']:
+            raise ApiError(400, "Ingredient name must contain at least one letter or digit.")
+    return derived
+
+
+def ingredient_names(dynamodb, ingredient_ids):
+    """Current name of each ingredient; raises a 400 naming any id that does not exist"""
+    unique_ids = list(dict.fromkeys(ingredient_ids))
+    items = batch_get(
+        dynamodb,
+        INGREDIENTS_TABLE,
+        [{INGREDIENTS_KEY: {'S': ingredient_id}} for ingredient_id in unique_ids],
+        ProjectionExpression='#k, ingredient_name',
+        ExpressionAttributeNames={'#k': INGREDIENTS_KEY}
+    )
+    names = {item[INGREDIENTS_KEY]['S']: item.get('ingredient_name', {}).get('S') for item in items}
+    unknown = [ingredient_id for ingredient_id in unique_ids if ingredient_id not in names]
+    if unknown:
+        raise ApiError(400, f"Unknown ingredient_id: {', '.join(unknown)}")
+    return names
+
+
+def denormalize_ingredient_names(dynamodb, records):
+    """Overwrite ingredient_name in food records with the ingredient's stored name"""
+    names = ingredient_names(dynamodb, [record['ingredient_id'] for record in records])
+    for record in records:
+        record['ingredient_name'] = names[record['ingredient_id']]
+    return records
+
+
+def record_ingredient_write(dynamodb, ingredient_id, name=None, deleted=False):
+    """Bump the ingredients version after a write, drop what this container cached
+    and put the ingredient's new name (if it changed) into its name indexes (in the
+    api router, readers share the writer's container)"""
+    bump_version(dynamodb, INGREDIENTS_TABLE, deleted=deleted)
+    ingredient_cache.invalidate(ingredient_id)
+    ingredient_pages.clear()
+    for index in name_indexes:
+        if deleted:
+            index.remove(ingredient_id)
+        elif name is not None:
+            index.put(ingredient_id, name)
+
+
+def get_ingredient(dynamodb, ingredient_id):
+    """The stored ingredient item (DynamoDB JSON), or None if there is none"""
+    ingredient_cache.sync(dynamodb)
+    item = ingredient_cache.get(ingredient_id)
+    if item is None:
+        item = dynamodb.get_item(
+            TableName=INGREDIENTS_TABLE,
+            Key={INGREDIENTS_KEY: {'S': ingredient_id}}
+        ).get('Item')
+        if item:
+            ingredient_cache.put(ingredient_id, item)
+    return item
+
+
+def read_ingredient_page(dynamodb, event, fields=None):
+    """The page of the ingredients table the request asks for (see common/listing.py),
+    with only `fields` of each ingredient if given.
+
+    Call after collection_headers(..., caches=[ingredient_pages]), which
+    checks the cached pages against the version the ETag names.
+    """
+    params = query_params(event)
+    key = (params.get('limit'), params.get('cursor'), tuple(fields) if fields else None)
+    page = ingredient_pages.get(key)
+    if page is None:
+        page = read_page(dynamodb, event, table=INGREDIENTS_TABLE, key=INGREDIENTS_KEY, fields=fields)
+        ingredient_pages.put(key, page)
+    return page
+
+
+def ingredient_details(dynamodb, ingredient_ids):
+    """{id: details} for the given ingredients, from the cache or one BatchGetItem per 100 misses.
+
+    Ingredients that no longer exist are left out.
+    """
+    ingredient_cache.sync(dynamodb)
+    details, missing = {}, []
+    for ingredient_id in dict.fromkeys(ingredient_ids):
+        item = ingredient_cache.get(ingredient_id)
+        if item is None:
+            missing.append(ingredient_id)
+        else:
+            details[ingredient_id] = _details(item)
+    if missing:
+        items = batch_get(
+            dynamodb,
+            INGREDIENTS_TABLE,
+            [{INGREDIENTS_KEY: {'S': ingredient_id}} for ingredient_id in missing]
+        )
+        for item in items:
+            ingredient_id = item[INGREDIENTS_KEY]['S']
+            ingredient_cache.put(ingredient_id, item)
+            details[ingredient_id] = _details(item)
+    return details
+
+
+def _details(item):
+    return deserialize_item({name: value for name, value in item.items() if name in DETAIL_ATTRIBUTES})
+
+
+def _rename_food_record(dynamodb, key, ingredient_id, name):
+    try:
+        dynamodb.update_item(
+            TableName=FOOD_RECORD.table,
+            Key=key,
+            # A new version too, so clients holding the record's old ETag see the new name
+            UpdateExpression='SET ingredient_name = :n, version = if_not_exists(version, :zero) + :one',
+            # Skip records deleted or moved to another ingredient since the index was read
+            ConditionExpression='ingredient_id = :i',
+            ExpressionAttributeValues={':n': {'S': name}, ':i': {'S': ingredient_id},
+                                       ':zero': {'N': '0'}, ':one': {'N': '1'}}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def rename_in_food_records(dynamodb, ingredient_id, name, workers=FAN_OUT_WORKERS):
+    """Copy a renamed ingredient's name to every food record that refers to it; returns how many changed"""
+    keys = query_items(
+        dynamodb,
+        TableName=FOOD_RECORD.table,
+        IndexName=INGREDIENT_INDEX,
+        KeyConditionExpression='ingredient_id = :i',
+        ExpressionAttributeValues={':i': {'S': ingredient_id}}
+    )
+    renamed_for = Counter()
+
+    def rename(batch):
+        results = pool.map(lambda key: _rename_food_record(dynamodb, key, ingredient_id, name), batch)
+        for key, renamed in zip(batch, results):
+            renamed_for[key[USER_KEY]['S']] += renamed
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        for item in keys:
+            batch.append(item_key(item))
+            # Work in batches so at most one batch of keys is held and `workers` updates run at once
+            if len(batch) == workers * 4:
+                rename(batch)
+                batch = []
+        rename(batch)
+    # Cached lists of the users whose records changed are stale now
+    for user_id, renamed in renamed_for.items():
+        if renamed:
+            bump_version(dynamodb, user_collection(FOOD_RECORD.table, user_id))
+    renamed = sum(renamed_for.values())
+    logger.info(f"Renamed ingredient {ingredient_id} to '{name}' in {renamed} food records")
+    return renamed
@@ -0,0 +1,139 @@
+"""Paginated reads behind the list endpoints (?limit=, ?cursor=, ?from= / ?to=, ?fields=) and report date ranges"""
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from common.fields import projection
+from common.http import ApiError, query_params
+from common.records import SORT_KEY, USER_KEY
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# items are raw DynamoDB items; first is False when the request continued from a cursor
+Page = namedtuple('Page', ['items', 'next_cursor', 'first'])
+
+
+def encode_cursor(last_evaluated_key):
+    """Turn DynamoDB's LastEvaluatedKey into an opaque, URL-safe cursor"""
+    raw = json.dumps(last_evaluated_key, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, *required_attributes):
+    try:
+        start_key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ApiError(400, "Invalid cursor")
+    if not isinstance(start_key, dict) or any(attr not in start_key for attr in required_attributes):
+        raise ApiError(400, "Cursor was issued for a different query")
+    return start_key
+
+
+def parse_limit(event):
+    try:
+        limit = int(query_params(event).get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def parse_date_range(event):
+    """Read the optional ?from= and ?to= dates (both inclusive)"""
+    params = query_params(event)
+    date_from, date_to = params.get('from'), params.get('to')
+    if date_from and date_to and date_from > date_to:
+        raise ApiError(400, "'from' must not be after 'to'")
+    return date_from, date_to
+
+
+def parse_day_range(event, max_days, default_days=None):
+    """Read the ?from= / ?to= days of a report as dates (both inclusive).
+
+    Without either parameter the range is the last `default_days` days up to
+    today (UTC), if a default is given; otherwise both are required.
+    """
+    params = query_params(event)
+    if default_days and 'from' not in params and 'to' not in params:
+        date_to = datetime.now(timezone.utc).date()
+        return date_to - timedelta(days=default_days - 1), date_to
+    try:
+        date_from = date.fromisoformat(params['from'])
+        date_to = date.fromisoformat(params['to'])
+    except KeyError:
+        raise ApiError(400, "'from' and 'to' are required")
+    except ValueError:
+        raise ApiError(400, "'from' and 'to' must be dates like 2025-03-24")
+    if date_from > date_to:
+        raise ApiError(400, "'from' must not be after 'to'")
+    if (date_to - date_from).days >= max_days:
+        raise ApiError(400, f"The range can cover at most {max_days} days")
+    return date_from, date_to
+
+
+def user_query(table, user_id, date_from=None, date_to=None):
+    """Query arguments for a user's records (in date order), between two dates (inclusive) if given"""
+    key_conditions = ['#u = :u']
+    names = {'#u': USER_KEY}
+    values = {':u': {'S': user_id}}
+    if date_from or date_to:
+        names['#k'] = SORT_KEY
+    # Sort keys are <date>#<id>: every key of a day sorts after the bare date and,
+    # as '$' follows '#', before "<date>$"
+    if date_from and date_to:
+        key_conditions.append('#k BETWEEN :from AND :to')
+    elif date_from:
+        key_conditions.append('#k >= :from')
+    elif date_to:
+        key_conditions.append('#k < :to')
+    if date_from:
+        values[':from'] = {'S': date_from}
+    if date_to:
+        values[':to'] = {'S': f'{date_to}$'}
+    return {
+        'TableName': table,
+        'KeyConditionExpression': ' AND '.join(key_conditions),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+
+def read_page(dynamodb, event, table, key, user_id=None, fields=None, needed=()):
+    """Read the page of `table` the request asks for.
+
+    For the per-user tables this is one page of a query of the user's
+    partition, in date order and limited to ?from= / ?to= when given, which
+    never reads anyone else's records or records outside the range. Tables
+    shared by everyone (ingredients) are read a scan page at a time.
+
+    With `fields` (see common/fields.py) only those attributes are read, and
+    the `needed` ones the handler uses itself.
+    """
+    limit = parse_limit(event)
+
+    if user_id:
+        read_kwargs = user_query(table, user_id, *parse_date_range(event))
+    else:
+        read_kwargs = {'TableName': table}
+    read_kwargs['Limit'] = limit
+    read_kwargs.update(projection(fields, *needed, names=read_kwargs.get('ExpressionAttributeNames')))
+
+    cursor = query_params(event).get('cursor')
+    if cursor:
+        if user_id:
+            start_key = decode_cursor(cursor, USER_KEY, SORT_KEY)
+            if start_key[USER_KEY] != {'S': user_id}:
+                raise ApiError(400, "Cursor was issued for a different query")
+        else:
+            start_key = decode_cursor(cursor, key)
+        read_kwargs['ExclusiveStartKey'] = start_key
+
+    response = dynamodb.query(**read_kwargs) if user_id else dynamodb.scan(**read_kwargs)
+    last_key = response.get('LastEvaluatedKey')
+    return Page(
+        items=response.get('Items', []),
+        next_cursor=encode_cursor(last_key) if last_key else None,
+        first=not cursor
+    )
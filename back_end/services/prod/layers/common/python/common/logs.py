@@ -0,0 +1,108 @@
+"""Structured, bounded request logging.
+
+api_handler logs every request as two JSON lines, one when it comes in and
+one when it is answered, carrying the Lambda and API Gateway request ids:
+
+    {"message": "Request", "request_id": "...", "api_request_id": "...",
+     "method": "GET", "resource": "/poop", "query": ["from", "limit"], "body_bytes": 0}
+    {"message": "Response", "request_id": "...", ..., "status": 200, "body_bytes": 9392, "duration_ms": 41.2}
+
+Handlers add their own lines with info(), summarizing what they read or
+wrote with summary() (counts, sizes and attribute names, never the values),
+so a request costs a few hundred bytes of CloudWatch Logs however large its
+payload. Whole events and response bodies, which hold users' data, are only
+logged for a sample of requests: LOG_PAYLOAD_SAMPLE_RATE (0 to 1, default 0)
+of the invocations, cut at MAX_PAYLOAD_CHARS.
+"""
+import json
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger()
+
+SAMPLE_RATE_ENV = 'LOG_PAYLOAD_SAMPLE_RATE'
+
+# Even a sampled payload is cut here; CloudWatch Logs takes at most 256 KB per event
+MAX_PAYLOAD_CHARS = 64 * 1024
+
+# Attribute names listed at most in a summary
+MAX_SUMMARY_KEYS = 20
+
+# Request headers never written to the logs, sampled or not
+REDACTED_HEADERS = {'authorization', 'cookie', 'x-api-key', 'x-amz-security-token'}
+
+# Fields of the current invocation, added to every line
+_context = {}
+_started = None
+_sampled = False
+
+
+def sample_rate():
+    try:
+        return min(1.0, max(0.0, float(os.environ.get(SAMPLE_RATE_ENV, 0))))
+    except ValueError:
+        return 0.0
+
+
+def info(message, **fields):
+    logger.info(json.dumps({'message': message, **_context, **fields}, default=str))
+
+
+def summary(value):
+    """What a payload looks like, without what it says"""
+    if isinstance(value, dict):
+        return {'keys': list(value)[:MAX_SUMMARY_KEYS], 'count': len(value)}
+    if isinstance(value, (list, tuple)):
+        return {'count': len(value)}
+    if isinstance(value, (str, bytes)):
+        return {'bytes': len(value)}
+    return {'type': type(value).__name__}
+
+
+def payload(name, value):
+    """Log a whole payload, if this invocation is sampled"""
+    if _sampled:
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+        info(f"Payload: {name}", payload=text[:MAX_PAYLOAD_CHARS], truncated=len(text) > MAX_PAYLOAD_CHARS)
+
+
+def _redacted(event):
+    event = dict(event)
+    for name in ('headers', 'multiValueHeaders'):
+        if event.get(name):
+            event[name] = {key: '<redacted>' if key.lower() in REDACTED_HEADERS else value
+                           for key, value in event[name].items()}
+    return event
+
+
+def start_request(event, context):
+    """Bind the request ids to this invocation's lines and log the request"""
+    global _started, _sampled
+    _started = time.perf_counter()
+    _sampled = random.random() < sample_rate()
+    _context.clear()
+    _context['request_id'] = getattr(context, 'aws_request_id', None)
+    _context['api_request_id'] = (event.get('requestContext') or {}).get('requestId')
+    info(
+        'Request',
+        method=event.get('httpMethod'),
+        resource=event.get('resource'),
+        query=sorted(event.get('queryStringParameters') or {}),
+        body_bytes=len(event.get('body') or '')
+    )
+    payload('event', _redacted(event))
+
+
+def end_request(result):
+    """Log how the request was answered"""
+    result = result or {}
+    info(
+        'Response',
+        status=result.get('statusCode'),
+        body_bytes=len(result.get('body') or ''),
+        content_encoding=(result.get('headers') or {}).get('Content-Encoding'),
+        duration_ms=round((time.perf_counter() - _started) * 1000, 1) if _started else None
+    )
+    payload('response', result.get('body') or '')
@@ -0,0 +1,37 @@
+"""Counters published as CloudWatch metrics in Embedded Metric Format.
+
+Handlers count() as they go and api_handler flushes once per invocation: one
+JSON line on stdout, which CloudWatch Logs turns into metrics (per function)
+without an API call on the request path.
+"""
+import json
+import os
+from collections import Counter
+from common.versions import now_ms
+
+NAMESPACE = 'GutToWork'
+
+_counts = Counter()
+
+
+def count(name, value=1):
+    _counts[name] += value
+
+
+def flush():
+    """Write the counts of this invocation as one EMF log line and reset them"""
+    if not _counts:
+        return
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': now_ms(),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['FunctionName']],
+                'Metrics': [{'Name': name, 'Unit': 'Count'} for name in _counts]
+            }]
+        },
+        'FunctionName': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+        **_counts
+    }))
+    _counts.clear()
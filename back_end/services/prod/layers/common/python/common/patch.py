@@ -0,0 +1,86 @@
+"""Partial updates (PATCH): only the fields a request names are written.
+
+    {"score": 4}                   -> SET score = :v
+    {"default_cooking_type": null} -> REMOVE default_cooking_type
+
+Fields left out of the body are not touched, so a one-field edit writes one
+attribute (plus the version) instead of the whole item. The response lists
+only the attributes whose value actually changed, removed ones as null.
+"""
+from collections import namedtuple
+from common.codec import deserialize_item, deserialize_value, serialize_value
+from common.conditional import VERSION, expected_version, item_version, update_clauses, versioned_update
+from common.fields import public_item
+from common.http import ApiError
+from common.records import check_value, update_record
+
+# changes: plain {attribute: new value or None}; the rest goes to versioned_update
+Patch = namedtuple('Patch', ['changes', 'sets', 'removes', 'names', 'values'])
+
+
+def patch_clauses(body, fields, required=(), numeric=(), derived=None):
+    """Turn a PATCH body into the SET / REMOVE clauses of an update.
+
+    fields are the attributes a client may change, required the ones it may
+    not remove (null) and numeric the ones that must be numbers. derived(changes)
+    may return further attributes to write along with the client's, e.g. a
+    normalized copy of a name.
+    """
+    unknown = sorted(set(body) - set(fields) - {VERSION})
+    if unknown:
+        raise ApiError(400, f"Unknown fields: {', '.join(unknown)}; allowed: {', '.join(fields)}")
+    changes = {}
+    for field in fields:
+        if field not in body:
+            continue
+        if body[field] is None:
+            if field in required:
+                raise ApiError(400, f"{field} cannot be removed")
+            changes[field] = None
+        else:
+            # 4.0 from JSON is stored as the 4 a POST would have written
+            changes[field] = check_value(field, body[field], numeric)
+    if not changes:
+        raise ApiError(400, f"Nothing to update; send at least one of: {', '.join(fields)}")
+    if derived:
+        changes.update(derived(changes))
+
+    return Patch(changes, *update_clauses(changes))
+
+
+def apply_patch(dynamodb, event, body, table, key, patch, schema=None):
+    """Write a patch (compare-and-set when the request names a version, see common/conditional.py).
+
+    For the per-user record tables pass their schema, so a patch that changes
+    the date moves the record (see records.update_record). Returns ({attribute:
+    new value} for the attributes that changed, removed ones as None, and the
+    item's new version). Attributes derived for the table's indexes are left out,
+    as the API does not show them.
+    """
+    expected = expected_version(event, body)
+    if schema:
+        update_response = update_record(dynamodb, schema, key, patch.changes, expected=expected,
+                                        return_values='ALL_OLD')
+    else:
+        update_response = versioned_update(
+            dynamodb,
+            table,
+            key,
+            patch.sets,
+            patch.values,
+            expected=expected,
+            removes=patch.removes,
+            names=patch.names,
+            return_values='ALL_OLD'
+        )
+    old_item = update_response.get('Attributes', {})
+    old = deserialize_item(old_item)
+    changed = {}
+    for attribute, value in patch.changes.items():
+        if value is None:
+            if attribute in old:
+                changed[attribute] = None
+        # Compared as stored, so 4.0 in the body equals a stored 4
+        elif attribute not in old or old[attribute] != deserialize_value(serialize_value(value)):
+            changed[attribute] = value
+    return public_item(changed), item_version(old_item) + 1
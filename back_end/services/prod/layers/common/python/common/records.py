@@ -0,0 +1,240 @@
+"""Poop, feelings and food records: how they are keyed, and what a new one looks like
+(shared by the single and batch create endpoints).
+
+Records are stored per user, under the user's id as partition key and
+<date>#<record id> as sort key:
+
+    user_id     date-id                     poop-id     poop_date     score ...
+    'default'   '2025-03-24#6f1c...'        '6f1c...'   '2025-03-24'  3
+
+so a user's records are one partition, read with a query in date order, and
+a date range is a range of sort keys. The record id is still what clients
+use; the by-id local secondary index turns it into the key with one strongly
+consistent query. An edit that changes the date changes the sort key, which
+update_record turns into a move.
+"""
+import math
+import uuid
+from collections import namedtuple
+from botocore.exceptions import ClientError
+from common.codec import deserialize_item, serialize_item
+from common.conditional import VERSION, conflict, item_version, update_clauses, versioned_update
+from common.fields import projection
+from common.http import ApiError, require_fields
+
+USER_KEY = 'user_id'
+SORT_KEY = 'date-id'
+
+# Local secondary index on (user_id, <record id>), projecting whole records
+ID_INDEX = 'by-id'
+
+# table: DynamoDB table, key: attribute holding the record id, record_type: stored
+# with every record, id_field: name of the id in requests and responses,
+# fields: required body fields (except DERIVED_FIELDS, which the API fills in),
+# date_field: the one of them that goes into the sort key
+RecordSchema = namedtuple('RecordSchema', ['table', 'key', 'record_type', 'id_field', 'fields', 'date_field'])
+
+POOP = RecordSchema(
+    table='poop_by_user',
+    key='poop-id',
+    record_type='poop',
+    id_field='poop_id',
+    fields=('time_of_day', 'score', 'poop_date'),
+    date_field='poop_date'
+)
+
+FEELING = RecordSchema(
+    table='feelings_by_user',
+    key='feeling-id',
+    record_type='feeling',
+    id_field='feeling_id',
+    fields=('feeling_score', 'stress_level', 'feeling_date'),
+    date_field='feeling_date'
+)
+
+FOOD_RECORD = RecordSchema(
+    table='food_records_by_user',
+    key='food-record-id',
+    record_type='food_record',
+    id_field='food_record_id',
+    fields=('record_date', 'ingredient_id', 'ingredient_name', 'portion_size', 'cooking_type', 'time_of_day'),
+    date_field='record_date'
+)
+
+# Stored as numbers; everything else the clients send is a string
+NUMERIC_FIELDS = ('score', 'feeling_score', 'stress_level')
+
+# Attributes of a food record that are copied from its ingredient, not sent by clients
+DERIVED_FIELDS = ('ingredient_name',)
+
+# Most records one batch request may create
+MAX_BATCH_SIZE = 100
+
+
+def sort_key(day, record_id):
+    return f'{day}#{record_id}'
+
+
+def record_key(user_id, day, record_id):
+    return {USER_KEY: {'S': user_id}, SORT_KEY: {'S': sort_key(day, record_id)}}
+
+
+def item_key(item):
+    """Primary key of a raw record"""
+    return {USER_KEY: item[USER_KEY], SORT_KEY: item[SORT_KEY]}
+
+
+def key_day(key):
+    return key[SORT_KEY]['S'].split('#', 1)[0]
+
+
+def key_record_id(key):
+    return key[SORT_KEY]['S'].split('#', 1)[1]
+
+
+def record_label(schema, record_id):
+    """How error messages name a record"""
+    return f"{schema.id_field} '{record_id}'"
+
+
+def check_date(schema, day):
+    # '#' separates the date from the id in the sort key
+    if not isinstance(day, str) or not day or '#' in day:
+        raise ApiError(400, f"{schema.date_field} must be a date like 2025-03-24")
+
+
+def check_value(field, value, numeric=NUMERIC_FIELDS):
+    """The value a body sent for a field, as it is stored; a 400 unless it is a number
+    (the `numeric` fields) or a string (the rest)"""
+    if field in numeric:
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value):
+            raise ApiError(400, f"{field} must be a number")
+        # 4.0 from JSON is stored as 4
+        return int(value) if isinstance(value, float) and value.is_integer() else value
+    if not isinstance(value, str):
+        raise ApiError(400, f"{field} must be a string")
+    return value
+
+
+def client_fields(schema):
+    """The fields of a record that clients send: all but the DERIVED_FIELDS"""
+    return tuple(field for field in schema.fields if field not in DERIVED_FIELDS)
+
+
+def new_record(schema, body, user_id):
+    """Validate a request body and return (new id, plain item ready for serialize_item).
+
+    Derived fields are left for the caller to fill in (see ingredients.denormalize_ingredient_names).
+    """
+    fields = client_fields(schema)
+    require_fields(body, *fields)
+    check_date(schema, body[schema.date_field])
+    # The same checks PUT and PATCH make: numbers for the scores and levels, strings for the rest
+    values = {field: check_value(field, body[field]) for field in fields}
+    record_id = str(uuid.uuid4())
+    item = {
+        USER_KEY: user_id,
+        SORT_KEY: sort_key(body[schema.date_field], record_id),
+        schema.key: record_id,
+        'record_type': schema.record_type,
+        # Updates are compare-and-set on version (see common/conditional.py)
+        'version': 1
+    }
+    item.update(values)
+    return record_id, item
+
+
+def find_record(dynamodb, schema, user_id, record_id, fields=None):
+    """The user's record with this id (raw item), or a 404; other users' records are never found.
+
+    With `fields` only those attributes are read (and the key and version, which
+    callers rely on).
+    """
+    query = {
+        'TableName': schema.table,
+        'IndexName': ID_INDEX,
+        'KeyConditionExpression': '#u = :u AND #i = :i',
+        'ExpressionAttributeNames': {'#u': USER_KEY, '#i': schema.key},
+        'ExpressionAttributeValues': {':u': {'S': user_id}, ':i': {'S': record_id}},
+        # Local indexes can be read consistently, so a record is found right after it was written
+        'ConsistentRead': True
+    }
+    query.update(projection(fields, USER_KEY, SORT_KEY, VERSION, names=query['ExpressionAttributeNames']))
+    items = dynamodb.query(**query)['Items']
+    if not items:
+        raise ApiError(404, f"No item found for {record_label(schema, record_id)}")
+    return items[0]
+
+
+def update_record(dynamodb, schema, key, changes, expected=None, return_values='UPDATED_NEW'):
+    """versioned_update of a record with plain {attribute: value} changes (None removes one).
+
+    A new date means a new sort key, which no update can write, so the record
+    is moved instead: read, then deleted and put back under the new key in one
+    transaction that only goes through if nobody wrote it in between. Either
+    way the result looks like the update_item response.
+    """
+    label = record_label(schema, key_record_id(key))
+    day = changes.get(schema.date_field)
+    if day is None or day == key_day(key):
+        sets, removes, names, values = update_clauses(changes)
+        return versioned_update(dynamodb, schema.table, key, sets, values, expected=expected, removes=removes,
+                                names=names, return_values=return_values, label=label)
+
+    check_date(schema, day)
+    old = dynamodb.get_item(TableName=schema.table, Key=key, ConsistentRead=True).get('Item')
+    if not old:
+        raise ApiError(404, f"No item found for {label}")
+    version = item_version(old)
+    if expected is not None and expected != version:
+        raise conflict(label, old, expected)
+
+    record = deserialize_item(old)
+    for attribute, value in changes.items():
+        if value is None:
+            record.pop(attribute, None)
+        else:
+            record[attribute] = value
+    record[SORT_KEY] = sort_key(day, record[schema.key])
+    record[VERSION] = version + 1
+
+    unchanged = {'ConditionExpression': 'attribute_not_exists(#v)', 'ExpressionAttributeNames': {'#v': VERSION}}
+    if version:
+        unchanged = {'ConditionExpression': '#v = :v', 'ExpressionAttributeNames': {'#v': VERSION},
+                     'ExpressionAttributeValues': {':v': {'N': str(version)}}}
+    try:
+        dynamodb.transact_write_items(TransactItems=[
+            {'Delete': {'TableName': schema.table, 'Key': key, **unchanged}},
+            {'Put': {'TableName': schema.table, 'Item': serialize_item(record)}}
+        ])
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise
+        raise ApiError(409, f"{label} was changed while it was being moved to {day}; read it again and retry")
+
+    if return_values == 'ALL_OLD':
+        return {'Attributes': old}
+    written = [attribute for attribute in changes if attribute in record]
+    return {'Attributes': serialize_item({attribute: record[attribute] for attribute in (*written, VERSION)})}
+
+
+def batch_bodies(items):
+    """Check the JSON array of records a batch request was sent with"""
+    if not isinstance(items, list) or not items:
+        raise ApiError(400, "Request body must be a non-empty array of records")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ApiError(400, f"A batch can create at most {MAX_BATCH_SIZE} records")
+    if not all(isinstance(item, dict) for item in items):
+        raise ApiError(400, "Every record in the batch must be a JSON object")
+    return items
+
+
+def new_records(schema, bodies, user_id):
+    """new_record for every body of a batch; nothing is returned unless all of them are valid"""
+    records = []
+    for i, body in enumerate(bodies):
+        try:
+            records.append(new_record(schema, body, user_id))
+        except ApiError as e:
+            raise ApiError(e.status_code, f"items[{i}]: {e.message}")
+    return records
@@ -0,0 +1,164 @@
+"""Per-user, per-day rollups of the log tables, kept up to date from their DynamoDB streams.
+
+A daily_rollups row (keyed by "<user_id>#<day>", see rollup_key) holds nothing but counters:
+
+    poop_count, poop_score_sum, poop_score=<n>
+    feeling_count, feeling_score_sum, feeling_score=<n>, stress_level_sum, stress_level=<n>
+    food_record_count, ingredient=<name>
+
+where <attribute>=<n> counts the records of the day with that value. Counters
+can all be maintained with ADD, so a record's contribution is added on insert,
+subtracted on delete and swapped on edit (old image out, new image in, which
+may touch two days). Min and max are read off the <attribute>=<n> counters
+rather than stored, so they stay right when the current extreme is deleted.
+"""
+from decimal import Decimal
+from common.codec import serialize_value
+from common.records import FEELING, FOOD_RECORD, POOP, USER_KEY
+
+ROLLUP_TABLE = 'daily_rollups'
+
+# Source table -> where a record's day is, what it is counted as and which
+# numeric attributes get a sum and a per-value counter
+SOURCES = {
+    POOP.table: {
+        'date': 'poop_date',
+        'count': 'poop_count',
+        'scores': {'score': 'poop_score'},
+    },
+    FEELING.table: {
+        'date': 'feeling_date',
+        'count': 'feeling_count',
+        'scores': {'feeling_score': 'feeling_score', 'stress_level': 'stress_level'},
+    },
+    FOOD_RECORD.table: {
+        'date': 'record_date',
+        'count': 'food_record_count',
+        'scores': {},
+    },
+}
+
+INGREDIENT_PREFIX = 'ingredient='
+
+
+def _is_number(value):
+    return isinstance(value, (int, Decimal)) and not isinstance(value, bool)
+
+
+def _value_key(value):
+    # 3, Decimal('3') and Decimal('3.0') must all land on the same counter
+    value = Decimal(value).normalize()
+    return str(int(value)) if value == value.to_integral_value() else str(value)
+
+
+def rollup_key(user_id, day):
+    return f'{user_id}#{day}'
+
+
+def contribution(table, record):
+    """The rollup row (user and day) a record belongs to and the counters it adds to it"""
+    source = SOURCES[table]
+    day = record.get(source['date'])
+    if not day or not record.get(USER_KEY):
+        return None, {}
+    counters = {source['count']: 1}
+    for attribute, name in source['scores'].items():
+        value = record.get(attribute)
+        if _is_number(value):
+            counters[f'{name}_sum'] = value
+            counters[f'{name}={_value_key(value)}'] = 1
+    if table == FOOD_RECORD.table and record.get('ingredient_name'):
+        counters[INGREDIENT_PREFIX + record['ingredient_name']] = 1
+    return rollup_key(record[USER_KEY], day), counters
+
+
+def record_deltas(table, old_image, new_image):
+    """Counter changes per rollup row (user and day) for one stream record.
+
+    old_image / new_image are the deserialized images (None when the record
+    did not exist before / does not exist after the change).
+    """
+    deltas = {}
+    for image, sign in ((old_image, -1), (new_image, 1)):
+        if not image:
+            continue
+        row_key, counters = contribution(table, image)
+        if row_key is None:
+            continue
+        row_deltas = deltas.setdefault(row_key, {})
+        for name, value in counters.items():
+            row_deltas[name] = row_deltas.get(name, 0) + sign * value
+    # An edit that did not touch anything summarised cancels out completely
+    deltas = {row_key: {name: value for name, value in counters.items() if value}
+              for row_key, counters in deltas.items()}
+    return {row_key: counters for row_key, counters in deltas.items() if counters}
+
+
+def rollup_update(row_key, counters):
+    """update_item arguments that ADD the counters to a rollup row"""
+    names, values, additions = {}, {}, []
+    for i, (name, value) in enumerate(sorted(counters.items())):
+        names[f'#c{i}'] = name
+        values[f':c{i}'] = serialize_value(value)
+        additions.append(f'#c{i} :c{i}')
+    return {
+        'TableName': ROLLUP_TABLE,
+        'Key': {'day': {'S': row_key}},
+        'UpdateExpression': 'ADD ' + ', '.join(additions),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+
+def _histogram(row, name):
+    prefix = f'{name}='
+    return {Decimal(key[len(prefix):]): count for key, count in row.items()
+            if key.startswith(prefix) and count > 0}
+
+
+def _plain(value):
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+def _stats(row, name):
+    histogram = _histogram(row, name)
+    count = sum(histogram.values())
+    if not count:
+        return None, None, None
+    mean = round(float(row.get(f'{name}_sum', 0)) / count, 2)
+    return mean, _plain(min(histogram)), _plain(max(histogram))
+
+
+def summarize(row):
+    """Turn a deserialized rollup row into the /summary/daily shape of one day"""
+    poop_mean, poop_min, poop_max = _stats(row, 'poop_score')
+    feeling_mean, feeling_min, feeling_max = _stats(row, 'feeling_score')
+    stress_mean, stress_min, stress_max = _stats(row, 'stress_level')
+    eaten = {key[len(INGREDIENT_PREFIX):]: count for key, count in row.items()
+             if key.startswith(INGREDIENT_PREFIX) and count > 0}
+    return {
+        'date': row['day'].rpartition('#')[2],
+        'poop': {
+            'count': row.get('poop_count', 0),
+            'mean_score': poop_mean,
+            'min_score': poop_min,
+            'max_score': poop_max
+        },
+        'feelings': {
+            'count': row.get('feeling_count', 0),
+            'mean_feeling_score': feeling_mean,
+            'min_feeling_score': feeling_min,
+            'max_feeling_score': feeling_max,
+            'mean_stress_level': stress_mean,
+            'min_stress_level': stress_min,
+            'max_stress_level': stress_max
+        },
+        # Most eaten first
+        'ingredients': sorted(eaten, key=lambda name: (-eaten[name], name)),
+        'food_record_count': row.get('food_record_count', 0)
+    }
+
+
+def is_empty(row):
+    """True for a day whose records have all been deleted again"""
+    return not any(row.get(source['count']) for source in SOURCES.values())
@@ -0,0 +1,63 @@
+"""Serve several endpoints from one Lambda function.
+
+The per-endpoint handlers stay where they are (poop/get.py,
+poop/{poop_id}/put.py, ...) and keep working, and being importable, as
+standalone functions. A Router walks that directory layout once per
+container and dispatches each API Gateway proxy event on its resource
+template and HTTP method, e.g. ("/poop/{poop_id}", "PUT") -> poop/{poop_id}/put.py,
+so one warm container answers every endpoint it was given.
+"""
+import importlib.util
+import logging
+import os
+from common.http import error_response
+
+logger = logging.getLogger()
+
+METHODS = ('get', 'post', 'put', 'patch', 'delete')
+
+
+def discover_routes(root, prefix=''):
+    """Map (resource template, HTTP method) to the handler file below root"""
+    routes = {}
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories if not name.startswith(('.', '__'))]
+        relative = os.path.relpath(directory, root)
+        resource = prefix if relative == '.' else f"{prefix}/{relative.replace(os.sep, '/')}"
+        for name in files:
+            method, extension = os.path.splitext(name)
+            if extension == '.py' and method in METHODS:
+                routes[(resource or '/', method.upper())] = os.path.join(directory, name)
+    return routes
+
+
+class Router:
+    """Dispatch proxy events to the handler modules found below root.
+
+    prefix is the resource path root corresponds to, e.g. '/poop' for the
+    poop directory or '' for the directory holding every resource.
+    """
+
+    def __init__(self, root, prefix=''):
+        self.routes = discover_routes(root, prefix)
+        self.resources = {resource for resource, _ in self.routes}
+        self._handlers = {}
+
+    def _load(self, route):
+        # Handlers are imported on first use so a cold start only pays for the endpoint it serves
+        if route not in self._handlers:
+            resource, method = route
+            spec = importlib.util.spec_from_file_location(f"route {method} {resource}", self.routes[route])
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self._handlers[route] = module.handler
+        return self._handlers[route]
+
+    def handler(self, event, context):
+        route = (event.get('resource'), (event.get('httpMethod') or '').upper())
+        if route not in self.routes:
+            logger.warning(f"No handler for {route[1]} {route[0]}")
+            if route[0] in self.resources:
+                return error_response(405, f"Method {route[1]} not allowed on {route[0]}")
+            return error_response(404, f"Unknown resource {route[0]}")
+        return self._load(route)(event, context)
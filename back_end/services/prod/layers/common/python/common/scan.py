@@ -0,0 +1,136 @@
+"""Full-table reads split into parallel scan segments.
+
+A plain scan reads one page after another, so reading a whole table takes
+as many round trips as it has pages. DynamoDB can split a scan into
+TotalSegments disjoint segments that are read independently; parallel_scan
+reads them from a thread pool and yields the items as they arrive:
+
+    for item in parallel_scan(dynamodb, 'ingredients', segments=8,
+                              projection=('ingredients-id', 'ingredient_name')):
+        ...
+
+Items come in no particular order. At most a few pages per segment are held
+in memory, however large the table; a consumer that stops early stops the
+workers after their current page. With read_capacity the segments together
+consume no more than that many read capacity units per second on average,
+so a maintenance job does not starve the API of a provisioned table.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common.dynamo import projection_kwargs
+
+# Segments used when the caller does not say; enough to hide the latency of
+# one page behind the others without needing more than the pooled connections
+DEFAULT_SEGMENTS = 8
+
+# Pages each segment may have waiting for the consumer
+PAGES_PER_SEGMENT = 2
+
+_DONE = object()
+
+
+class CapacityLimiter:
+    """Token bucket over consumed capacity units, shared by the segments.
+
+    A page's cost is only known once it is read, so readers pay afterwards
+    and wait out any debt before their next request.
+    """
+
+    def __init__(self, units_per_second, clock=time.monotonic, sleep=time.sleep):
+        self.rate = units_per_second
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = units_per_second
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        # At most one second of unused capacity is saved up
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def spend(self, units):
+        with self.lock:
+            self._refill()
+            self.tokens -= units
+
+    def wait(self):
+        while True:
+            with self.lock:
+                self._refill()
+                debt = -self.tokens
+            if debt <= 0:
+                return
+            self.sleep(debt / self.rate)
+
+
+def _scan_segment(dynamodb, pages, stop, limiter, scan_kwargs, segment, segments):
+    kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=segments)
+    try:
+        while not stop.is_set():
+            if limiter:
+                limiter.wait()
+            page = dynamodb.scan(**kwargs)
+            if limiter:
+                limiter.spend(page.get('ConsumedCapacity', {}).get('CapacityUnits', 0))
+            if not _put(pages, stop, page.get('Items', [])):
+                return
+            last_key = page.get('LastEvaluatedKey')
+            if not last_key:
+                return
+            kwargs['ExclusiveStartKey'] = last_key
+    except Exception as e:
+        _put(pages, stop, e)
+    finally:
+        _put(pages, stop, _DONE)
+
+
+def _put(pages, stop, value):
+    """Hand a value to the consumer unless it went away; returns whether it was handed over"""
+    while not stop.is_set():
+        try:
+            pages.put(value, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def parallel_scan(dynamodb, table, segments=DEFAULT_SEGMENTS, projection=None, read_capacity=None,
+                  **scan_kwargs):
+    """Yield every item of `table` (raw DynamoDB JSON), read in `segments` parallel segments.
+
+    projection: attribute names to read instead of whole items.
+    read_capacity: average read capacity units per second the scan may consume.
+    Other keyword arguments (FilterExpression, IndexName, ...) go to every scan request.
+    """
+    scan_kwargs['TableName'] = table
+    if projection:
+        scan_kwargs.update(projection_kwargs(projection, scan_kwargs.get('ExpressionAttributeNames')))
+    limiter = None
+    if read_capacity:
+        limiter = CapacityLimiter(read_capacity)
+        scan_kwargs['ReturnConsumedCapacity'] = 'TOTAL'
+
+    pages = queue.Queue(maxsize=segments * PAGES_PER_SEGMENT)
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=segments)
+    try:
+        for segment in range(segments):
+            pool.submit(_scan_segment, dynamodb, pages, stop, limiter, scan_kwargs, segment, segments)
+        running = segments
+        while running:
+            page = pages.get()
+            if page is _DONE:
+                running -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield from page
+    finally:
+        # Also reached when the consumer stops early or a segment failed
+        stop.set()
+        pool.shutdown(wait=True)
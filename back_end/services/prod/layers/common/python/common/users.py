@@ -0,0 +1,25 @@
+"""Whose data a request reads and writes.
+
+Poop, feelings and food records are stored per user, under the user's id as
+partition key. The id is the `sub` claim the API Gateway authorizer passes
+on (Cognito user pools; a Lambda authorizer's principalId works too). A
+deployment without an authorizer serves a single user, DEFAULT_USER_ID,
+which is also who the records from before per-user keys were migrated to.
+"""
+import os
+from common.http import ApiError
+
+DEFAULT_USER_ID = os.environ.get('DEFAULT_USER_ID', 'default')
+
+
+def user_id(event):
+    """The caller's user id; a 401 if the request went through an authorizer that did not name one"""
+    authorizer = (event.get('requestContext') or {}).get('authorizer')
+    if not authorizer:
+        return DEFAULT_USER_ID
+    # REST API user pool authorizers put the claims at the top, HTTP API JWT authorizers under jwt
+    claims = authorizer.get('claims') or (authorizer.get('jwt') or {}).get('claims') or {}
+    user = claims.get('sub') or authorizer.get('principalId')
+    if not user:
+        raise ApiError(401, "Unauthorized")
+    return user
@@ -0,0 +1,50 @@
+"""Version counters per collection (table), bumped on every write to it.
+
+A collection_versions row looks like
+
+    {'collection': 'ingredients', 'version': 42, 'updated_at': 1742811234567, 'deletions': 3}
+
+so a container holding data derived from a table can ask "has anything
+changed since version N?" with one GetItem instead of re-reading the table.
+deletions counts deletes separately because they leave nothing behind for
+an incremental refresh (by updated_at) to find.
+
+Tables stored per user count each user's records as a collection of their
+own (user_collection), so one user's writes leave everyone else's cached
+lists valid.
+"""
+import time
+
+VERSIONS_TABLE = 'collection_versions'
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def user_collection(table, user_id):
+    return f'{table}#{user_id}'
+
+
+def bump_version(dynamodb, collection, deleted=False):
+    """Record a write to `collection`; returns the new version number"""
+    update = 'ADD version :one, deletions :one SET updated_at = :now' if deleted else \
+        'ADD version :one SET updated_at = :now'
+    result = dynamodb.update_item(
+        TableName=VERSIONS_TABLE,
+        Key={'collection': {'S': collection}},
+        UpdateExpression=update,
+        ExpressionAttributeValues={':one': {'N': '1'}, ':now': {'N': str(now_ms())}},
+        ReturnValues='UPDATED_NEW'
+    )
+    return int(result['Attributes']['version']['N'])
+
+
+def current_version(dynamodb, collection):
+    """(version, updated_at, deletions) of a collection, all 0 before its first recorded write"""
+    item = dynamodb.get_item(
+        TableName=VERSIONS_TABLE,
+        Key={'collection': {'S': collection}},
+        ConsistentRead=True
+    ).get('Item', {})
+    return tuple(int(item[name]['N']) if name in item else 0 for name in ('version', 'updated_at', 'deletions'))
@@ -0,0 +1,147 @@
+"""One-off backfills for attributes that new indexes rely on.
+
+Usage:
+    python backfill.py ingredient-names [--dry-run]
+    python backfill.py daily-rollups [--dry-run] [--segments 8] [--read-capacity 100]
+    python backfill.py food-record-names
+
+Tables are read with parallel scans (see common/scan.py); --read-capacity
+caps the read capacity units per second they consume.
+"""
+import argparse
+import os
+import sys
+import boto3
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common.codec import deserialize_item, serialize_item  # noqa: E402
+from common.dynamo import CLIENT_CONFIG  # noqa: E402
+from common.ingredients import derived_attributes, normalize_name, rename_in_food_records  # noqa: E402
+from common.rollups import ROLLUP_TABLE, SOURCES, record_deltas  # noqa: E402
+from common.scan import DEFAULT_SEGMENTS, parallel_scan  # noqa: E402
+from common.versions import bump_version  # noqa: E402
+
+
+def backfill_ingredient_names(dynamodb, dry_run=False, segments=DEFAULT_SEGMENTS, read_capacity=None):
+    """Store normalized_name, record_type and updated_at on ingredients for the by-normalized-name
+    and by-updated-at indexes; warm search indexes pick the rows up as they do any other write"""
+    updated = 0
+    items = parallel_scan(
+        dynamodb,
+        'ingredients',
+        segments,
+        projection=('ingredients-id', 'ingredient_name'),
+        read_capacity=read_capacity,
+        FilterExpression='attribute_not_exists(normalized_name) OR attribute_not_exists(record_type) '
+                         'OR attribute_not_exists(updated_at)'
+    )
+    for item in items:
+        name = item.get('ingredient_name', {}).get('S', '')
+        if not normalize_name(name):
+            print(f"skipping {item['ingredients-id']['S']}: empty ingredient_name")
+            continue
+        if not dry_run:
+            derived = derived_attributes({'ingredient_name': name})
+            dynamodb.update_item(
+                TableName='ingredients',
+                Key={'ingredients-id': item['ingredients-id']},
+                UpdateExpression='SET normalized_name = :n, record_type = :t, updated_at = :u',
+                ConditionExpression='attribute_exists(#k)',
+                ExpressionAttributeNames={'#k': 'ingredients-id'},
+                ExpressionAttributeValues={':n': {'S': derived['normalized_name']},
+                                           ':t': {'S': derived['record_type']},
+                                           ':u': {'N': str(derived['updated_at'])}}
+            )
+        updated += 1
+    if updated and not dry_run:
+        bump_version(dynamodb, 'ingredients')
+    print(f"ingredients: {'would update' if dry_run else 'updated'} {updated} rows")
+
+
+def backfill_daily_rollups(dynamodb, dry_run=False, segments=DEFAULT_SEGMENTS, read_capacity=None):
+    """Rebuild daily_rollups from the log tables.
+
+    Rows are replaced with freshly computed counters, so changes the stream
+    applies while the rebuild is scanning can be lost; run it when the tables
+    are quiet (or run it again afterwards).
+    """
+    rollups = {}
+    for table in sorted(SOURCES):
+        for item in parallel_scan(dynamodb, table, segments, read_capacity=read_capacity):
+            for row_key, counters in record_deltas(table, None, deserialize_item(item)).items():
+                row = rollups.setdefault(row_key, {})
+                for name, value in counters.items():
+                    row[name] = row.get(name, 0) + value
+
+    # Days whose records are all gone (and rows keyed by the bare day, from
+    # before rollups were per user) would otherwise keep their old counters
+    rows = parallel_scan(dynamodb, ROLLUP_TABLE, segments, projection=('day',), read_capacity=read_capacity)
+    stale = [item['day'] for item in rows
+             if not item['day']['S'].startswith('event#') and item['day']['S'] not in rollups]
+
+    if not dry_run:
+        for row_key, counters in rollups.items():
+            dynamodb.put_item(TableName=ROLLUP_TABLE, Item=serialize_item({'day': row_key, **counters}))
+        for key in stale:
+            dynamodb.delete_item(TableName=ROLLUP_TABLE, Key={'day': key})
+    print(f"{ROLLUP_TABLE}: {'would write' if dry_run else 'wrote'} {len(rollups)} rows, "
+          f"{'would remove' if dry_run else 'removed'} {len(stale)}")
+
+
+def backfill_food_record_names(dynamodb, segments=DEFAULT_SEGMENTS, read_capacity=None):
+    """Give every food record its ingredient's current name, as the rename fan-out does"""
+    renamed = 0
+    ingredients = parallel_scan(
+        dynamodb,
+        'ingredients',
+        segments,
+        projection=('ingredients-id', 'ingredient_name'),
+        read_capacity=read_capacity
+    )
+    for item in ingredients:
+        if 'ingredient_name' in item:
+            renamed += rename_in_food_records(dynamodb, item['ingredients-id']['S'], item['ingredient_name']['S'])
+    print(f"food_records: updated {renamed} rows")
+
+
+def main():
+    # Connection options are accepted after any job name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--region', default='eu-central-1')
+    common.add_argument('--endpoint-url', help='e.g. http://localhost:8000 for DynamoDB Local')
+    common.add_argument('--dry-run', action='store_true', help='count the rows without writing')
+    common.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help='parallel scan segments')
+    common.add_argument('--read-capacity', type=float, help='read capacity units per second the scans may use')
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='job', required=True)
+
+    subparsers.add_parser(
+        'ingredient-names', parents=[common], help='populate normalized_name and updated_at for the ingredient indexes')
+    subparsers.add_parser(
+        'daily-rollups', parents=[common], help='rebuild the daily_rollups table from the log tables')
+    subparsers.add_parser(
+        'food-record-names', parents=[common], help="copy each ingredient's name to its food records")
+    args = parser.parse_args()
+
+    dynamodb = boto3.client(
+        'dynamodb',
+        region_name=args.region,
+        endpoint_url=args.endpoint_url,
+        # One pooled connection per segment, plus one for the main thread
+        config=CLIENT_CONFIG.merge(Config(max_pool_connections=args.segments + 1))
+    )
+    scan_options = {'segments': args.segments, 'read_capacity': args.read_capacity}
+
+    if args.job == 'ingredient-names':
+        backfill_ingredient_names(dynamodb, dry_run=args.dry_run, **scan_options)
+    elif args.job == 'daily-rollups':
+        backfill_daily_rollups(dynamodb, dry_run=args.dry_run, **scan_options)
+    elif args.job == 'food-record-names':
+        backfill_food_record_names(dynamodb, **scan_options)
+
+
+if __name__ == '__main__':
+    main()
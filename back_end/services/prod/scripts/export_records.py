@@ -0,0 +1,43 @@
+"""Export every table to a local gzipped NDJSON file, in the same format as POST /export.
+
+Usage:
+    python export_records.py export.ndjson.gz [--user-id <id>] [--segments 8] [--endpoint-url http://localhost:8000]
+
+Without --user-id the records of all users are exported.
+"""
+import argparse
+import os
+import sys
+import boto3
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common.dynamo import CLIENT_CONFIG  # noqa: E402
+from common.export import write_export  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--user-id', help="only export this user's records")
+    parser.add_argument('--segments', type=int, default=8, help='parallel scan segments per table')
+    parser.add_argument('--region', default='eu-central-1')
+    parser.add_argument('--endpoint-url', help='e.g. http://localhost:8000 for DynamoDB Local')
+    args = parser.parse_args()
+
+    dynamodb = boto3.client(
+        'dynamodb',
+        region_name=args.region,
+        endpoint_url=args.endpoint_url,
+        # One pooled connection per segment, plus one for the main thread
+        config=CLIENT_CONFIG.merge(Config(max_pool_connections=args.segments + 1))
+    )
+    with open(args.path, 'wb') as sink:
+        counts = write_export(dynamodb, sink, user_id=args.user_id, segments=args.segments)
+    for table, count in counts.items():
+        print(f"{table}: {count} records")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Stream a CSV or JSONL export into the poop, feelings or food_records table.
+
+Usage:
+    python import_records.py food_records meals.csv [--user-id <id>] [--workers 8] [--errors errors.jsonl] [--dry-run]
+    python import_records.py poop stools.jsonl
+    cat moods.csv | python import_records.py feelings - --format csv
+
+Rows are read one at a time and written in BatchWriteItem chunks of 25 by a
+pool of workers, so a file of any size imports in constant memory. Every row
+goes through the same validation as the POST endpoints; rows that fail it (or
+whose chunk cannot be written) are reported with their line number and the
+rest of the file is still imported. All rows are imported as the records of
+one user, --user-id (the single user of a deployment without sign-in by default).
+
+Food records may name their ingredient instead of giving its id: ingredient_name
+is looked up, normalized, in an index of the ingredients table built once at
+the start of the job. Either way the record stores the ingredient's own name.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import boto3
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common.codec import serialize_item  # noqa: E402
+from common.dynamo import BATCH_WRITE_SIZE, CLIENT_CONFIG, batch_write  # noqa: E402
+from common.http import ApiError  # noqa: E402
+from common.ingredients import INGREDIENTS_KEY, INGREDIENTS_TABLE, normalize_name  # noqa: E402
+from common.records import FEELING, FOOD_RECORD, NUMERIC_FIELDS, POOP, new_record  # noqa: E402
+from common.scan import parallel_scan  # noqa: E402
+from common.users import DEFAULT_USER_ID  # noqa: E402
+from common.versions import bump_version, user_collection  # noqa: E402
+
+SCHEMAS = {'poop': POOP, 'feelings': FEELING, 'food_records': FOOD_RECORD}
+
+# Print progress at most this often (seconds)
+PROGRESS_INTERVAL = 5
+
+
+class RowError(Exception):
+    pass
+
+
+def read_rows(stream, file_format):
+    """Yield (line number, row dict) without reading more than one line ahead"""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Blank cells mean "not given", as a missing JSON key would
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, RowError("not valid JSON")
+            continue
+        yield line_number, row if isinstance(row, dict) else RowError("not a JSON object")
+
+
+def ingredient_index(dynamodb, segments):
+    """Two lookups over every ingredient: normalized name -> (id, stored name) and id -> stored name"""
+    by_name, by_id = {}, {}
+    items = parallel_scan(dynamodb, INGREDIENTS_TABLE, segments, projection=(INGREDIENTS_KEY, 'ingredient_name'))
+    for item in items:
+        name = item.get('ingredient_name', {}).get('S')
+        if name:
+            by_name[normalize_name(name)] = (item[INGREDIENTS_KEY]['S'], name)
+            by_id[item[INGREDIENTS_KEY]['S']] = name
+    return by_name, by_id
+
+
+def to_number(value):
+    """A CSV cell as the number it spells; anything else is left for new_record to reject"""
+    if not isinstance(value, str):
+        return value
+    for parse in (int, float):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return value
+
+
+def prepare(schema, row, user_id, ingredients):
+    """Typed item for one row, or RowError explaining why it cannot be imported"""
+    # CSV only has strings; these are stored as numbers, like the API does
+    for field in NUMERIC_FIELDS:
+        if field in row:
+            row[field] = to_number(row[field])
+    name = None
+    if schema is FOOD_RECORD:
+        by_name, by_id = ingredients
+        if row.get('ingredient_id'):
+            if row['ingredient_id'] not in by_id:
+                raise RowError(f"unknown ingredient_id '{row['ingredient_id']}'")
+            name = by_id[row['ingredient_id']]
+        elif row.get('ingredient_name'):
+            found = by_name.get(normalize_name(row['ingredient_name']))
+            if not found:
+                raise RowError(f"unknown ingredient '{row['ingredient_name']}'")
+            row['ingredient_id'], name = found
+    try:
+        _, item = new_record(schema, row, user_id)
+    except ApiError as e:
+        raise RowError(e.message)
+    if name is not None:
+        # Records carry the ingredient's stored name, as the API writes them
+        item['ingredient_name'] = name
+    return serialize_item(item)
+
+
+class Importer:
+    """Reads rows, hands full chunks to the worker pool and keeps the tallies"""
+
+    def __init__(self, dynamodb, schema, user_id, workers, dry_run=False, errors=None):
+        self.dynamodb = dynamodb
+        self.schema = schema
+        self.user_id = user_id
+        self.workers = workers
+        self.dry_run = dry_run
+        self.errors = errors
+        self.read = self.written = self.failed = 0
+        self.started = time.monotonic()
+        self.last_progress = self.started
+
+    def fail(self, line_number, message):
+        self.failed += 1
+        if self.failed <= 20:
+            print(f"line {line_number}: {message}", file=sys.stderr)
+        if self.errors:
+            self.errors.write(json.dumps({'line': line_number, 'error': message}) + '\n')
+
+    def write_chunk(self, chunk):
+        if not self.dry_run:
+            batch_write(self.dynamodb, self.schema.table, [item for _, item in chunk])
+        return chunk
+
+    def collect(self, futures):
+        """Wait for at least one chunk in flight to finish and count the finished ones"""
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            chunk = futures.pop(future)
+            try:
+                future.result()
+                self.written += len(chunk)
+            except Exception as e:
+                for line_number, _ in chunk:
+                    self.fail(line_number, f"write failed: {e}")
+        now = time.monotonic()
+        if now - self.last_progress >= PROGRESS_INTERVAL:
+            self.last_progress = now
+            print(f"... {self.read} rows read, {self.written} written, {self.failed} failed, "
+                  f"{self.written / (now - self.started):.0f} rows/s", file=sys.stderr)
+
+    def run(self, rows, ingredients):
+        futures = {}
+        chunk = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for line_number, row in rows:
+                self.read += 1
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    chunk.append((line_number, prepare(self.schema, row, self.user_id, ingredients)))
+                except RowError as e:
+                    self.fail(line_number, str(e))
+                if len(chunk) == BATCH_WRITE_SIZE:
+                    # A couple of chunks queued per worker keeps them busy without buffering the file
+                    if len(futures) >= 2 * self.workers:
+                        self.collect(futures)
+                    futures[pool.submit(self.write_chunk, chunk)] = chunk
+                    chunk = []
+            if chunk:
+                futures[pool.submit(self.write_chunk, chunk)] = chunk
+            while futures:
+                self.collect(futures)
+
+        # Cached lists of the user's records are stale now
+        if self.written and not self.dry_run:
+            bump_version(self.dynamodb, user_collection(self.schema.table, self.user_id))
+
+        elapsed = time.monotonic() - self.started
+        print(f"{self.schema.table}: {self.read} rows read, "
+              f"{self.written} {'would be written' if self.dry_run else 'written'}, {self.failed} failed "
+              f"in {elapsed:.1f}s ({self.written / elapsed if elapsed else 0:.0f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('table', choices=sorted(SCHEMAS))
+    parser.add_argument('path', help="CSV or JSONL file, '-' for stdin")
+    parser.add_argument('--user-id', default=DEFAULT_USER_ID, help='whose records the rows are')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='defaults to the file extension')
+    parser.add_argument('--workers', type=int, default=4, help='parallel BatchWriteItem writers')
+    parser.add_argument('--errors', help='write every rejected row to this JSONL file')
+    parser.add_argument('--region', default='eu-central-1')
+    parser.add_argument('--endpoint-url', help='e.g. http://localhost:8000 for DynamoDB Local')
+    parser.add_argument('--dry-run', action='store_true', help='validate and count the rows without writing')
+    args = parser.parse_args()
+
+    file_format = args.format or ('csv' if args.path.lower().endswith('.csv') else 'jsonl')
+    if args.path == '-' and not args.format:
+        parser.error('--format is required when reading from stdin')
+
+    dynamodb = boto3.client(
+        'dynamodb',
+        region_name=args.region,
+        endpoint_url=args.endpoint_url,
+        # One pooled connection per writer (or scan segment), plus one for the main thread
+        config=CLIENT_CONFIG.merge(Config(max_pool_connections=args.workers + 1))
+    )
+    schema = SCHEMAS[args.table]
+    ingredients = ingredient_index(dynamodb, args.workers) if schema is FOOD_RECORD else None
+
+    stream = sys.stdin if args.path == '-' else open(args.path, newline='', encoding='utf-8')
+    errors = open(args.errors, 'w', encoding='utf-8') if args.errors else None
+    try:
+        importer = Importer(dynamodb, schema, args.user_id, args.workers, dry_run=args.dry_run, errors=errors)
+        importer.run(read_rows(stream, file_format), ingredients)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if errors:
+            errors.close()
+    sys.exit(1 if importer.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Copy the records of the pre-user tables (poop, feelings, food_records) into the per-user ones.
+
+Usage:
+    python migrate_user_keys.py [--table poop] [--user-id default] [--segments 8] [--read-capacity 100] [--dry-run]
+
+The old tables were keyed by record id alone and belong to the single user of
+a deployment without sign-in, --user-id. Each record is copied unchanged
+apart from its new key (user_id and <date>#<record id>, see common/records.py),
+so ids, versions and ETags stay valid. Each table is read in --segments
+parallel scan segments (see common/scan.py) and written by as many
+BatchWriteItem writers, and the copy can be run again: a record copied twice
+is just put twice. --read-capacity caps the read capacity units per second
+the scan consumes, for tables that also serve traffic.
+
+Records without a date cannot be keyed and are reported instead. The daily
+rollups of the new tables are filled in from their streams as the records
+arrive; `python backfill.py daily-rollups` afterwards removes the rows keyed
+by the bare day that the old tables' stream left behind.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from botocore.config import Config
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layers', 'common', 'python'))
+
+from common.dynamo import BATCH_WRITE_SIZE, CLIENT_CONFIG, batch_write  # noqa: E402
+from common.records import FEELING, FOOD_RECORD, POOP, SORT_KEY, USER_KEY, sort_key  # noqa: E402
+from common.scan import DEFAULT_SEGMENTS, parallel_scan  # noqa: E402
+from common.users import DEFAULT_USER_ID  # noqa: E402
+from common.versions import bump_version, user_collection  # noqa: E402
+
+# Old table -> the schema of the table its records move to
+LEGACY_TABLES = {'poop': POOP, 'feelings': FEELING, 'food_records': FOOD_RECORD}
+
+
+def new_item(schema, item, user_id):
+    """The record under its per-user key, or None if it has no date to key it by"""
+    day = item.get(schema.date_field, {}).get('S')
+    if not day or '#' in day:
+        return None
+    return {**item, USER_KEY: {'S': user_id}, SORT_KEY: {'S': sort_key(day, item[schema.key]['S'])}}
+
+
+def migrate_table(dynamodb, legacy_table, user_id, segments, read_capacity=None, dry_run=False):
+    """Copy one old table; returns (records copied, ids of records without a date)"""
+    schema = LEGACY_TABLES[legacy_table]
+    started = time.monotonic()
+    copied, undated, chunk, writes = 0, [], [], []
+
+    def write(chunk):
+        if not dry_run:
+            batch_write(dynamodb, schema.table, chunk)
+        return len(chunk)
+
+    # The segments are read in parallel; their items are written in
+    # BatchWriteItem chunks by as many writers
+    with ThreadPoolExecutor(max_workers=segments) as writers:
+        items = parallel_scan(dynamodb, legacy_table, segments, read_capacity=read_capacity)
+        for item in items:
+            migrated = new_item(schema, item, user_id)
+            if migrated is None:
+                undated.append(item[schema.key]['S'])
+                continue
+            chunk.append(migrated)
+            if len(chunk) == BATCH_WRITE_SIZE:
+                # A couple of chunks queued per writer keeps them busy without buffering the table
+                if len(writes) >= 2 * segments:
+                    copied += writes.pop(0).result()
+                writes.append(writers.submit(write, chunk))
+                chunk = []
+        if chunk:
+            writes.append(writers.submit(write, chunk))
+        copied += sum(future.result() for future in writes)
+
+    # Cached lists of the user's records are stale now
+    if copied and not dry_run:
+        bump_version(dynamodb, user_collection(schema.table, user_id))
+    for record_id in undated[:20]:
+        print(f"{legacy_table}: skipping {record_id}: no {schema.date_field}", file=sys.stderr)
+    print(f"{legacy_table} -> {schema.table}: {'would copy' if dry_run else 'copied'} {copied} records, "
+          f"skipped {len(undated)} in {time.monotonic() - started:.1f}s")
+    return copied, undated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--table', choices=sorted(LEGACY_TABLES), help='only migrate this table')
+    parser.add_argument('--user-id', default=DEFAULT_USER_ID, help='whose records the old tables hold')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS, help='parallel scan segments per table')
+    parser.add_argument('--read-capacity', type=float, help='read capacity units per second the scan may use')
+    parser.add_argument('--region', default='eu-central-1')
+    parser.add_argument('--endpoint-url', help='e.g. http://localhost:8000 for DynamoDB Local')
+    parser.add_argument('--dry-run', action='store_true', help='count the records without writing')
+    args = parser.parse_args()
+
+    dynamodb = boto3.client(
+        'dynamodb',
+        region_name=args.region,
+        endpoint_url=args.endpoint_url,
+        # One pooled connection per segment and per writer, plus one for the main thread
+        config=CLIENT_CONFIG.merge(Config(max_pool_connections=2 * args.segments + 1))
+    )
+    skipped = 0
+    for table in [args.table] if args.table else sorted(LEGACY_TABLES):
+        _, undated = migrate_table(dynamodb, table, args.user_id, args.segments,
+                                   read_capacity=args.read_capacity, dry_run=args.dry_run)
+        skipped += len(undated)
+    sys.exit(1 if skipped else 0)
+
+
+if __name__ == '__main__':
+    main()
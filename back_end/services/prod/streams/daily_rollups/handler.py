@@ -0,0 +1,73 @@
+"""Keep daily_rollups in step with the streams of the poop, feelings and food record tables.
+
+Every stream record is applied in one transaction together with a marker
+row for its eventID, so a batch that Lambda retries after a partial failure
+does not count the records it already applied a second time.
+"""
+import logging
+import time
+from botocore.exceptions import ClientError
+from common.codec import deserialize_item
+from common.dynamo import get_client
+from common.rollups import ROLLUP_TABLE, record_deltas, rollup_update
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+# Streams keep records for 24 hours, so a marker can never be needed for longer than that
+MARKER_TTL_SECONDS = 2 * 24 * 3600
+
+
+def source_table(record):
+    # arn:aws:dynamodb:<region>:<account>:table/<name>/stream/<label>
+    return record['eventSourceARN'].split('/')[1]
+
+
+def _image(images, name):
+    return deserialize_item(images[name]) if name in images else None
+
+
+def apply_record(record):
+    images = record['dynamodb']
+    deltas = record_deltas(source_table(record), _image(images, 'OldImage'), _image(images, 'NewImage'))
+    if not deltas:
+        return False
+
+    marker = {
+        'Put': {
+            'TableName': ROLLUP_TABLE,
+            'Item': {
+                'day': {'S': f"event#{record['eventID']}"},
+                'expires_at': {'N': str(int(time.time()) + MARKER_TTL_SECONDS)}
+            },
+            'ConditionExpression': 'attribute_not_exists(#d)',
+            'ExpressionAttributeNames': {'#d': 'day'}
+        }
+    }
+    updates = [{'Update': rollup_update(row_key, counters)} for row_key, counters in sorted(deltas.items())]
+    try:
+        dynamodb.transact_write_items(TransactItems=[marker, *updates])
+    except ClientError as e:
+        reasons = e.response.get('CancellationReasons') or [{}]
+        if reasons[0].get('Code') == 'ConditionalCheckFailed':
+            logger.info(f"{record['eventID']} was already applied")
+            return False
+        raise
+    return True
+
+
+def handler(event, context):
+    records = event.get('Records', [])
+    applied = 0
+    for record in records:
+        try:
+            applied += apply_record(record)
+        except Exception:
+            logger.exception(f"Could not apply {record.get('eventID')}")
+            # Records of a shard must be applied in order, so Lambda retries
+            # the batch from the first one that failed
+            return {'batchItemFailures': [{'itemIdentifier': record['dynamodb']['SequenceNumber']}]}
+    logger.info(f"Applied {applied} of {len(records)} stream records")
+    return {'batchItemFailures': []}
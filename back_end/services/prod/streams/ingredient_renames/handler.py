@@ -0,0 +1,41 @@
+"""Copy renamed ingredients' names to their food records, from the ingredients table stream.
+
+Food records keep their own copy of ingredient_name so lists never need a
+join; this keeps the copies in step. Running from the stream rather than
+inside PUT /ingredients/{ingredient_id} keeps that request fast however many
+records use the ingredient, and a failed fan-out is retried by Lambda. The
+rename is idempotent, so retries are harmless.
+"""
+import logging
+from common.codec import deserialize_item
+from common.dynamo import get_client
+from common.ingredients import INGREDIENTS_KEY, rename_in_food_records
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+dynamodb = get_client()
+
+
+def renamed_ingredient(record):
+    """(ingredient id, new name) when the stream record is a rename, else None"""
+    images = record['dynamodb']
+    if record['eventName'] != 'MODIFY':
+        return None
+    old, new = deserialize_item(images['OldImage']), deserialize_item(images['NewImage'])
+    if not new.get('ingredient_name') or old.get('ingredient_name') == new['ingredient_name']:
+        return None
+    return new[INGREDIENTS_KEY], new['ingredient_name']
+
+
+def handler(event, context):
+    for record in event.get('Records', []):
+        rename = renamed_ingredient(record)
+        if rename is None:
+            continue
+        try:
+            rename_in_food_records(dynamodb, *rename)
+        except Exception:
+            logger.exception(f"Could not apply rename of {rename[0]}")
+            return {'batchItemFailures': [{'itemIdentifier': record['dynamodb']['SequenceNumber']}]}
+    return {'batchItemFailures': []}
@@ -0,0 +1,120 @@
+"""Shared setup for the tests of the Python Lambdas: the common and analysis layers on the path,
+a mocked DynamoDB and a way to import a handler from its file, as the Lambda runtime does.
+
+    pip install -r tests/requirements.txt
+    python -m pytest -q tests
+"""
+import importlib.util
+import os
+import sys
+import boto3
+import pytest
+from moto import mock_aws
+
+PROD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, os.path.join(PROD_DIR, 'layers', 'common', 'python'))
+sys.path.insert(0, os.path.join(PROD_DIR, 'layers', 'analysis', 'python'))
+
+from common import dynamo, ingredient_index, ingredients  # noqa: E402
+from common.ingredients import INGREDIENT_INDEX  # noqa: E402
+from common.records import FEELING, FOOD_RECORD, ID_INDEX, POOP, SORT_KEY, USER_KEY  # noqa: E402
+from common.versions import VERSIONS_TABLE  # noqa: E402
+
+
+def load_module(relative_path):
+    """Import a handler file (handlers share file names, so each gets a name of its own)"""
+    name = 'test_' + relative_path.replace(os.sep, '_').replace('/', '_').removesuffix('.py')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(PROD_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def dynamodb(monkeypatch):
+    """A DynamoDB client against moto's in-memory DynamoDB, also handed out by common.dynamo.get_client()"""
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SECURITY_TOKEN', 'AWS_SESSION_TOKEN'):
+        monkeypatch.setenv(name, 'testing')
+    monkeypatch.delenv(dynamo.ENDPOINT_URL_ENV, raising=False)
+    with mock_aws():
+        client = boto3.client('dynamodb', region_name=dynamo.REGION)
+        monkeypatch.setattr(dynamo, '_client', client)
+        yield client
+
+
+@pytest.fixture
+def versions_table(dynamodb):
+    """collection_versions (lib/versions/Table.ts), which every write bumps"""
+    dynamodb.create_table(
+        TableName=VERSIONS_TABLE,
+        KeySchema=[{'AttributeName': 'collection', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'collection', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    return dynamodb
+
+
+@pytest.fixture
+def ingredients_table(versions_table, monkeypatch):
+    """The ingredients table with its name and updated_at indexes (lib/ingredients/Table.ts) and
+    collection_versions, and a container that has not read any ingredient yet"""
+    dynamodb = versions_table
+    index = ingredient_index.IngredientIndex()
+    monkeypatch.setattr(ingredient_index, '_index', index)
+    monkeypatch.setattr(ingredients, 'name_indexes', [index])
+    for cache in (ingredients.ingredient_cache, ingredients.ingredient_pages):
+        cache.clear()
+        monkeypatch.setattr(cache, 'checked_at', None)
+    dynamodb.create_table(
+        TableName='ingredients',
+        KeySchema=[{'AttributeName': 'ingredients-id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'ingredients-id', 'AttributeType': 'S'},
+            {'AttributeName': 'record_type', 'AttributeType': 'S'},
+            {'AttributeName': 'normalized_name', 'AttributeType': 'S'},
+            {'AttributeName': 'updated_at', 'AttributeType': 'N'}
+        ],
+        GlobalSecondaryIndexes=[
+            {'IndexName': 'by-normalized-name',
+             'KeySchema': [{'AttributeName': 'record_type', 'KeyType': 'HASH'},
+                           {'AttributeName': 'normalized_name', 'KeyType': 'RANGE'}],
+             'Projection': {'ProjectionType': 'ALL'}},
+            {'IndexName': 'by-updated-at',
+             'KeySchema': [{'AttributeName': 'record_type', 'KeyType': 'HASH'},
+                           {'AttributeName': 'updated_at', 'KeyType': 'RANGE'}],
+             'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': ['ingredient_name']}}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    return dynamodb
+
+
+@pytest.fixture
+def record_tables(versions_table):
+    """The per-user poop, feelings and food records tables (lib/<resource>/Table.ts) and collection_versions"""
+    dynamodb = versions_table
+    for schema in (POOP, FEELING, FOOD_RECORD):
+        attributes = [USER_KEY, SORT_KEY, schema.key] + (['ingredient_id'] if schema is FOOD_RECORD else [])
+        indexes = {}
+        if schema is FOOD_RECORD:
+            indexes['GlobalSecondaryIndexes'] = [
+                {'IndexName': INGREDIENT_INDEX,
+                 'KeySchema': [{'AttributeName': 'ingredient_id', 'KeyType': 'HASH'}],
+                 'Projection': {'ProjectionType': 'KEYS_ONLY'}}
+            ]
+        dynamodb.create_table(
+            TableName=schema.table,
+            KeySchema=[{'AttributeName': USER_KEY, 'KeyType': 'HASH'},
+                       {'AttributeName': SORT_KEY, 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[{'AttributeName': name, 'AttributeType': 'S'} for name in attributes],
+            LocalSecondaryIndexes=[
+                {'IndexName': ID_INDEX,
+                 'KeySchema': [{'AttributeName': USER_KEY, 'KeyType': 'HASH'},
+                               {'AttributeName': schema.key, 'KeyType': 'RANGE'}],
+                 'Projection': {'ProjectionType': 'ALL'}}
+            ],
+            BillingMode='PAY_PER_REQUEST',
+            **indexes
+        )
+    return dynamodb
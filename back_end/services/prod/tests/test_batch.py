@@ -0,0 +1,128 @@
+"""POST /<resource>/batch: many records validated together, then written in chunks"""
+import json
+import pytest
+from common import dynamo
+from common.codec import serialize_item
+from common.dynamo import batch_write
+from common.ingredients import INGREDIENTS_KEY, INGREDIENTS_TABLE
+from common.records import FOOD_RECORD, MAX_BATCH_SIZE, POOP, USER_KEY
+from common.versions import current_version, user_collection
+from conftest import load_module
+
+AUTHORIZED = {'requestContext': {'authorizer': {'claims': {'sub': 'u1'}}}}
+
+
+def poop(day=1, **fields):
+    return {'time_of_day': 'morning', 'score': 3, 'poop_date': f'2025-03-{day:02}', **fields}
+
+
+def send(handler, body):
+    result = handler.handler({'body': json.dumps(body), **AUTHORIZED}, None)
+    return result['statusCode'], json.loads(result['body'])
+
+
+def stored(dynamodb, schema, user='u1'):
+    return dynamodb.query(TableName=schema.table, KeyConditionExpression='#u = :u',
+                          ExpressionAttributeNames={'#u': USER_KEY},
+                          ExpressionAttributeValues={':u': {'S': user}})['Items']
+
+
+def test_every_record_is_written_and_ids_come_back_in_order(record_tables):
+    handler = load_module('lambdas/poop/batch/post.py')
+    bodies = [poop(day=day % 28 + 1, score=day % 5) for day in range(60)]
+
+    status, body = send(handler, bodies)
+
+    assert status == 200
+    items = {item[POOP.key]['S']: item for item in stored(record_tables, POOP)}
+    assert set(items) == set(body['poop_ids'])
+    assert [int(items[poop_id]['score']['N']) for poop_id in body['poop_ids']] == [day % 5 for day in range(60)]
+    # One version bump for the whole batch
+    assert current_version(record_tables, user_collection(POOP.table, 'u1'))[0] == 1
+
+
+def test_one_invalid_record_fails_the_batch_before_anything_is_written(record_tables):
+    handler = load_module('lambdas/poop/batch/post.py')
+
+    status, body = send(handler, [poop(), poop(), poop(score='three')])
+
+    assert status == 400
+    assert body['error'].startswith('items[2]: ')
+    assert stored(record_tables, POOP) == []
+
+
+@pytest.mark.parametrize('body, message', [
+    ([], "Request body must be a non-empty array of records"),
+    (poop(), "Request body must be a non-empty array of records"),
+    ([poop()] * (MAX_BATCH_SIZE + 1), f"A batch can create at most {MAX_BATCH_SIZE} records"),
+    ([poop(), 'poop'], "Every record in the batch must be a JSON object"),
+])
+def test_bodies_that_are_not_a_batch_are_refused(record_tables, body, message):
+    status, error = send(load_module('lambdas/poop/batch/post.py'), body)
+
+    assert (status, error['error']) == (400, message)
+
+
+@pytest.fixture
+def oats(ingredients_table, record_tables):
+    ingredients_table.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+        INGREDIENTS_KEY: 'i1', 'ingredient_name': 'oats', 'default_portion_size': 'small'
+    }))
+    return ingredients_table
+
+
+def food_record(ingredient_id='i1', **fields):
+    return {'record_date': '2025-03-24', 'ingredient_id': ingredient_id, 'portion_size': 'small',
+            'cooking_type': 'raw', 'time_of_day': 'morning', **fields}
+
+
+def test_food_records_take_the_stored_ingredient_name(oats):
+    status, _ = send(load_module('lambdas/food_records/batch/post.py'),
+                     [food_record(), food_record(ingredient_name='porridge')])
+
+    assert status == 200
+    assert [item['ingredient_name']['S'] for item in stored(oats, FOOD_RECORD)] == ['oats', 'oats']
+
+
+def test_food_records_of_unknown_ingredients_are_refused(oats):
+    status, body = send(load_module('lambdas/food_records/batch/post.py'), [food_record(), food_record('i9')])
+
+    assert (status, body['error']) == (400, "Unknown ingredient_id: i9")
+    assert stored(oats, FOOD_RECORD) == []
+
+
+class Throttled:
+    """A batch_write_item client that leaves the last item of each request unprocessed `times` times"""
+
+    def __init__(self, times):
+        self.times = times
+        self.requests = []
+
+    def batch_write_item(self, RequestItems):
+        self.requests.append(RequestItems)
+        (table, writes), = RequestItems.items()
+        if self.times:
+            self.times -= 1
+            return {'UnprocessedItems': {table: writes[-1:]}}
+        return {'UnprocessedItems': {}}
+
+
+def items(count):
+    return [{'n': {'N': str(n)}} for n in range(count)]
+
+
+def test_batch_write_sends_chunks_of_25_and_retries_unprocessed_items(monkeypatch):
+    monkeypatch.setattr(dynamo, 'backoff', lambda attempt: None)
+    client = Throttled(times=1)
+
+    batch_write(client, 'numbers', items(30))
+
+    assert [len(request['numbers']) for request in client.requests] == [25, 1, 5]
+    assert client.requests[1]['numbers'] == [{'PutRequest': {'Item': {'n': {'N': '24'}}}}]
+
+
+def test_batch_write_gives_up_on_items_that_stay_unprocessed(monkeypatch):
+    monkeypatch.setattr(dynamo, 'backoff', lambda attempt: None)
+
+    with pytest.raises(RuntimeError, match="numbers: items still unprocessed after 3 attempts"):
+        batch_write(Throttled(times=10), 'numbers', items(3), max_attempts=3)
@@ -0,0 +1,110 @@
+"""common.conditional: versions, If-Match compare-and-set and ETags"""
+import json
+import pytest
+from common.codec import serialize_item
+from common.conditional import expected_version, versioned_update
+from common.http import ApiError
+from common.ingredients import INGREDIENTS_KEY, INGREDIENTS_TABLE
+from conftest import load_module
+
+KEY = {INGREDIENTS_KEY: {'S': 'i1'}}
+
+
+@pytest.fixture
+def ingredient(ingredients_table):
+    ingredients_table.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+        INGREDIENTS_KEY: 'i1', 'ingredient_name': 'oats', 'default_portion_size': 'small', 'version': 3
+    }))
+    return ingredients_table
+
+
+def set_portion(dynamodb, portion, key=KEY, expected=None):
+    return versioned_update(dynamodb, INGREDIENTS_TABLE, key, ['default_portion_size = :p'],
+                            {':p': {'S': portion}}, expected=expected)
+
+
+def stored(dynamodb, key=KEY):
+    return dynamodb.get_item(TableName=INGREDIENTS_TABLE, Key=key).get('Item')
+
+
+def test_an_update_bumps_the_version(ingredient):
+    result = set_portion(ingredient, 'big', expected=3)
+
+    assert result['Attributes']['version'] == {'N': '4'}
+    assert stored(ingredient)['default_portion_size'] == {'S': 'big'}
+
+
+def test_a_stale_version_is_a_409_with_the_current_item(ingredient):
+    with pytest.raises(ApiError) as raised:
+        set_portion(ingredient, 'big', expected=2)
+
+    assert raised.value.status_code == 409
+    assert raised.value.headers == {'ETag': '"3"'}
+    assert raised.value.details['current']['default_portion_size'] == 'small'
+    assert stored(ingredient)['version'] == {'N': '3'}
+
+
+def test_an_update_of_a_missing_item_is_a_404_and_writes_nothing(ingredient):
+    ghost = {INGREDIENTS_KEY: {'S': 'missing'}}
+
+    with pytest.raises(ApiError) as raised:
+        set_portion(ingredient, 'big', key=ghost)
+
+    assert raised.value.status_code == 404
+    assert stored(ingredient, ghost) is None
+
+
+def test_items_from_before_versions_count_as_version_0(ingredient):
+    ingredient.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+        INGREDIENTS_KEY: 'old', 'ingredient_name': 'rice', 'default_portion_size': 'small'
+    }))
+    old = {INGREDIENTS_KEY: {'S': 'old'}}
+
+    with pytest.raises(ApiError):
+        set_portion(ingredient, 'big', key=old, expected=1)
+    assert set_portion(ingredient, 'big', key=old, expected=0)['Attributes']['version'] == {'N': '1'}
+
+
+@pytest.mark.parametrize('headers, body, version', [
+    ({}, {}, None),
+    ({'If-Match': '*'}, {}, None),
+    ({'If-Match': '"4"'}, {}, 4),
+    ({'if-match': 'W/"4"'}, {'version': 4}, 4),
+    ({}, {'version': 2}, 2),
+])
+def test_expected_version_reads_if_match_and_the_body(headers, body, version):
+    assert expected_version({'headers': headers}, body) == version
+
+
+@pytest.mark.parametrize('headers, body', [
+    ({'If-Match': '"1", "2"'}, {}),
+    ({'If-Match': 'abc'}, {}),
+    ({'If-Match': '"1"'}, {'version': 2}),
+    ({}, {'version': '2'}),
+    ({}, {'version': True}),
+])
+def test_conflicting_or_malformed_versions_are_refused(headers, body):
+    with pytest.raises(ApiError) as raised:
+        expected_version({'headers': headers}, body)
+
+    assert raised.value.status_code == 400
+
+
+def test_put_with_if_match_is_compare_and_set(ingredient):
+    put = load_module('lambdas/ingredients/{ingredient_id}/put.py')
+    get = load_module('lambdas/ingredients/{ingredient_id}/get.py')
+    path = {'ingredient_id': 'i1'}
+
+    def put_portion(portion, if_match):
+        body = json.dumps({'ingredient_name': 'oats', 'default_portion_size': portion, 'allow_similar': True})
+        return put.handler({'pathParameters': path, 'headers': {'If-Match': if_match}, 'body': body}, None)
+
+    etag = get.handler({'pathParameters': path}, None)['headers']['ETag']
+    first = put_portion('big', etag)
+    second = put_portion('normal', etag)
+    unchanged = get.handler({'pathParameters': path, 'headers': {'If-None-Match': first['headers']['ETag']}}, None)
+
+    assert (first['statusCode'], first['headers']['ETag']) == (200, '"4"')
+    assert second['statusCode'] == 409
+    assert json.loads(second['body'])['current']['default_portion_size'] == 'big'
+    assert unchanged['statusCode'] == 304
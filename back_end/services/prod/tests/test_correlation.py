@@ -0,0 +1,70 @@
+"""analysis.correlation: the vectorized statistics against a record-by-record computation"""
+import numpy as np
+import pytest
+from analysis.correlation import exposure_matrix, ingredient_effects, lagged_effects, shift
+
+NAN = np.nan
+
+
+def reference(exposed, outcome, lag):
+    """delta, correlation and exposed days of one ingredient, one day at a time"""
+    pairs = [(exposed[d], outcome[d + lag]) for d in range(len(outcome) - lag) if not np.isnan(outcome[d + lag])]
+    on = [y for x, y in pairs if x]
+    off = [y for x, y in pairs if not x]
+    if not on or not off:
+        return NAN, NAN, len(on)
+    x = np.array([float(x) for x, _ in pairs])
+    y = np.array([y for _, y in pairs])
+    return np.mean(on) - np.mean(off), np.corrcoef(x, y)[0, 1], len(on)
+
+
+def test_exposure_matrix_marks_each_ingredient_day():
+    exposure = exposure_matrix([0, 1, 1, 0], [0, 2, 2, 3], ingredients=2, days=4)
+
+    assert exposure.tolist() == [[True, False, False, True], [False, False, True, False]]
+
+
+def test_shift_looks_lag_days_ahead():
+    np.testing.assert_array_equal(shift(np.array([1.0, 2.0, 3.0]), 1), [2.0, 3.0, NAN])
+    np.testing.assert_array_equal(shift(np.array([1.0, 2.0, 3.0]), 0), [1.0, 2.0, 3.0])
+
+
+@pytest.mark.parametrize('lag', [0, 1, 2])
+def test_lagged_effects_match_the_day_by_day_computation(lag):
+    rng = np.random.default_rng(7)
+    exposure = rng.random((6, 60)) < 0.3
+    outcome = rng.integers(1, 6, 60).astype(float)
+    outcome[rng.random(60) < 0.2] = NAN
+
+    effects = lagged_effects(exposure, outcome, lag)
+
+    for i in range(len(exposure)):
+        delta, correlation, days = reference(exposure[i], outcome, lag)
+        assert effects['delta'][i] == pytest.approx(delta)
+        assert effects['correlation'][i] == pytest.approx(correlation)
+        assert effects['days'][i] == days
+
+
+def test_an_ingredient_eaten_every_day_or_never_has_no_effect():
+    exposure = np.array([[True, True, True, True], [False, False, False, False], [True, False, True, False]])
+    outcome = np.array([1.0, 4.0, 2.0, 5.0])
+
+    effects = lagged_effects(exposure, outcome, 0)
+
+    assert np.isnan(effects['delta'][:2]).all()
+    assert np.isnan(effects['correlation'][:2]).all()
+    assert effects['delta'][2] == pytest.approx(1.5 - 4.5)
+    assert effects['correlation'][2] == pytest.approx(-0.9486832980505138)
+    assert effects['days'].tolist() == [4, 0, 2]
+
+
+def test_a_food_followed_by_bad_days_correlates_at_its_lag():
+    # Eaten every third day; the score drops the day after
+    exposure = (np.arange(30) % 3 == 0)[np.newaxis, :]
+    outcome = np.where(np.roll(exposure[0], 1), 1.0, 4.0)
+
+    effects = ingredient_effects(exposure, {'score': outcome})['score']
+
+    assert effects[1]['correlation'][0] == pytest.approx(-1.0)
+    assert effects[1]['delta'][0] == pytest.approx(-3.0)
+    assert abs(effects[0]['correlation'][0]) < 0.6
@@ -0,0 +1,145 @@
+"""streams/daily_rollups: synthetic stream records in, rollup rows out"""
+import pytest
+from common.codec import deserialize_item, serialize_item
+from common.records import FEELING, FOOD_RECORD, POOP
+from common.rollups import ROLLUP_TABLE, is_empty, summarize
+from conftest import load_module
+
+USER = 'default'
+DAY = '2025-03-24'
+NEXT_DAY = '2025-03-25'
+
+
+@pytest.fixture
+def rollups(dynamodb):
+    dynamodb.create_table(
+        TableName=ROLLUP_TABLE,
+        KeySchema=[{'AttributeName': 'day', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'day', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    return load_module('streams/daily_rollups/handler.py')
+
+
+def stream_record(event_id, event_name, table, old=None, new=None, sequence_number='100'):
+    """A DynamoDB stream record (NEW_AND_OLD_IMAGES) as Lambda receives it"""
+    images = {'SequenceNumber': sequence_number}
+    if old is not None:
+        images['OldImage'] = serialize_item(old)
+    if new is not None:
+        images['NewImage'] = serialize_item(new)
+    return {
+        'eventID': event_id,
+        'eventName': event_name,
+        'eventSourceARN': f'arn:aws:dynamodb:eu-central-1:123456789012:table/{table}/stream/2025-03-24T00:00:00.000',
+        'dynamodb': images
+    }
+
+
+def poop(score, day=DAY, poop_id='p1'):
+    return {'user_id': USER, 'date-id': f'{day}#{poop_id}', 'poop-id': poop_id, 'poop_date': day,
+            'time_of_day': 'morning', 'score': score, 'version': 1}
+
+
+def rollup_row(dynamodb, day=DAY):
+    item = dynamodb.get_item(TableName=ROLLUP_TABLE, Key={'day': {'S': f'{USER}#{day}'}}).get('Item')
+    return deserialize_item(item) if item else None
+
+
+def test_insert_adds_the_record(rollups, dynamodb):
+    result = rollups.handler({'Records': [stream_record('e1', 'INSERT', POOP.table, new=poop(3))]}, None)
+
+    assert result == {'batchItemFailures': []}
+    row = rollup_row(dynamodb)
+    assert row['poop_count'] == 1
+    assert row['poop_score_sum'] == 3
+    assert row['poop_score=3'] == 1
+
+
+def test_modify_swaps_the_old_values_for_the_new(rollups, dynamodb):
+    rollups.handler({'Records': [
+        stream_record('e1', 'INSERT', POOP.table, new=poop(3)),
+        stream_record('e2', 'MODIFY', POOP.table, old=poop(3), new=poop(5))
+    ]}, None)
+
+    row = rollup_row(dynamodb)
+    assert row['poop_count'] == 1
+    assert row['poop_score_sum'] == 5
+    assert row['poop_score=3'] == 0
+    assert row['poop_score=5'] == 1
+    assert summarize(row)['poop'] == {'count': 1, 'mean_score': 5.0, 'min_score': 5, 'max_score': 5}
+
+
+def test_modify_of_the_date_moves_the_record_to_the_other_day(rollups, dynamodb):
+    rollups.handler({'Records': [
+        stream_record('e1', 'INSERT', POOP.table, new=poop(3)),
+        stream_record('e2', 'MODIFY', POOP.table, old=poop(3), new=poop(3, day=NEXT_DAY))
+    ]}, None)
+
+    assert is_empty(rollup_row(dynamodb))
+    moved = rollup_row(dynamodb, NEXT_DAY)
+    assert moved['poop_count'] == 1
+    assert moved['poop_score=3'] == 1
+
+
+def test_modify_of_unsummarized_fields_writes_nothing(rollups, dynamodb):
+    edited = {**poop(3), 'time_of_day': 'evening', 'version': 2}
+    rollups.handler({'Records': [stream_record('e1', 'MODIFY', POOP.table, old=poop(3), new=edited)]}, None)
+
+    assert rollup_row(dynamodb) is None
+
+
+def test_remove_takes_the_record_out_again(rollups, dynamodb):
+    rollups.handler({'Records': [
+        stream_record('e1', 'INSERT', POOP.table, new=poop(3)),
+        stream_record('e2', 'INSERT', POOP.table, new=poop(4, poop_id='p2')),
+        stream_record('e3', 'REMOVE', POOP.table, old=poop(3))
+    ]}, None)
+
+    row = rollup_row(dynamodb)
+    assert row['poop_count'] == 1
+    assert row['poop_score_sum'] == 4
+    assert summarize(row)['poop']['min_score'] == 4
+
+
+def test_a_redelivered_record_is_counted_once(rollups, dynamodb):
+    record = stream_record('e1', 'INSERT', POOP.table, new=poop(3))
+
+    rollups.handler({'Records': [record]}, None)
+    # Lambda retries a batch from the record that failed, so records before it come again
+    result = rollups.handler({'Records': [record, stream_record('e2', 'INSERT', POOP.table, new=poop(4, poop_id='p2'))]},
+                             None)
+
+    assert result == {'batchItemFailures': []}
+    row = rollup_row(dynamodb)
+    assert row['poop_count'] == 2
+    assert row['poop_score_sum'] == 7
+
+
+def test_feelings_and_food_records_share_the_day(rollups, dynamodb):
+    feeling = {'user_id': USER, 'date-id': f'{DAY}#f1', 'feeling-id': 'f1', 'feeling_date': DAY,
+               'feeling_score': 4, 'stress_level': 2}
+    food_record = {'user_id': USER, 'date-id': f'{DAY}#r1', 'food-record-id': 'r1', 'record_date': DAY,
+                   'ingredient_id': 'i1', 'ingredient_name': 'oats'}
+    rollups.handler({'Records': [
+        stream_record('e1', 'INSERT', FEELING.table, new=feeling),
+        stream_record('e2', 'INSERT', FOOD_RECORD.table, new=food_record)
+    ]}, None)
+
+    summary = summarize(rollup_row(dynamodb))
+    assert summary['feelings']['mean_feeling_score'] == 4.0
+    assert summary['feelings']['max_stress_level'] == 2
+    assert summary['ingredients'] == ['oats']
+    assert summary['food_record_count'] == 1
+
+
+def test_a_failed_record_is_retried_from_its_sequence_number(rollups, dynamodb):
+    result = rollups.handler({'Records': [
+        stream_record('e1', 'INSERT', POOP.table, new=poop(3), sequence_number='100'),
+        stream_record('e2', 'INSERT', 'unknown_table', new=poop(4), sequence_number='200'),
+        stream_record('e3', 'INSERT', POOP.table, new=poop(5, poop_id='p3'), sequence_number='300')
+    ]}, None)
+
+    assert result == {'batchItemFailures': [{'itemIdentifier': '200'}]}
+    # Nothing after the failed record is applied; the retry starts there
+    assert rollup_row(dynamodb)['poop_count'] == 1
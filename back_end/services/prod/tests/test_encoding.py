@@ -0,0 +1,29 @@
+"""common.encoding: which requests get a binary (base64 encoded) body"""
+import base64
+import gzip
+import json
+import pytest
+from common.encoding import list_response
+
+ITEMS = [{'poop-id': str(i), 'time_of_day': 'morning', 'score': 3} for i in range(50)]
+
+
+def list_body(headers):
+    return list_response({'headers': headers}, ITEMS, None)
+
+
+@pytest.mark.parametrize('accept', [None, 'application/json', '*/*', 'application/json, application/gzip'])
+def test_requests_api_gateway_would_not_decode_get_plain_json(accept):
+    result = list_body({'Accept': accept, 'Accept-Encoding': 'gzip'} if accept else {'Accept-Encoding': 'gzip'})
+
+    assert not result.get('isBase64Encoded')
+    assert 'Content-Encoding' not in result['headers']
+    assert json.loads(result['body'])['items'] == ITEMS
+
+
+def test_accept_starting_with_gzip_gets_compressed_json():
+    result = list_body({'Accept': 'application/gzip, application/json', 'Accept-Encoding': 'gzip'})
+
+    assert result['isBase64Encoded']
+    assert result['headers']['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(base64.b64decode(result['body'])))['items'] == ITEMS
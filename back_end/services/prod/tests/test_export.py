@@ -0,0 +1,47 @@
+"""common.export: what a user's (or everyone's) export file holds"""
+import gzip
+import io
+import json
+import pytest
+from common.codec import serialize_item
+from common.export import write_export
+from common.fields import INTERNAL_ATTRIBUTES
+from common.ingredients import INGREDIENTS_TABLE, derived_attributes
+from common.records import FEELING, POOP, new_record
+
+
+@pytest.fixture
+def tables(ingredients_table, record_tables):
+    dynamodb = record_tables
+    for user, score in (('u1', 3), ('u2', 5)):
+        _, item = new_record(POOP, {'time_of_day': 'morning', 'score': score, 'poop_date': '2025-03-24'}, user)
+        dynamodb.put_item(TableName=POOP.table, Item=serialize_item(item))
+    oats = {'ingredients-id': 'i1', 'ingredient_name': 'oats', 'default_portion_size': 'small', 'version': 1,
+            **derived_attributes({'ingredient_name': 'oats'})}
+    dynamodb.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item(oats))
+    return dynamodb
+
+
+def export_lines(dynamodb, **kwargs):
+    sink = io.BytesIO()
+    counts = write_export(dynamodb, sink, **kwargs)
+    return counts, [json.loads(line) for line in gzip.decompress(sink.getvalue()).splitlines()]
+
+
+def test_a_user_export_holds_their_records_and_the_ingredients(tables):
+    counts, lines = export_lines(tables, user_id='u1')
+
+    assert counts == {INGREDIENTS_TABLE: 1, 'food_records_by_user': 0, POOP.table: 1, FEELING.table: 0}
+    assert [line['table'] for line in lines] == [INGREDIENTS_TABLE, POOP.table]
+    assert lines[1]['item']['score'] == 3
+    assert set(lines[0]['item']) == {'ingredients-id', 'ingredient_name', 'default_portion_size', 'version'}
+    assert set(lines[1]['item']) == {'poop-id', 'poop_date', 'time_of_day', 'score', 'version'}
+    assert all('user_id' not in line for line in lines)
+
+
+def test_an_export_of_all_users_names_each_record_owner(tables):
+    _, lines = export_lines(tables)
+
+    poop = sorted((line['user_id'], line['item']['score']) for line in lines if line['table'] == POOP.table)
+    assert poop == [('u1', 3), ('u2', 5)]
+    assert not any(set(line['item']) & INTERNAL_ATTRIBUTES for line in lines)
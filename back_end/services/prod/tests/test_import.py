@@ -0,0 +1,98 @@
+"""scripts/import_records.py: CSV and JSONL files streamed into a user's records"""
+import io
+import json
+import pytest
+from common.codec import serialize_item
+from common.ingredients import INGREDIENTS_KEY, INGREDIENTS_TABLE
+from common.records import FOOD_RECORD, POOP, USER_KEY
+from common.versions import current_version, user_collection
+from conftest import load_module
+
+
+@pytest.fixture(scope='module')
+def importer():
+    return load_module('scripts/import_records.py')
+
+
+def run(importer, dynamodb, schema, text, file_format, ingredients=None, **kwargs):
+    errors = io.StringIO()
+    job = importer.Importer(dynamodb, schema, 'u1', workers=2, errors=errors, **kwargs)
+    job.run(importer.read_rows(io.StringIO(text), file_format), ingredients)
+    return job, [json.loads(line) for line in errors.getvalue().splitlines()]
+
+
+def stored(dynamodb, schema):
+    return dynamodb.query(TableName=schema.table, KeyConditionExpression='#u = :u',
+                          ExpressionAttributeNames={'#u': USER_KEY},
+                          ExpressionAttributeValues={':u': {'S': 'u1'}})['Items']
+
+
+def test_csv_rows_are_typed_like_the_api_types_them(importer, record_tables):
+    text = 'poop_date,time_of_day,score\n2025-03-24,morning,3\n2025-03-25,evening,\n'
+
+    job, errors = run(importer, record_tables, POOP, text, 'csv')
+
+    assert (job.read, job.written, job.failed) == (2, 1, 1)
+    # The blank score is missing, and the header is line 1
+    assert errors == [{'line': 3, 'error': "Missing required fields: score"}]
+    [item] = stored(record_tables, POOP)
+    assert item['score'] == {'N': '3'}
+
+
+def test_bad_lines_are_reported_and_the_rest_is_imported(importer, record_tables):
+    good = json.dumps({'poop_date': '2025-03-24', 'time_of_day': 'morning', 'score': 3})
+    lines = [good] * 30 + ['{not json', '', '["a list"]', json.dumps({'poop_date': '2025-03-24'})] + [good] * 30
+
+    job, errors = run(importer, record_tables, POOP, '\n'.join(lines), 'jsonl')
+
+    assert (job.read, job.written, job.failed) == (63, 60, 3)
+    assert [error['line'] for error in errors] == [31, 33, 34]
+    assert errors[:2] == [{'line': 31, 'error': "not valid JSON"}, {'line': 33, 'error': "not a JSON object"}]
+    assert len(stored(record_tables, POOP)) == 60
+    assert current_version(record_tables, user_collection(POOP.table, 'u1'))[0] == 1
+
+
+def test_a_dry_run_writes_nothing(importer, record_tables):
+    text = json.dumps({'poop_date': '2025-03-24', 'time_of_day': 'morning', 'score': 3})
+
+    job, _ = run(importer, record_tables, POOP, text, 'jsonl', dry_run=True)
+
+    assert job.written == 1
+    assert stored(record_tables, POOP) == []
+    assert current_version(record_tables, user_collection(POOP.table, 'u1'))[0] == 0
+
+
+def test_food_records_find_their_ingredient_by_id_or_name(importer, ingredients_table, record_tables):
+    for ingredient_id, name in (('i1', 'Rolled Oats'), ('i2', 'rice')):
+        ingredients_table.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+            INGREDIENTS_KEY: ingredient_id, 'ingredient_name': name
+        }))
+    text = ('record_date,ingredient_id,ingredient_name,portion_size,cooking_type,time_of_day\n'
+            '2025-03-24,,rolled  oats,small,raw,morning\n'
+            '2025-03-24,i2,whatever,big,boiled,evening\n'
+            '2025-03-24,i9,,big,boiled,evening\n'
+            '2025-03-24,,barley,big,boiled,evening\n')
+
+    job, errors = run(importer, record_tables, FOOD_RECORD, text, 'csv',
+                      ingredients=importer.ingredient_index(record_tables, segments=2))
+
+    assert errors == [{'line': 4, 'error': "unknown ingredient_id 'i9'"},
+                      {'line': 5, 'error': "unknown ingredient 'barley'"}]
+    records = {item['ingredient_id']['S']: item['ingredient_name']['S'] for item in stored(record_tables, FOOD_RECORD)}
+    assert records == {'i1': 'Rolled Oats', 'i2': 'rice'}
+
+
+def test_a_chunk_that_cannot_be_written_fails_its_rows(importer, record_tables, monkeypatch):
+    def write_chunk(chunk):
+        if chunk[0][0] == 1:
+            raise RuntimeError("throttled")
+        return chunk
+    text = '\n'.join(json.dumps({'poop_date': '2025-03-24', 'time_of_day': 'morning', 'score': 3})
+                     for _ in range(30))
+
+    job = importer.Importer(record_tables, POOP, 'u1', workers=2)
+    monkeypatch.setattr(job, 'write_chunk', write_chunk)
+    job.run(importer.read_rows(io.StringIO(text), 'jsonl'), None)
+
+    # The first chunk of 25 failed, the other 5 rows were written
+    assert (job.written, job.failed) == (5, 25)
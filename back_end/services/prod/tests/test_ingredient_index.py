@@ -0,0 +1,123 @@
+"""common.ingredient_index: ingredient search and look-alikes, answered from the container's index"""
+import json
+import pytest
+from common.codec import serialize_item
+from common.ingredient_index import UPDATED_INDEX, get_ingredient_index
+from common.ingredients import INGREDIENTS_TABLE
+from common.versions import bump_version, current_version, now_ms
+from conftest import load_module
+
+
+@pytest.fixture
+def api(ingredients_table):
+    """The ingredient endpoints, all in one container (as with the api router)"""
+    return {
+        'post': load_module('lambdas/ingredients/post.py'),
+        'put': load_module('lambdas/ingredients/{ingredient_id}/put.py'),
+        'patch': load_module('lambdas/ingredients/{ingredient_id}/patch.py'),
+        'delete': load_module('lambdas/ingredients/{ingredient_id}/delete.py'),
+        'search': load_module('lambdas/ingredients/search/get.py'),
+        'similar': load_module('lambdas/ingredients/similar/get.py')
+    }
+
+
+def create(api, name):
+    result = api['post'].handler({'body': json.dumps({'ingredient_name': name, 'default_portion_size': 'small'})}, None)
+    assert result['statusCode'] == 200, result['body']
+    return json.loads(result['body'])['ingredient_id']
+
+
+def search(api, query):
+    result = api['search'].handler({'queryStringParameters': {'q': query}}, None)
+    return [item['ingredient_name'] for item in json.loads(result['body'])['items']]
+
+
+def edit(api, method, ingredient_id, body):
+    result = api[method].handler({'pathParameters': {'ingredient_id': ingredient_id}, 'body': json.dumps(body)}, None)
+    assert result['statusCode'] == 200, result['body']
+
+
+def test_search_matches_normalized_prefixes(api):
+    create(api, 'Greek yogurt')
+    create(api, 'green beans')
+    create(api, 'oats')
+
+    assert search(api, 'gre') == ['greek yogurt', 'green beans']
+    assert search(api, 'Greek-Y') == ['greek yogurt']
+    assert search(api, 'rice') == []
+
+
+def test_search_finds_an_ingredient_as_soon_as_it_is_created(api):
+    create(api, 'oats')
+    # The index is built and will not check for writes for a while
+    assert search(api, 'gr') == []
+
+    create(api, 'Greek yogurt')
+
+    assert search(api, 'gr') == ['greek yogurt']
+
+
+def test_search_follows_renames_at_once(api):
+    oats = create(api, 'oats')
+    assert search(api, 'oa') == ['oats']
+
+    edit(api, 'patch', oats, {'ingredient_name': 'Rolled oats'})
+    assert search(api, 'oa') == []
+    assert search(api, 'ro') == ['rolled oats']
+
+    edit(api, 'put', oats, {'ingredient_name': 'porridge oats', 'default_portion_size': 'big'})
+    assert search(api, 'ro') == []
+    assert search(api, 'po') == ['porridge oats']
+
+
+def test_a_deleted_ingredient_is_gone_at_once(api):
+    yogurt = create(api, 'Greek yogurt')
+    assert search(api, 'gr') == ['greek yogurt']
+
+    api['delete'].handler({'pathParameters': {'ingredient_id': yogurt}}, None)
+
+    assert search(api, 'gr') == []
+    similar = api['similar'].handler({'queryStringParameters': {'name': 'greek yoghurt'}}, None)
+    assert json.loads(similar['body'])['items'] == []
+
+
+
+def test_refresh_rebuilds_while_the_updated_at_index_does_not_exist(api, ingredients_table):
+    create(api, 'oats')
+    assert search(api, 'gr') == []
+    # As between the deploy that adds by-normalized-name and the one that adds by-updated-at
+    ingredients_table.update_table(TableName=INGREDIENTS_TABLE,
+                                   GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': UPDATED_INDEX}}])
+    # Written by another container
+    ingredients_table.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+        'ingredients-id': 'elsewhere', 'ingredient_name': 'greek yogurt', 'normalized_name': 'greekyogurt',
+        'record_type': 'ingredient', 'default_portion_size': 'small', 'updated_at': now_ms(), 'version': 1
+    }))
+    bump_version(ingredients_table, INGREDIENTS_TABLE)
+
+    assert get_ingredient_index(ingredients_table, exact=True).search('gr', limit=10) == [
+        {'ingredient_id': 'elsewhere', 'ingredient_name': 'greek yogurt'}]
+
+
+def test_deleting_an_unknown_ingredient_is_a_404_that_changes_nothing(api, ingredients_table):
+    create(api, 'oats')
+    version = current_version(ingredients_table, INGREDIENTS_TABLE)
+
+    result = api['delete'].handler({'pathParameters': {'ingredient_id': 'missing'}}, None)
+
+    assert result['statusCode'] == 404
+    assert current_version(ingredients_table, INGREDIENTS_TABLE) == version
+
+
+def test_backfilled_ingredients_reach_warm_indexes(api, ingredients_table):
+    create(api, 'oats')
+    assert search(api, 'gr') == []
+    # From before ingredients had normalized_name, record_type and updated_at
+    ingredients_table.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+        'ingredients-id': 'old', 'ingredient_name': 'greek yogurt', 'default_portion_size': 'small'
+    }))
+
+    load_module('scripts/backfill.py').backfill_ingredient_names(ingredients_table, segments=1)
+
+    assert get_ingredient_index(ingredients_table, exact=True).search('gr', limit=10) == [
+        {'ingredient_id': 'old', 'ingredient_name': 'greek yogurt'}]
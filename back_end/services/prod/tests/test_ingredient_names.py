@@ -0,0 +1,101 @@
+"""common.ingredient_names: the duplicate checks of ingredient POST, PUT and PATCH"""
+import json
+import pytest
+from common.codec import serialize_item
+from common.ingredients import INGREDIENTS_TABLE
+from common.versions import bump_version, now_ms
+from conftest import load_module
+
+
+@pytest.fixture
+def post(ingredients_table):
+    return load_module('lambdas/ingredients/post.py')
+
+
+@pytest.fixture
+def patch(ingredients_table):
+    return load_module('lambdas/ingredients/{ingredient_id}/patch.py')
+
+
+def create(post, name, **fields):
+    body = {'ingredient_name': name, 'default_portion_size': 'small', **fields}
+    result = post.handler({'body': json.dumps(body)}, None)
+    return result['statusCode'], json.loads(result['body'])
+
+
+def rename(patch, ingredient_id, name, **fields):
+    body = {'ingredient_name': name, **fields}
+    result = patch.handler({'pathParameters': {'ingredient_id': ingredient_id}, 'body': json.dumps(body)}, None)
+    return result['statusCode'], json.loads(result['body'])
+
+
+def test_names_are_stored_trimmed_and_lowercased(post, ingredients_table):
+    status, body = create(post, '  Greek Yogurt ')
+
+    assert status == 200
+    item = ingredients_table.get_item(TableName=INGREDIENTS_TABLE,
+                                      Key={'ingredients-id': {'S': body['ingredient_id']}})['Item']
+    assert item['ingredient_name'] == {'S': 'greek yogurt'}
+    assert item['normalized_name'] == {'S': 'greekyogurt'}
+
+
+@pytest.mark.parametrize('name', ['greek yogurt', 'Greek-Yogurt', 'greek', 'greek yogurt light'])
+def test_equal_prefix_and_extended_names_are_refused(post, name):
+    create(post, 'Greek yogurt')
+
+    status, body = create(post, name)
+
+    assert status == 400
+    assert body['error'] == f"Ingredient '{name}' already exists."
+
+
+def test_a_near_duplicate_is_refused_right_after_the_original(post):
+    create(post, 'Greek yogurt')
+
+    status, body = create(post, 'greek yoghurt')
+
+    assert status == 400
+    assert [match['ingredient_name'] for match in body['similar']] == ['greek yogurt']
+
+
+def test_a_near_duplicate_of_what_another_container_just_wrote_is_refused(post, ingredients_table):
+    create(post, 'oats')
+    # Written (and the version bumped) by another container since this one built its index
+    ingredients_table.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+        'ingredients-id': 'elsewhere', 'ingredient_name': 'greek yogurt', 'normalized_name': 'greekyogurt',
+        'record_type': 'ingredient', 'default_portion_size': 'small', 'updated_at': now_ms(), 'version': 1
+    }))
+    bump_version(ingredients_table, INGREDIENTS_TABLE)
+
+    status, body = create(post, 'greek yoghurt')
+
+    assert status == 400
+    assert body['similar'][0]['ingredient_id'] == 'elsewhere'
+
+
+def test_allow_similar_lets_a_near_duplicate_through(post):
+    create(post, 'Greek yogurt')
+
+    status, _ = create(post, 'greek yoghurt', allow_similar=True)
+
+    assert status == 200
+
+
+def test_a_rename_is_checked_against_the_other_ingredients_only(post, patch):
+    _, oats = create(post, 'oats')
+    create(post, 'brown rice')
+
+    assert rename(patch, oats['ingredient_id'], 'OATS')[0] == 200
+    assert rename(patch, oats['ingredient_id'], 'Brown-Rice')[0] == 400
+    status, body = rename(patch, oats['ingredient_id'], 'brown rize')
+    assert status == 400 and body['similar'][0]['ingredient_name'] == 'brown rice'
+    status, body = rename(patch, oats['ingredient_id'], 'Brown rize', allow_similar=True)
+    assert status == 200 and body['updatedAttributes']['ingredient_name'] == 'brown rize'
+
+
+@pytest.mark.parametrize('field', ['default_portion_size', 'default_cooking_type'])
+def test_ingredient_defaults_must_be_strings(post, field):
+    status, body = create(post, 'oats', **{field: 2})
+
+    assert status == 400
+    assert body['error'] == f"{field} must be a string"
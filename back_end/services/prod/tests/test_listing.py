@@ -0,0 +1,83 @@
+"""common.listing: pages of a user's records, cursors and date ranges"""
+import pytest
+from common.codec import serialize_item
+from common.http import ApiError
+from common.listing import decode_cursor, encode_cursor, read_page
+from common.records import POOP, new_record
+
+DAYS = ['2025-03-20', '2025-03-21', '2025-03-22', '2025-03-23', '2025-03-24']
+
+
+@pytest.fixture
+def poop_table(record_tables):
+    for user, days in (('u1', DAYS), ('u2', DAYS[:1])):
+        for day in days:
+            _, item = new_record(POOP, {'time_of_day': 'morning', 'score': 3, 'poop_date': day}, user)
+            record_tables.put_item(TableName=POOP.table, Item=serialize_item(item))
+    return record_tables
+
+
+def page(dynamodb, user='u1', **params):
+    event = {'queryStringParameters': {name: str(value) for name, value in params.items()}}
+    return read_page(dynamodb, event, table=POOP.table, key=POOP.key, user_id=user)
+
+
+def days(items):
+    return [item['poop_date']['S'] for item in items]
+
+
+def test_cursors_page_through_the_user_records_in_date_order(poop_table):
+    seen, cursor, pages = [], None, 0
+    while True:
+        result = page(poop_table, limit=2, **({'cursor': cursor} if cursor else {}))
+        assert result.first == (cursor is None)
+        seen += days(result.items)
+        pages += 1
+        cursor = result.next_cursor
+        if not cursor:
+            break
+
+    assert seen == DAYS
+    assert pages == 3
+
+
+def test_date_ranges_include_both_ends(poop_table):
+    assert days(page(poop_table, **{'from': '2025-03-21', 'to': '2025-03-23'}).items) == DAYS[1:4]
+    assert days(page(poop_table, **{'from': '2025-03-23'}).items) == DAYS[3:]
+    assert days(page(poop_table, to='2025-03-20').items) == DAYS[:1]
+
+
+def test_a_cursor_round_trips_the_last_key():
+    key = {'user_id': {'S': 'u1'}, 'date-id': {'S': '2025-03-21#a'}}
+
+    assert decode_cursor(encode_cursor(key), 'user_id', 'date-id') == key
+
+
+@pytest.mark.parametrize('cursor', ['not base64 json!', encode_cursor(['a list']),
+                                    encode_cursor({'poop-id': {'S': 'x'}})])
+def test_malformed_cursors_are_refused(poop_table, cursor):
+    with pytest.raises(ApiError) as raised:
+        page(poop_table, cursor=cursor)
+
+    assert raised.value.status_code == 400
+
+
+def test_a_cursor_cannot_read_another_users_partition(poop_table):
+    # A cursor edited to start in u2's partition
+    cursor = encode_cursor({'user_id': {'S': 'u2'}, 'date-id': {'S': '2025-03-19#'}})
+
+    with pytest.raises(ApiError, match="Cursor was issued for a different query"):
+        page(poop_table, cursor=cursor)
+
+
+@pytest.mark.parametrize('limit', [0, 1001, 'ten'])
+def test_limits_outside_the_allowed_range_are_refused(poop_table, limit):
+    with pytest.raises(ApiError) as raised:
+        page(poop_table, limit=limit)
+
+    assert raised.value.status_code == 400
+
+
+def test_from_after_to_is_refused(poop_table):
+    with pytest.raises(ApiError, match="'from' must not be after 'to'"):
+        page(poop_table, **{'from': '2025-03-24', 'to': '2025-03-20'})
@@ -0,0 +1,89 @@
+"""common.patch: PATCH writes the fields sent, removes the ones sent as null"""
+import json
+import pytest
+from common.codec import serialize_item
+from common.http import ApiError
+from common.ingredients import INGREDIENT_FIELDS, INGREDIENTS_KEY, INGREDIENTS_TABLE, REQUIRED_INGREDIENT_FIELDS
+from common.patch import patch_clauses
+from conftest import load_module
+
+
+@pytest.fixture
+def patch(ingredients_table):
+    ingredients_table.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+        INGREDIENTS_KEY: 'i1', 'ingredient_name': 'oats', 'normalized_name': 'oats', 'record_type': 'ingredient',
+        'default_portion_size': 'small', 'default_cooking_type': 'boiled', 'version': 1
+    }))
+    return load_module('lambdas/ingredients/{ingredient_id}/patch.py')
+
+
+def send(patch, body):
+    result = patch.handler({'pathParameters': {'ingredient_id': 'i1'}, 'body': json.dumps(body)}, None)
+    return result['statusCode'], json.loads(result['body'])
+
+
+def stored(dynamodb):
+    return dynamodb.get_item(TableName=INGREDIENTS_TABLE, Key={INGREDIENTS_KEY: {'S': 'i1'}})['Item']
+
+
+def test_null_removes_the_attribute(patch, ingredients_table):
+    status, body = send(patch, {'default_cooking_type': None})
+
+    assert status == 200
+    assert body['updatedAttributes'] == {'default_cooking_type': None}
+    assert body['version'] == 2
+    item = stored(ingredients_table)
+    assert 'default_cooking_type' not in item
+    assert item['default_portion_size'] == {'S': 'small'}
+
+
+def test_only_the_fields_sent_are_written(patch, ingredients_table):
+    status, body = send(patch, {'default_portion_size': 'big'})
+
+    assert status == 200
+    assert body['updatedAttributes'] == {'default_portion_size': 'big'}
+    item = stored(ingredients_table)
+    assert item['default_cooking_type'] == {'S': 'boiled'}
+    assert item['ingredient_name'] == {'S': 'oats'}
+
+
+def test_unchanged_values_are_not_reported(patch):
+    _, body = send(patch, {'default_portion_size': 'small', 'default_cooking_type': 'raw'})
+
+    assert body['updatedAttributes'] == {'default_cooking_type': 'raw'}
+
+
+def test_removing_an_absent_attribute_reports_nothing(patch):
+    send(patch, {'default_cooking_type': None})
+
+    _, body = send(patch, {'default_cooking_type': None})
+
+    assert body['updatedAttributes'] == {}
+
+
+def test_required_fields_cannot_be_removed(patch, ingredients_table):
+    status, body = send(patch, {'default_portion_size': None})
+
+    assert status == 400
+    assert body['error'] == "default_portion_size cannot be removed"
+    assert stored(ingredients_table)['version'] == {'N': '1'}
+
+
+def test_patch_clauses_sets_and_removes():
+    patch = patch_clauses({'default_portion_size': 'big', 'default_cooking_type': None},
+                          INGREDIENT_FIELDS, required=REQUIRED_INGREDIENT_FIELDS)
+
+    assert patch.changes == {'default_portion_size': 'big', 'default_cooking_type': None}
+    assert patch.sets == ['#p0 = :p0']
+    assert patch.removes == ['#p1']
+    assert patch.names == {'#p0': 'default_portion_size', '#p1': 'default_cooking_type'}
+    assert patch.values == {':p0': {'S': 'big'}}
+
+
+@pytest.mark.parametrize('body, message', [
+    ({}, "Nothing to update"),
+    ({'colour': 'red'}, "Unknown fields: colour"),
+])
+def test_empty_or_unknown_patches_are_refused(body, message):
+    with pytest.raises(ApiError, match=message):
+        patch_clauses(body, INGREDIENT_FIELDS, required=REQUIRED_INGREDIENT_FIELDS)
@@ -0,0 +1,116 @@
+"""common.records: what a new record is made of, and how records are found and moved"""
+import pytest
+from common.codec import serialize_item
+from common.http import ApiError
+from common.records import FEELING, POOP, find_record, item_key, new_record, new_records, record_key, update_record
+
+
+def poop_body(**fields):
+    return {'time_of_day': 'morning', 'score': 3, 'poop_date': '2025-03-24', **fields}
+
+
+def test_new_record_keys_the_record_by_user_and_date():
+    record_id, item = new_record(POOP, poop_body(), 'u1')
+
+    assert item['user_id'] == 'u1'
+    assert item['date-id'] == f'2025-03-24#{record_id}'
+    assert item['poop-id'] == record_id
+    assert item['score'] == 3
+    assert item['version'] == 1
+
+
+@pytest.mark.parametrize('score', ['4', 'abc', {'value': 4}, [4], True, float('nan'), float('inf')])
+def test_new_record_rejects_scores_that_are_not_numbers(score):
+    with pytest.raises(ApiError) as raised:
+        new_record(POOP, poop_body(score=score), 'u1')
+
+    assert raised.value.status_code == 400
+    assert raised.value.message == "score must be a number"
+
+
+def test_new_record_stores_integral_floats_as_integers():
+    _, item = new_record(FEELING, {'feeling_score': 4.0, 'stress_level': 2.5, 'feeling_date': '2025-03-24'}, 'u1')
+
+    assert item['feeling_score'] == 4 and isinstance(item['feeling_score'], int)
+    assert item['stress_level'] == 2.5
+
+
+@pytest.mark.parametrize('time_of_day', [7, {'hour': 7}, ['morning'], False])
+def test_new_record_rejects_text_fields_that_are_not_strings(time_of_day):
+    with pytest.raises(ApiError, match="time_of_day must be a string"):
+        new_record(POOP, poop_body(time_of_day=time_of_day), 'u1')
+
+
+def test_new_records_names_the_invalid_item_of_a_batch():
+    with pytest.raises(ApiError, match=r"items\[1\]: score must be a number"):
+        new_records(POOP, [poop_body(), poop_body(score='4')], 'u1')
+
+
+@pytest.fixture
+def stored_poop(record_tables):
+    record_id, item = new_record(POOP, poop_body(), 'u1')
+    record_tables.put_item(TableName=POOP.table, Item=serialize_item(item))
+    return record_id
+
+
+def poop_items(dynamodb):
+    return dynamodb.scan(TableName=POOP.table)['Items']
+
+
+def test_records_are_only_found_by_their_owner(record_tables, stored_poop):
+    assert find_record(record_tables, POOP, 'u1', stored_poop)['score'] == {'N': '3'}
+    with pytest.raises(ApiError) as raised:
+        find_record(record_tables, POOP, 'u2', stored_poop)
+
+    assert raised.value.status_code == 404
+
+
+def test_a_new_date_moves_the_record_to_its_new_sort_key(record_tables, stored_poop):
+    key = item_key(find_record(record_tables, POOP, 'u1', stored_poop))
+
+    result = update_record(record_tables, POOP, key, {'poop_date': '2025-03-25', 'score': 4}, expected=1)
+
+    assert result['Attributes'] == serialize_item({'poop_date': '2025-03-25', 'score': 4, 'version': 2})
+    [moved] = poop_items(record_tables)
+    assert moved['date-id'] == {'S': f'2025-03-25#{stored_poop}'}
+    assert moved['score'] == {'N': '4'}
+    assert moved['time_of_day'] == {'S': 'morning'}
+    assert item_key(find_record(record_tables, POOP, 'u1', stored_poop)) == record_key('u1', '2025-03-25', stored_poop)
+
+
+def test_a_move_with_a_stale_version_is_a_409(record_tables, stored_poop):
+    key = item_key(find_record(record_tables, POOP, 'u1', stored_poop))
+
+    with pytest.raises(ApiError) as raised:
+        update_record(record_tables, POOP, key, {'poop_date': '2025-03-25'}, expected=2)
+
+    assert raised.value.status_code == 409
+    assert poop_items(record_tables)[0]['date-id'] == {'S': f'2025-03-24#{stored_poop}'}
+
+
+class WriteAfterRead:
+    """A client on which someone else updates the record right after every get_item"""
+
+    def __init__(self, dynamodb):
+        self.dynamodb = dynamodb
+
+    def __getattr__(self, name):
+        return getattr(self.dynamodb, name)
+
+    def get_item(self, **kwargs):
+        item = self.dynamodb.get_item(**kwargs)
+        self.dynamodb.update_item(TableName=kwargs['TableName'], Key=kwargs['Key'],
+                                  UpdateExpression='SET score = :s, version = version + :one',
+                                  ExpressionAttributeValues={':s': {'N': '5'}, ':one': {'N': '1'}})
+        return item
+
+
+def test_a_move_that_races_another_write_is_a_409_and_keeps_that_write(record_tables, stored_poop):
+    key = item_key(find_record(record_tables, POOP, 'u1', stored_poop))
+
+    with pytest.raises(ApiError, match="was changed while it was being moved"):
+        update_record(WriteAfterRead(record_tables), POOP, key, {'poop_date': '2025-03-25'})
+
+    [kept] = poop_items(record_tables)
+    assert kept['date-id'] == {'S': f'2025-03-24#{stored_poop}'}
+    assert kept['score'] == {'N': '5'}
@@ -0,0 +1,98 @@
+"""What the endpoints return: the records as the API describes them, without the tables' internal attributes"""
+import json
+import pytest
+from common.fields import INTERNAL_ATTRIBUTES
+from conftest import load_module
+
+POOP_ATTRIBUTES = {'poop-id', 'poop_date', 'time_of_day', 'score', 'version'}
+INGREDIENT_ATTRIBUTES = {'ingredients-id', 'ingredient_name', 'default_portion_size', 'version'}
+
+
+@pytest.fixture
+def poop(record_tables):
+    api = {
+        'post': load_module('lambdas/poop/post.py'),
+        'list': load_module('lambdas/poop/get.py'),
+        'get': load_module('lambdas/poop/{poop_id}/get.py'),
+        'put': load_module('lambdas/poop/{poop_id}/put.py'),
+        'patch': load_module('lambdas/poop/{poop_id}/patch.py')
+    }
+    body = json.dumps({'time_of_day': 'morning', 'score': 3, 'poop_date': '2025-03-24'})
+    api['poop_id'] = json.loads(api['post'].handler({'body': body}, None)['body'])['poop_id']
+    return api
+
+
+@pytest.fixture
+def ingredients_api(ingredients_table):
+    api = {
+        'post': load_module('lambdas/ingredients/post.py'),
+        'list': load_module('lambdas/ingredients/get.py'),
+        'get': load_module('lambdas/ingredients/{ingredient_id}/get.py'),
+        'put': load_module('lambdas/ingredients/{ingredient_id}/put.py'),
+        'patch': load_module('lambdas/ingredients/{ingredient_id}/patch.py')
+    }
+    body = json.dumps({'ingredient_name': 'oats', 'default_portion_size': 'small'})
+    api['ingredient_id'] = json.loads(api['post'].handler({'body': body}, None)['body'])['ingredient_id']
+    return api
+
+
+def call(handler, query=None, path=None, body=None, headers=None):
+    result = handler({'queryStringParameters': query, 'pathParameters': path, 'headers': headers,
+                      'body': json.dumps(body) if body is not None else None}, None)
+    return result['statusCode'], json.loads(result['body'])
+
+
+def test_poop_list_and_item_show_only_the_record(poop):
+    _, page = call(poop['list'].handler)
+    _, item = call(poop['get'].handler, path={'poop_id': poop['poop_id']})
+
+    assert set(page['items'][0]) == POOP_ATTRIBUTES
+    assert set(item) == POOP_ATTRIBUTES
+
+
+def test_poop_internal_attributes_cannot_be_asked_for(poop):
+    _, page = call(poop['list'].handler, query={'fields': 'score,user_id,date-id'})
+    _, item = call(poop['get'].handler, query={'fields': 'score,user_id'}, path={'poop_id': poop['poop_id']})
+
+    assert page['items'] == [{'score': 3}]
+    assert item == {'score': 3}
+
+
+def test_poop_updates_and_conflicts_show_only_the_record(poop):
+    path = {'poop_id': poop['poop_id']}
+    # A new date moves the record, writing a new date-id
+    _, put = call(poop['put'].handler, path=path,
+                  body={'time_of_day': 'evening', 'score': 4, 'poop_date': '2025-03-25'})
+    _, patch = call(poop['patch'].handler, path=path, body={'poop_date': '2025-03-26'})
+    status, conflict = call(poop['patch'].handler, path=path, body={'score': 5, 'version': 1})
+
+    assert not set(put) & INTERNAL_ATTRIBUTES
+    assert patch == {'poop_date': '2025-03-26', 'version': 3}
+    assert status == 409
+    assert set(conflict['current']) == POOP_ATTRIBUTES
+
+
+def test_ingredient_responses_leave_out_the_index_attributes(ingredients_api):
+    path = {'ingredient_id': ingredients_api['ingredient_id']}
+
+    _, page = call(ingredients_api['list'].handler)
+    _, item = call(ingredients_api['get'].handler, path=path)
+    _, put = call(ingredients_api['put'].handler, path=path,
+                  body={'ingredient_name': 'rolled oats', 'default_portion_size': 'big'})
+    _, patch = call(ingredients_api['patch'].handler, path=path, body={'ingredient_name': 'porridge oats'})
+
+    assert set(page['items'][0]) == INGREDIENT_ATTRIBUTES
+    assert set(item) == INGREDIENT_ATTRIBUTES
+    assert set(put['updatedAttributes']) == {'ingredient_name', 'default_portion_size', 'version'}
+    assert patch['updatedAttributes'] == {'ingredient_name': 'porridge oats'}
+
+
+def test_every_list_response_varies_on_the_negotiated_headers(poop):
+    listed = poop['list'].handler({'headers': None}, None)
+    revalidated = poop['list'].handler({'headers': {'If-None-Match': listed['headers']['ETag']}}, None)
+    other_user = poop['list'].handler({'requestContext': {'authorizer': {'claims': {'sub': 'u2'}}}}, None)
+
+    assert revalidated['statusCode'] == 304
+    assert other_user['statusCode'] == 404
+    for result in (listed, revalidated, other_user):
+        assert result['headers']['Vary'] == 'Accept, Accept-Encoding'
@@ -0,0 +1,68 @@
+"""common.router: one function serving the endpoints found below its directory"""
+import json
+import os
+import pytest
+import yaml
+from common.router import discover_routes
+from conftest import PROD_DIR, load_module
+
+AUTHORIZED = {'requestContext': {'authorizer': {'claims': {'sub': 'u1'}}}}
+
+
+def call(router, method, resource, body=None, **path):
+    event = {'httpMethod': method, 'resource': resource, 'pathParameters': path or None,
+             'body': None if body is None else json.dumps(body), **AUTHORIZED}
+    result = router.handler(event, None)
+    return result['statusCode'], json.loads(result['body'])
+
+
+def test_every_api_endpoint_has_a_handler():
+    with open(os.path.join(PROD_DIR, 'api.yaml')) as spec:
+        paths = yaml.safe_load(spec)['paths']
+    endpoints = {(path, method.upper()) for path, methods in paths.items() for method in methods
+                 if method in ('get', 'post', 'put', 'patch', 'delete')}
+
+    assert set(discover_routes(os.path.join(PROD_DIR, 'lambdas'))) == endpoints
+
+
+def test_a_resource_router_only_serves_its_own_resource():
+    routes = discover_routes(os.path.join(PROD_DIR, 'lambdas', 'poop'), prefix='/poop')
+
+    assert set(routes) == {('/poop', 'GET'), ('/poop', 'POST'), ('/poop/batch', 'POST'),
+                           ('/poop/{poop_id}', 'GET'), ('/poop/{poop_id}', 'PUT'),
+                           ('/poop/{poop_id}', 'PATCH'), ('/poop/{poop_id}', 'DELETE')}
+    assert routes[('/poop/{poop_id}', 'PUT')] == os.path.join(PROD_DIR, 'lambdas', 'poop', '{poop_id}', 'put.py')
+
+
+def test_events_reach_the_handler_of_their_resource_and_method(record_tables):
+    router = load_module('lambdas/poop/router.py').router
+
+    status, created = call(router, 'POST', '/poop', {'time_of_day': 'morning', 'score': 3, 'poop_date': '2025-03-24'})
+    _, fetched = call(router, 'GET', '/poop/{poop_id}', poop_id=created['poop_id'])
+
+    assert status == 200
+    assert fetched['score'] == 3
+    # Only the handlers used so far were imported
+    assert set(router._handlers) == {('/poop', 'POST'), ('/poop/{poop_id}', 'GET')}
+
+
+def test_the_api_router_serves_every_resource(record_tables):
+    router = load_module('lambdas/router.py').router
+
+    status, created = call(router, 'POST', '/feelings', {'feeling_score': 2, 'stress_level': 1,
+                                                         'feeling_date': '2025-03-24'})
+
+    assert status == 200
+    assert 'feeling_id' in created
+
+
+@pytest.mark.parametrize('method, resource, status', [
+    ('PATCH', '/poop', 405),
+    ('GET', '/poop/batch', 405),
+    ('GET', '/feelings', 404),
+    ('GET', None, 404),
+])
+def test_unrouted_requests_are_refused(method, resource, status):
+    router = load_module('lambdas/poop/router.py').router
+
+    assert call(router, method, resource)[0] == status
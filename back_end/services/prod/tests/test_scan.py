@@ -0,0 +1,134 @@
+"""common.scan: whole tables read in parallel segments, at a capped read rate"""
+import threading
+import pytest
+from common.codec import serialize_item
+from common.ingredients import INGREDIENTS_KEY, INGREDIENTS_TABLE
+from common.scan import CapacityLimiter, parallel_scan
+
+
+class SegmentedTable:
+    """A scan-only client over `count` numbered items: segment i holds those whose number is i modulo
+    the segment count, read page_size at a time at `units` capacity units per page"""
+
+    def __init__(self, count, page_size=3, units=5.0, fail_segment=None):
+        self.items = [{'n': {'N': str(n)}} for n in range(count)]
+        self.page_size = page_size
+        self.units = units
+        self.fail_segment = fail_segment
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def scan(self, **kwargs):
+        with self.lock:
+            self.calls.append(kwargs)
+        segment, segments = kwargs['Segment'], kwargs['TotalSegments']
+        if segment == self.fail_segment:
+            raise RuntimeError(f"segment {segment} failed")
+        mine = [item for item in self.items if int(item['n']['N']) % segments == segment]
+        start = kwargs.get('ExclusiveStartKey', {}).get('offset', 0)
+        page = {'Items': mine[start:start + self.page_size]}
+        if start + self.page_size < len(mine):
+            page['LastEvaluatedKey'] = {'offset': start + self.page_size}
+        if kwargs.get('ReturnConsumedCapacity'):
+            page['ConsumedCapacity'] = {'CapacityUnits': self.units}
+        return page
+
+
+def numbers(items):
+    return sorted(int(item['n']['N']) for item in items)
+
+
+def test_every_item_is_read_once_across_the_segments():
+    table = SegmentedTable(50)
+
+    items = list(parallel_scan(table, 'numbers', segments=4))
+
+    assert numbers(items) == list(range(50))
+    assert {call['Segment'] for call in table.calls} == {0, 1, 2, 3}
+    assert all(call['TotalSegments'] == 4 and call['TableName'] == 'numbers' for call in table.calls)
+    # 13 items in segments 0 and 1, 12 in 2 and 3: five pages of three each, and four
+    assert len(table.calls) == 5 + 5 + 4 + 4
+
+
+def test_projection_and_other_arguments_reach_every_request():
+    table = SegmentedTable(10)
+
+    list(parallel_scan(table, 'numbers', segments=2, projection=('n',), FilterExpression='attribute_exists(n)'))
+
+    for call in table.calls:
+        assert call['ProjectionExpression'] == '#a0'
+        assert call['ExpressionAttributeNames'] == {'#a0': 'n'}
+        assert call['FilterExpression'] == 'attribute_exists(n)'
+
+
+def test_a_failed_segment_fails_the_scan():
+    with pytest.raises(RuntimeError, match="segment 1 failed"):
+        list(parallel_scan(SegmentedTable(20, fail_segment=1), 'numbers', segments=3))
+
+
+def test_a_consumer_that_stops_early_stops_the_workers():
+    table = SegmentedTable(10000, page_size=1)
+
+    for count, _ in enumerate(parallel_scan(table, 'numbers', segments=4), start=1):
+        if count == 5:
+            break
+
+    # Pages read: the 5 consumed, at most 8 waiting in the queue and 1 per segment it could not hand over
+    assert len(table.calls) <= 5 + 8 + 4
+
+
+def test_read_capacity_asks_for_the_consumed_capacity():
+    table = SegmentedTable(10)
+
+    list(parallel_scan(table, 'numbers', segments=2, read_capacity=1000))
+
+    assert all(call['ReturnConsumedCapacity'] == 'TOTAL' for call in table.calls)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_the_limiter_waits_out_capacity_already_spent():
+    clock = Clock()
+    limiter = CapacityLimiter(10, clock=clock, sleep=clock.sleep)
+
+    limiter.wait()
+    limiter.spend(25)
+    limiter.wait()
+
+    # 10 units were saved up, the other 15 take 1.5 s to earn
+    assert clock.slept == [1.5]
+
+
+def test_the_limiter_saves_up_at_most_a_second_of_capacity():
+    clock = Clock()
+    limiter = CapacityLimiter(10, clock=clock, sleep=clock.sleep)
+
+    clock.now = 60
+    limiter.spend(30)
+    limiter.wait()
+
+    assert clock.slept == [2.0]
+
+
+def test_scans_a_real_table_in_segments(ingredients_table):
+    for n in range(30):
+        ingredients_table.put_item(TableName=INGREDIENTS_TABLE, Item=serialize_item({
+            INGREDIENTS_KEY: f'i{n}', 'ingredient_name': f'ingredient {n}'
+        }))
+
+    items = list(parallel_scan(ingredients_table, INGREDIENTS_TABLE, segments=3,
+                               projection=(INGREDIENTS_KEY,), Limit=4))
+
+    assert sorted(item[INGREDIENTS_KEY]['S'] for item in items) == sorted(f'i{n}' for n in range(30))
+    assert all(set(item) == {INGREDIENTS_KEY} for item in items)
@@ -15,7 +15,7 @@ import {
     TableHeader,
     TableRow,
 } from "../components/Table";
-import { Ingredient } from "../types";
+import { Ingredient, Page } from "../types";
 
 import {
     Form,
@@ -52,10 +52,18 @@ export default function DashboardPage() {
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const response = await axios.get(
-                    "https://mrmevidrmf.execute-api.eu-central-1.amazonaws.com/prod/ingredients"
-                );
-                setIngredients(response.data);
+                // The list endpoint is paginated, keep following next_cursor until the last page
+                const all: Ingredient[] = [];
+                let cursor: string | null = null;
+                do {
+                    const response: { data: Page<Ingredient> } = await axios.get(
+                        "https://mrmevidrmf.execute-api.eu-central-1.amazonaws.com/prod/ingredients",
+                        { params: cursor ? { cursor } : {} }
+                    );
+                    all.push(...response.data.items);
+                    cursor = response.data.next_cursor;
+                } while (cursor);
+                setIngredients(all);
             } catch (error) {
                 console.error("Failed to fetch ingredients", error);
             }
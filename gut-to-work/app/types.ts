@@ -7,3 +7,9 @@ export type Ingredient = {
 };
 
 export type Ingredients = Ingredient[]; // or Array<Ingredient>
+
+// Shape of a single page returned by the list endpoints
+export type Page<T> = {
+  items: T[];
+  next_cursor: string | null;
+};